@@ -3,6 +3,10 @@ import logging
 
 from dotenv import load_dotenv
 
+from Http.browser_engines import browser_engine, launch_browser
+from Http.session_cache import SessionCache
+from core.services.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
 load_dotenv()
@@ -11,31 +15,91 @@ load_dotenv()
 class BrowserManager:
     """Manages browser interactions."""
 
-    def __init__(self, playwright, domain_url, store_dict=dict, user_data_dir=''):
+    def __init__(self, playwright, domain_url, store_dict=dict, user_data_dir='', request_blocker=None):
         self.p = playwright
         self.store_dict = store_dict
         self.user_data_dir = f'profile/{user_data_dir}'
         self.browser = None
+        self.context = None
         self.page = None
         self.domain = domain_url
+        # Saved login state lives in the profile dir, keyed by domain and user
+        self.session_cache = SessionCache(self.user_data_dir)
+        self.session_key = (store_dict.get('domain'), store_dict.get('username_login'))
+        # Optional RequestBlocker installed on every context before the first navigation
+        self.request_blocker = request_blocker
+
+    def context_options(self):
+        """Options for ``new_context`` that reuse a cached login when there is one."""
+        storage_state = self.session_cache.load(*self.session_key)
+        return {'storage_state': storage_state} if storage_state else {}
 
     async def launch_browser(self):
-        headless = int(os.getenv("HEADLESS")) == 1
-        self.browser = await self.p.firefox.launch(headless=headless)
-        context = await self.browser.new_context()
-        self.page = await context.new_page()
-        """Logs into WordPress if login fields are detected."""
+        headless = int(os.getenv("HEADLESS", "0")) == 1
+        engine, launch_options = browser_engine(self.store_dict)
+        self.browser = await launch_browser(self.p, engine, headless, **launch_options)
+        self.context = await self.browser.new_context(**self.context_options())
+        if self.request_blocker:
+            await self.request_blocker.install(self.context)
+        await self.login()
+
+    async def login(self):
+        """Opens wp-admin and logs in only if WordPress asks for it."""
+        self.page = await self.context.new_page()
         await self.page.goto(self.domain)
-        if await self.page.query_selector('#user_login'):
+        await self.authenticate()
+
+    def needs_login(self, page=None):
+        return 'wp-login.php' in (page or self.page).url
+
+    async def authenticate(self, page=None):
+        """Logs into WordPress if login fields are detected."""
+        page = page or self.page
+        if await page.query_selector('#user_login'):
             logger.info("Logging in to WordPress...")
-            await self.page.fill('input[name="log"]', self.store_dict['username_login'])
-            await self.page.fill('input[name="pwd"]', self.store_dict['password_login'])
-            await self.page.click('input[name="wp-submit"]')
+            await page.fill('input[name="log"]', self.store_dict['username_login'])
+            await page.fill('input[name="pwd"]', self.store_dict['password_login'])
+            await page.click('input[name="wp-submit"]')
+            await page.wait_for_load_state('networkidle')
+
+            metrics.incr('session.logins')
+            if not self.needs_login(page):
+                await self.session_cache.save(self.context, *self.session_key)
+            else:
+                self.session_cache.invalidate(*self.session_key)
+        else:
+            metrics.incr('session.reused')
+            await page.wait_for_load_state('networkidle')
+
+        metrics.gauge('session.logins_per_hour', metrics.rate('session.logins', per=3600))
 
-        await self.page.wait_for_load_state('networkidle')
+    async def ensure_logged_in(self, url, page=None):
+        """Re-authenticates after a redirect to wp-login.php and reopens ``url``."""
+        page = page or self.page
+        if not self.needs_login(page):
+            return False
+        logger.info("Session expired, logging in again...")
+        await self.authenticate(page)
+        await page.goto(url)
+        return True
 
     async def initialize(self):
         """Initializes the browser and logs in."""
         await self.launch_browser()
 
         return self.browser, self.page
+
+    async def open(self, context):
+        """Logs in inside a context handed out by a BrowserPool."""
+        self.context = context
+        if self.request_blocker:
+            await self.request_blocker.install(self.context)
+        await self.login()
+
+        return self.page
+
+    async def close_browser(self):
+        """Closes the browser this manager launched itself, pooled browsers are left alone."""
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
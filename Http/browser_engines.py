@@ -0,0 +1,41 @@
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+ENGINES = ('chromium', 'firefox', 'webkit')
+DEFAULT_ENGINE = 'firefox'
+
+# Launch options that keep each engine lean inside containers
+ENGINE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    'chromium': {'args': ['--disable-dev-shm-usage', '--disable-gpu', '--disable-extensions']},
+    'firefox': {},
+    'webkit': {},
+}
+
+
+def browser_engine(store_dict: Optional[dict] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Engine name and launch options for a store.
+
+    The store's ``browser_engine`` / ``browser_launch_options`` win over
+    BROWSER_ENGINE / BROWSER_LAUNCH_OPTIONS (a JSON object, e.g.
+    ``{"args": ["--lang=en-US"]}``), which win over ENGINE_DEFAULTS.
+    """
+    store_dict = store_dict or {}
+    name = (store_dict.get('browser_engine') or os.environ.get('BROWSER_ENGINE') or DEFAULT_ENGINE).lower()
+    if name not in ENGINES:
+        raise ValueError(f"Unknown browser engine '{name}', expected one of {', '.join(ENGINES)}")
+
+    options = dict(ENGINE_DEFAULTS[name])
+    env_options = os.environ.get('BROWSER_LAUNCH_OPTIONS')
+    if env_options:
+        options.update(json.loads(env_options))
+    store_options = store_dict.get('browser_launch_options')
+    if store_options:
+        options.update(json.loads(store_options) if isinstance(store_options, str) else store_options)
+    return name, options
+
+
+async def launch_browser(playwright, engine: str, headless: bool, **launch_options):
+    """``playwright.<engine>.launch`` with the given options."""
+    return await getattr(playwright, engine).launch(headless=headless, **launch_options)
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from Http.browser_engines import browser_engine, launch_browser
+from core.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool:
+    """
+    Long-lived browser owned by the worker, handing out one isolated
+    ``BrowserContext`` per store.
+
+    At most ``max_contexts`` contexts are open at once, further callers wait.
+    Before every hand-out the browser is checked and relaunched if it crashed
+    or disconnected. Launch and acquire latency are recorded as
+    ``browser_pool.launch_seconds`` / ``browser_pool.acquire_seconds``.
+
+    Long-lived contexts grow, so holders call ``needs_recycle`` between items
+    and swap their context with ``renew`` once it loaded ``recycle_pages``
+    pages or the MemoryWatchdog saw the browser above its soft limit. Above
+    the hard limit the browser is restarted: new hand-outs wait until every
+    context in use has been renewed or returned, then Firefox is relaunched,
+    so no in-flight item is interrupted.
+
+    Example:
+        >>> pool = BrowserPool(max_contexts=4)
+        >>> await pool.start()
+        >>> async with pool.context() as context:
+        ...     page = await context.new_page()
+    """
+
+    def __init__(self, max_contexts: int = 4, headless: bool = None, recycle_pages: int = 0, watchdog=None,
+                 engine: str = None, launch_options: dict = None):
+        self.max_contexts = max_contexts
+        # One engine per pool, stores asking for another one launch their own browser
+        default_engine, default_options = browser_engine()
+        self.engine = engine or default_engine
+        self.launch_options = launch_options if launch_options is not None else default_options
+        self.recycle_pages = recycle_pages
+        self.watchdog = watchdog
+        self.headless = headless if headless is not None else int(os.getenv("HEADLESS", "0")) == 1
+        self.playwright = None
+        self.browser = None
+        self.active_contexts = 0
+        self._slots = asyncio.Semaphore(max_contexts)
+        self._launch_lock = asyncio.Lock()
+        # Pages opened and creation time per context, for recycling
+        self._usage = {}
+        self._holders = {}
+        self._restart = asyncio.Condition()
+        self.restart_requested = False
+
+    async def start(self):
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+        await self.ensure_browser()
+        return self
+
+    async def _launch(self):
+        started = time.perf_counter()
+        self.browser = await launch_browser(self.playwright, self.engine, self.headless, **self.launch_options)
+        elapsed = time.perf_counter() - started
+        metrics.observe("browser_pool.launch_seconds", elapsed)
+        metrics.incr("browser_pool.launches")
+        logger.info(f"Browser ({self.engine}) launched in {elapsed:.2f}s")
+
+    def is_healthy(self) -> bool:
+        return self.browser is not None and self.browser.is_connected()
+
+    async def ensure_browser(self):
+        """Launch the browser, or relaunch it when it is no longer connected."""
+        async with self._launch_lock:
+            if self.is_healthy():
+                return self.browser
+            if self.browser is not None:
+                logger.warning("Browser disconnected, relaunching")
+                metrics.incr("browser_pool.relaunches")
+                try:
+                    await self.browser.close()
+                except Exception:
+                    pass
+            await self._launch()
+            return self.browser
+
+    async def _new_context(self, **context_options):
+        async with self._restart:
+            await self._restart.wait_for(lambda: not self.restart_requested)
+            browser = await self.ensure_browser()
+            context = await browser.new_context(**context_options)
+            self.active_contexts += 1
+        usage = self._usage[id(context)] = {'pages': 0, 'created_at': time.time()}
+
+        def count_page(request):
+            if request.is_navigation_request():
+                usage['pages'] += 1
+
+        context.on("request", count_page)
+        metrics.gauge("browser_pool.active_contexts", self.active_contexts)
+        return context
+
+    async def _release_context(self, context):
+        self._usage.pop(id(context), None)
+        try:
+            await context.close()
+        except Exception as e:
+            logger.warning(f"Failed to close browser context: {e}")
+        async with self._restart:
+            self.active_contexts -= 1
+            metrics.gauge("browser_pool.active_contexts", self.active_contexts)
+            if self.restart_requested and self.active_contexts == 0:
+                await self._restart_browser()
+                self._restart.notify_all()
+
+    @asynccontextmanager
+    async def context(self, **context_options):
+        """Acquire an isolated context, closed and released on exit."""
+        started = time.perf_counter()
+        async with self._slots:
+            holder = {'context': await self._new_context(**context_options)}
+            metrics.observe("browser_pool.acquire_seconds", time.perf_counter() - started)
+            self._holders[id(holder['context'])] = holder
+            try:
+                yield holder['context']
+            finally:
+                if holder['context'] is not None:
+                    self._holders.pop(id(holder['context']), None)
+                    await self._release_context(holder['context'])
+
+    def needs_recycle(self, context) -> bool:
+        """True once ``context`` should be swapped for a fresh one, checked between items."""
+        usage = self._usage.get(id(context))
+        if usage is None:
+            return False
+        if self.watchdog and self.watchdog.over_hard and not self.restart_requested:
+            logger.warning(f"Browser uses {self.watchdog.browser_rss_mb:.0f} MB, restarting once contexts are renewed")
+            self.restart_requested = True
+        if self.restart_requested:
+            return True
+        if self.recycle_pages and usage['pages'] >= self.recycle_pages:
+            return True
+        return bool(self.watchdog) and self.watchdog.over_soft_at > usage['created_at']
+
+    async def renew(self, context, **context_options):
+        """Close ``context`` and return a fresh one in the same slot; the holder re-opens its pages."""
+        holder = self._holders.pop(id(context), None)
+        if holder is not None:
+            holder['context'] = None
+        await self._release_context(context)
+        metrics.incr("browser_pool.recycled_contexts")
+        fresh = await self._new_context(**context_options)
+        if holder is not None:
+            holder['context'] = fresh
+            self._holders[id(fresh)] = holder
+        return fresh
+
+    async def _restart_browser(self):
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+            self.browser = None
+        metrics.incr("browser_pool.restarts")
+        await self.ensure_browser()
+        self.restart_requested = False
+        if self.watchdog:
+            # The last sample still shows the old browser, wait for a fresh one
+            self.watchdog.reset()
+
+    async def close(self):
+        if self.browser is not None:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
+            self.browser = None
+        if self.playwright is not None:
+            await self.playwright.stop()
+            self.playwright = None
@@ -1,5 +1,5 @@
 from abc import abstractmethod, ABC
-from typing import Iterable
+from typing import Dict, Iterable
 
 from core import BaseRepository
 from core.models.history_listing_model import VDHHistoryListingBase
@@ -8,3 +8,6 @@ from core.models.history_listing_model import VDHHistoryListingBase
 class HistoryListingRepoInterface(BaseRepository, ABC):
     async def get_histories_not_clicked(self) -> Iterable[VDHHistoryListingBase]:
         ...
+
+    async def update_clicked_many(self, statuses: Dict[int, int]) -> int:
+        ...
@@ -15,6 +15,7 @@ class Container(containers.DeclarativeContainer):
 
     # Create a provider for the DB pool
     # Important: Use Factory instead of Resource for async resources
+    # connect() returns the process-wide pool for the DSN from core.database.pool_registry.db_pools
     db_pool = providers.Factory(
         lambda connector: connector.connect(),
         connector=mysql_connector
@@ -39,3 +40,7 @@ class Container(containers.DeclarativeContainer):
         StoreService,
         store_repository=store_repository,
     )
+
+
+# Shared by the publish engines so every store run reuses the same connector and pool
+container = Container()
@@ -1,4 +1,4 @@
-from typing import Iterable
+from typing import Dict, Iterable
 
 from Http.contracts.repositories.history_listing_repository import \
     HistoryListingRepoInterface as HistoryListingRepositoryContract
@@ -23,3 +23,24 @@ class HistoryListingRepository(HistoryListingRepositoryContract):
                 'product_wp_id',
             ]
         )
+
+    async def update_clicked_many(self, statuses: Dict[int, int]) -> int:
+        """
+        Sets ``is_clicked_submit`` of many rows in one statement.
+
+        Example:
+            >>> await repo.update_clicked_many({12: 1, 13: 3})
+        """
+        if not statuses:
+            return 0
+        cases = " ".join(["WHEN %s THEN %s"] * len(statuses))
+        placeholders = ", ".join(["%s"] * len(statuses))
+        query = (f"UPDATE {self.table_name} SET is_clicked_submit = CASE id {cases} END "
+                 f"WHERE id IN ({placeholders})")
+        values = [value for item in statuses.items() for value in item] + list(statuses)
+
+        async with self.db_pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(query, values)
+                await conn.commit()
+                return cur.rowcount
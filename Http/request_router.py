@@ -0,0 +1,79 @@
+import logging
+import os
+from typing import Iterable, Optional
+from urllib.parse import urlparse
+
+from core.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCKED_TYPES = ('image', 'media', 'font')
+DEFAULT_BLOCKED_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'facebook.net',
+    'facebook.com',
+    'hotjar.com',
+    'clarity.ms',
+    'fonts.googleapis.com',
+    'fonts.gstatic.com',
+    'gravatar.com',
+    # Jetpack stats only: wp.com also serves Jetpack's CDN (c0/s0.wp.com) scripts the editor loads
+    'stats.wp.com',
+    'pixel.wp.com',
+)
+
+
+class RequestBlocker:
+    """
+    Routing layer for a browser context that drops what the publish flow never needs.
+
+    Requests are aborted when their resource type is in ``blocked_types``
+    (images, media, fonts by default) or their host matches ``blocked_hosts``
+    (analytics / third-party plugin hosts, subdomains included). Documents,
+    scripts, stylesheets and XHR from the store itself always pass, so
+    ``#publishing-action`` and the editor keep working.
+
+    Example:
+        >>> blocker = RequestBlocker()
+        >>> await blocker.install(context)
+    """
+
+    def __init__(
+            self,
+            blocked_types: Iterable[str] = DEFAULT_BLOCKED_TYPES,
+            blocked_hosts: Iterable[str] = DEFAULT_BLOCKED_HOSTS,
+    ):
+        self.blocked_types = {t.strip() for t in blocked_types if t.strip()}
+        self.blocked_hosts = tuple(h.strip().lower() for h in blocked_hosts if h.strip())
+
+    @classmethod
+    def from_env(cls) -> Optional['RequestBlocker']:
+        """Build the blocker from BLOCK_HEAVY_ASSETS / BLOCKED_RESOURCE_TYPES / BLOCKED_HOSTS."""
+        if os.environ.get('BLOCK_HEAVY_ASSETS', '0') != '1':
+            return None
+        types = os.environ.get('BLOCKED_RESOURCE_TYPES')
+        hosts = os.environ.get('BLOCKED_HOSTS')
+        return cls(
+            blocked_types=types.split(',') if types is not None else DEFAULT_BLOCKED_TYPES,
+            blocked_hosts=hosts.split(',') if hosts is not None else DEFAULT_BLOCKED_HOSTS,
+        )
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.blocked_types:
+            return True
+        host = (urlparse(url).hostname or '').lower()
+        return any(host == blocked or host.endswith(f'.{blocked}') for blocked in self.blocked_hosts)
+
+    async def install(self, context) -> None:
+        await context.route('**/*', self.handle)
+
+    async def handle(self, route) -> None:
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            metrics.incr('router.blocked')
+            await route.abort()
+            return
+        metrics.incr('router.allowed')
+        await route.continue_()
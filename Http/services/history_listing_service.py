@@ -1,13 +1,74 @@
+import asyncio
 import os
+import time
 from typing import Optional, Any, Dict, Iterable
-import requests
 
 from Http.contracts.repositories.history_listing_repository import \
     HistoryListingRepoInterface as HistoryListingRepository, HistoryListingRepoInterface
 from core.models.history_listing_model import VDHHistoryListingBase
+from core.services.http_client import HttpClient
+from core.services.metrics import metrics
+from core.services.status_journal import StatusJournal
+from core.services.store_list_cache import StoreListCache
+from core.services.write_behind import WriteBehindBatcher
 
 SUCCESS = 1
 
+# One keep-alive pool to DOMAIN_API for the whole process, closed in Worker.shutdown
+status_client = HttpClient(
+    default_timeout=float(os.environ.get('STATUS_API_TIMEOUT', 10)),
+    default_connect_timeout=float(os.environ.get('STATUS_API_CONNECT_TIMEOUT', 5)),
+    default_retries=int(os.environ.get('STATUS_API_RETRIES', 2)),
+    use_http2=False,
+    persistent=True,
+    max_connections=int(os.environ.get('STATUS_API_MAX_CONNECTIONS', 20)),
+    max_keepalive_connections=int(os.environ.get('STATUS_API_MAX_KEEPALIVE', 10)),
+    max_concurrency=int(os.environ.get('STATUS_API_MAX_CONCURRENCY', 20)) or None,
+)
+
+# STATUS_BATCH=1 queues status changes in one write-behind batcher per process.
+# STATUS_BULK_MODE picks how a batch is written: 'api' (one POST to
+# STATUS_BULK_PATH), 'database' (one UPDATE ... CASE through the repository)
+# or 'single' (one update_history request per id left after coalescing)
+STATUS_BULK_MODES = ('single', 'api', 'database')
+_status_batcher: Optional[WriteBehindBatcher] = None
+# With STATUS_JOURNAL=1 the worker journals every change locally first and
+# drains the journal to DOMAIN_API in the background
+_status_journal: Optional[StatusJournal] = None
+# With STORE_LIST_CACHE=1 the shared store list can predate this process's own
+# changes, the cache serves them over its snapshot
+_store_list_cache: Optional[StoreListCache] = None
+
+
+def shared_status_batcher(service: 'HistoryListingService') -> WriteBehindBatcher:
+    global _status_batcher
+    if _status_batcher is None or _status_batcher.closed:
+        _status_batcher = WriteBehindBatcher(
+            service.send_statuses,
+            max_batch=int(os.environ.get('STATUS_BATCH_SIZE', 100)),
+            interval=float(os.environ.get('STATUS_BATCH_INTERVAL', 1.0)),
+            name='status_batch',
+        )
+    return _status_batcher
+
+
+def use_status_journal(journal: Optional[StatusJournal]) -> None:
+    """Routes every HistoryListingService.update_clicked of the process through ``journal``."""
+    global _status_journal
+    _status_journal = journal
+
+
+def use_store_list_cache(cache: Optional[StoreListCache]) -> None:
+    """Reports every HistoryListingService.update_clicked of the process to ``cache``."""
+    global _store_list_cache
+    _store_list_cache = cache
+
+
+async def close_status_batcher() -> None:
+    """Flushes the queued status changes, awaited in Worker.shutdown."""
+    if _status_batcher is not None:
+        await _status_batcher.close()
+
 
 class HistoryListingService:
     history_listing_repo: HistoryListingRepoInterface
@@ -15,21 +76,36 @@ class HistoryListingService:
     def __init__(
             self,
             history_listing_repository: HistoryListingRepository,
+            http_client: Optional[HttpClient] = None,
+            batcher: Optional[WriteBehindBatcher] = None,
+            bulk_mode: Optional[str] = None,
     ):
         self.history_listing_repo = history_listing_repository
+        self.http_client = http_client or status_client
+        self.bulk_mode = bulk_mode or os.environ.get('STATUS_BULK_MODE', 'single')
+        if self.bulk_mode not in STATUS_BULK_MODES:
+            raise ValueError(f"Unknown STATUS_BULK_MODE '{self.bulk_mode}', expected one of {STATUS_BULK_MODES}")
+        self.batcher = batcher
+        if self.batcher is None and os.environ.get('STATUS_BATCH', '0') == '1':
+            self.batcher = shared_status_batcher(self)
 
     async def get_history_listings(self) -> Iterable[VDHHistoryListingBase]:
         return await self.history_listing_repo.get_histories_not_clicked()
 
     async def update_clicked(self, history_id: int, status: int = SUCCESS) -> dict[str, Any]:
-        url = f"{os.environ.get('DOMAIN_API')}/api/update_history/{history_id}"
-        headers = {
-            "Accept": "application/json"
-        }
-
-        payload = {"is_clicked_submit": status}
+        """Sets ``is_clicked_submit``; when journaled or batched the change is queued and ``[]`` is returned."""
+        if _store_list_cache is not None:
+            _store_list_cache.record_status(history_id, status)
+        if _status_journal is not None:
+            await _status_journal.record(history_id, status)
+            return []
+        if self.batcher is not None:
+            await self.batcher.add(history_id, status)
+            return []
+        return await self.post_clicked(history_id, status)
 
-        response = requests.post(url, headers=headers, json=payload)
+    async def post_clicked(self, history_id: int, status: int = SUCCESS) -> dict[str, Any]:
+        response = await self._post(f"/api/update_history/{history_id}", {"is_clicked_submit": status})
         data = []
 
         if response.status_code == 200:
@@ -37,3 +113,34 @@ class HistoryListingService:
             data = data.get('response', []).get('data', [])
 
         return data
+
+    async def send_statuses(self, statuses: Dict[int, int]) -> Dict[int, int]:
+        """Writes one batch of ``{history_id: status}``, returns the entries that failed."""
+        if self.bulk_mode == 'database':
+            await self.history_listing_repo.update_clicked_many(statuses)
+            return {}
+        if self.bulk_mode == 'api':
+            payload = {"histories": [{"id": history_id, "is_clicked_submit": status}
+                                     for history_id, status in statuses.items()]}
+            response = await self._post(os.environ.get('STATUS_BULK_PATH', '/api/update_histories'), payload)
+            return {} if response.status_code == 200 else statuses
+
+        responses = await asyncio.gather(
+            *(self._post(f"/api/update_history/{history_id}", {"is_clicked_submit": status})
+              for history_id, status in statuses.items()),
+            return_exceptions=True,
+        )
+        return {history_id: status for (history_id, status), response in zip(statuses.items(), responses)
+                if isinstance(response, BaseException) or response.status_code != 200}
+
+    async def _post(self, path: str, payload: Dict[str, Any]):
+        url = f"{os.environ.get('DOMAIN_API')}{path}"
+        headers = {
+            "Accept": "application/json"
+        }
+
+        started = time.monotonic()
+        response = await self.http_client.post(url, headers=headers, json=payload)
+        metrics.incr('status_api.requests')
+        metrics.observe('status_api.update_seconds', time.monotonic() - started)
+        return response
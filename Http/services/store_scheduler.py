@@ -0,0 +1,210 @@
+import math
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+CLICKED = 1
+
+
+class StoreScheduler:
+    """
+    Orders stores for a turn and caps how much of a store one turn may process.
+
+    Priority grows with the (log of the) pending count and with the age of the
+    oldest pending item, and is divided down by the recent failure rate, so a
+    failing store cannot starve healthy ones. Each turn a store gets at most
+    ``item_budget`` items and ``time_slice`` seconds. Whatever is left over is
+    carried into the next turn even when the store list does not report that
+    store again.
+    """
+
+    def __init__(
+            self,
+            item_budget: int = 50,
+            time_slice: float = 300.0,
+            pending_weight: float = 1.0,
+            age_weight: float = 1.0,
+            failure_weight: float = 4.0,
+            failure_window: int = 20,
+            clock: Callable[[], float] = time.time,
+            carry: bool = True,
+    ):
+        self.clock = clock
+        # False when leftovers come back through another path (queue mode re-lists them)
+        self.carry = carry
+        self.item_budget = item_budget
+        self.time_slice = time_slice
+        self.pending_weight = pending_weight
+        self.age_weight = age_weight
+        self.failure_weight = failure_weight
+        self.outcomes = defaultdict(lambda: deque(maxlen=failure_window))
+        self.first_seen: Dict[Any, float] = {}
+        self.carry_over: Dict[Any, Dict[str, Any]] = {}
+
+    @staticmethod
+    def pending(store: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [h for h in store.get('history_listing') or [] if h.get('is_clicked_submit') != CLICKED]
+
+    def _enqueued_at(self, history: Dict[str, Any], now: float) -> float:
+        created_at = history.get('created_at')
+        if isinstance(created_at, str):
+            try:
+                return datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
+            except ValueError:
+                pass
+        return self.first_seen.setdefault(history.get('id'), now)
+
+    def failure_rate(self, store_id) -> float:
+        outcomes = self.outcomes.get(store_id)
+        return sum(1 for ok in outcomes if not ok) / len(outcomes) if outcomes else 0.0
+
+    def score(self, store: Dict[str, Any], now: Optional[float] = None) -> float:
+        now = now or self.clock()
+        pending = self.pending(store)
+        if not pending:
+            return 0.0
+        oldest_age_minutes = max(0.0, now - min(self._enqueued_at(h, now) for h in pending)) / 60
+        priority = self.pending_weight * math.log1p(len(pending)) + self.age_weight * math.log1p(oldest_age_minutes)
+        return priority / (1 + self.failure_weight * self.failure_rate(store.get('id')))
+
+    def plan(self, stores: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge leftovers from the previous turn and return stores in priority order."""
+        by_id = dict(self.carry_over)
+        for store in stores:
+            by_id[store.get('id')] = store
+        self.carry_over = {}
+
+        # State of items and stores no longer listed (published elsewhere, timed out, moved to
+        # another worker) is dropped, a long-running worker would otherwise keep all of it
+        listed = {history.get('id') for store in by_id.values() for history in store.get('history_listing') or []}
+        self.first_seen = {history_id: seen for history_id, seen in self.first_seen.items() if history_id in listed}
+        for store_id in [store_id for store_id in self.outcomes if store_id not in by_id]:
+            del self.outcomes[store_id]
+
+        now = self.clock()
+        return sorted(by_id.values(), key=lambda store: self.score(store, now), reverse=True)
+
+    def slice(self, store: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Cut a store down to this turn's share of work.
+
+        Returns:
+            dict: copy of the store with at most ``item_budget`` pending items
+            (oldest first) and a ``deadline`` (monotonic clock) for the time slice
+        """
+        now = self.clock()
+        pending = sorted(self.pending(store), key=lambda h: self._enqueued_at(h, now))
+        if self.item_budget:
+            if len(pending) > self.item_budget and self.carry:
+                self.carry_over[store.get('id')] = {**store, 'history_listing': pending[self.item_budget:]}
+            pending = pending[:self.item_budget]
+
+        return {
+            **store,
+            'history_listing': pending,
+            'deadline': time.monotonic() + self.time_slice if self.time_slice else None,
+        }
+
+    def complete(self, store: Dict[str, Any], result: Optional[Dict[str, Any]]) -> None:
+        """Record the outcome of a turn and keep unprocessed items for the next one."""
+        store_id = store.get('id')
+        result = result or {}
+        self.outcomes[store_id].extend([True] * result.get('processed', 0) + [False] * result.get('failed', 0))
+
+        remaining = result.get('remaining') or []
+        if remaining and self.carry:
+            carried = self.carry_over.get(store_id, {**store, 'history_listing': []})
+            carried['history_listing'] = remaining + carried['history_listing']
+            self.carry_over[store_id] = carried
+
+        for history in store.get('history_listing') or []:
+            if history not in remaining:
+                self.first_seen.pop(history.get('id'), None)
+
+
+def simulate(
+        arrivals: List[tuple],
+        item_seconds: float = 3.0,
+        scheduler: Optional[StoreScheduler] = None,
+) -> List[float]:
+    """
+    Wait time (arrival to publish) of every item for one worker.
+
+    Args:
+        arrivals: ``(store_id, arrival_second)`` per item
+        item_seconds: Cost of publishing one item
+        scheduler: None for the original behaviour (stores in list order, every
+            pending item of a store at once), otherwise turns planned and sliced
+            by the scheduler
+
+    Returns:
+        list: ``(store_id, wait_seconds)`` of every item
+    """
+    items = sorted(
+        ({'id': i, 'store_id': store_id, 'arrival': arrival} for i, (store_id, arrival) in enumerate(arrivals)),
+        key=lambda item: item['arrival'],
+    )
+    done = set()
+    waits = []
+    clock = 0.0
+    if scheduler:
+        scheduler.clock = lambda: clock
+    while len(done) < len(items):
+        by_store = defaultdict(list)
+        for item in items:
+            if item['arrival'] > clock:
+                break
+            if item['id'] not in done:
+                by_store[item['store_id']].append(item)
+        if not by_store:
+            clock = min(item['arrival'] for item in items if item['id'] not in done)
+            continue
+
+        rows = [{'id': store_id, 'history_listing': by_store[store_id]} for store_id in sorted(by_store)]
+        if scheduler:
+            for item in items:
+                scheduler.first_seen.setdefault(item['id'], item['arrival'])
+            scheduler.carry_over = {}
+            rows = [scheduler.slice(row) for row in scheduler.plan(rows)]
+
+        for row in rows:
+            for item in row['history_listing']:
+                clock += item_seconds
+                waits.append((item['store_id'], clock - item['arrival']))
+                done.add(item['id'])
+    return waits
+
+
+if __name__ == "__main__":
+    import random
+
+    random.seed(7)
+    # One store with a 2,000 item backlog, 199 small stores trickling items in over two hours
+    workload = [(0, 0.0)] * 2000
+    for store_id in range(1, 200):
+        workload += [(store_id, random.uniform(0, 7200)) for _ in range(random.randint(1, 10))]
+
+    def percentiles(waits):
+        waits = sorted(waits)
+        return waits[len(waits) // 2] / 60, waits[int(len(waits) * 0.99)] / 60
+
+    def report(name, waits):
+        p50, p99 = percentiles([wait for _, wait in waits])
+        small_p50, small_p99 = percentiles([wait for store_id, wait in waits if store_id != 0])
+        bulk_p50, bulk_p99 = percentiles([wait for store_id, wait in waits if store_id == 0])
+        print(
+            f"{name:<31} all: p50={p50:6.1f} p99={p99:6.1f} min | "
+            f"small stores: p50={small_p50:6.1f} p99={small_p99:6.1f} min | "
+            f"bulk store: p50={bulk_p50:6.1f} p99={bulk_p99:6.1f} min"
+        )
+
+    # 3,059 items at 3s are ~153 minutes of work arriving within 120: the backlog
+    # only clears at the end, whatever the order. The bulk store is ~65% of all
+    # items, so the overall p99 is its last items: before they finish first and
+    # every small store waits behind them, after they finish last, at the
+    # makespan, since they all arrived at t=0. That is the price of the small
+    # stores' wait dropping to minutes.
+    print(f"makespan: {len(workload) * 3 / 60:.1f} min of work")
+    report("before: list order, no budget", simulate(workload))
+    report("after: priority, 25 items/turn", simulate(workload, scheduler=StoreScheduler(item_budget=25, time_slice=0)))
@@ -1,3 +1,4 @@
+import asyncio
 import os
 from typing import Optional, Any, Dict, Iterable
 import requests
@@ -14,13 +15,31 @@ class StoreService:
     ):
         self.store_repo = store_repository
 
+    async def fetch_stores(
+            self,
+            params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        """Raw ``/api/stores`` response, used by the sync layer for conditional requests."""
+        url = f"{os.environ.get('DOMAIN_API')}/api/stores"
+        # requests blocks, run it off the event loop so browser work keeps going meanwhile
+        return await asyncio.to_thread(
+            requests.get, url, params=params, headers={"Accept": "application/json", **(headers or {})}
+        )
+
+    async def require_list_stores(self) -> list[dict[str, Any]]:
+        """``get_list_stores`` that raises on an API error instead of returning ``[]``."""
+        response = await self.fetch_stores()
+        response.raise_for_status()
+        return response.json().get('response', {}).get('data', [])
+
     async def get_list_stores(self) -> dict[str, Any]:
         url = f"{os.environ.get('DOMAIN_API')}/api/stores"
         headers = {
             "Accept": "application/json"
         }
 
-        response = requests.get(url, headers=headers)
+        response = await asyncio.to_thread(requests.get, url, headers=headers)
         data = []
         if response.status_code == 200:
             data = response.json()
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from Http.services.store_service import StoreService
+from core.services.metrics import metrics
+
+NOT_MODIFIED = 304
+
+
+class StoreSyncService:
+    """
+    Keeps a local snapshot of ``/api/stores`` keyed by store id and only hands
+    changed stores to the worker loop.
+
+    Each cycle sends the last ``updated_at`` cursor (``updated_since``) and the
+    last ``ETag`` (``If-None-Match``). A 304 means nothing changed. Rows are
+    fingerprinted, so an API that ignores the cursor and still returns the full
+    list only yields the stores that actually differ. Every
+    ``full_resync_every`` cycles, and whenever the snapshot is empty or the
+    API errors, a full resync is done and every store is returned again.
+
+    Some stores need another turn without their row changing: call
+    ``yield_all()`` when the set of stores this worker owns changes (ring
+    membership) so the next cycle hands out the whole snapshot, and
+    ``retry(store_id)`` when a store's run failed or left items behind so it
+    is part of the next cycle's delta.
+
+    Bytes transferred and JSON parse time per cycle are recorded as
+    ``store_sync.bytes`` / ``store_sync.parse_seconds``.
+    """
+
+    def __init__(
+            self,
+            store_service: StoreService,
+            full_resync_every: int = 100,
+            snapshot_path: Optional[str] = None,
+    ):
+        self.store_service = store_service
+        self.full_resync_every = max(1, full_resync_every)
+        self.snapshot_path = snapshot_path
+        self.snapshot: Dict[int, Dict[str, Any]] = {}
+        self.fingerprints: Dict[int, str] = {}
+        self.cursor: Optional[str] = None
+        self.etag: Optional[str] = None
+        self.cycles = 0
+        self.force_full = True
+        self.yield_full = False
+        self.retry_ids: Set[int] = set()
+        self._load()
+
+    @property
+    def stores(self) -> List[Dict[str, Any]]:
+        return list(self.snapshot.values())
+
+    def yield_all(self) -> None:
+        """Return the whole snapshot next cycle, without forcing a full fetch."""
+        self.yield_full = True
+
+    def retry(self, store_id: int) -> None:
+        """Return ``store_id`` next cycle even if its row did not change."""
+        self.retry_ids.add(store_id)
+
+    def _with_retries(self, changed: List[Dict[str, Any]], full: bool) -> List[Dict[str, Any]]:
+        if full or self.yield_full:
+            changed = self.stores
+        else:
+            changed_ids = {row.get("id") for row in changed}
+            changed = changed + [
+                self.snapshot[store_id] for store_id in self.retry_ids
+                if store_id in self.snapshot and store_id not in changed_ids
+            ]
+        self.yield_full = False
+        self.retry_ids.clear()
+        return changed
+
+    async def sync(self) -> List[Dict[str, Any]]:
+        """Fetch what changed since the last cycle and return the changed stores."""
+        self.cycles += 1
+        full = self.force_full or not self.snapshot or self.cycles % self.full_resync_every == 0
+        self.force_full = False
+
+        params, headers = {}, {}
+        if not full:
+            if self.cursor:
+                params["updated_since"] = self.cursor
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+
+        response = await self.store_service.fetch_stores(params=params, headers=headers)
+        metrics.observe("store_sync.bytes", len(response.content or b""))
+        metrics.incr("store_sync.bytes_total", len(response.content or b""))
+
+        if response.status_code == NOT_MODIFIED:
+            metrics.incr("store_sync.not_modified")
+            return self._with_retries([], full=False)
+        if response.status_code != 200:
+            logging.warning(f"Store sync failed with {response.status_code}, forcing a full resync next cycle")
+            self.force_full = True
+            return []
+
+        started = time.perf_counter()
+        rows = (response.json().get("response") or {}).get("data") or []
+        metrics.observe("store_sync.parse_seconds", time.perf_counter() - started)
+
+        self.etag = response.headers.get("ETag") or self.etag
+        changed = self._merge(rows, full)
+        self._save()
+
+        metrics.gauge("store_sync.snapshot_size", len(self.snapshot))
+        metrics.gauge("store_sync.changed", len(changed))
+        logging.info(
+            f"Store sync ({'full' if full else 'delta'}): {len(rows)} rows, {len(changed)} changed, "
+            f"{len(response.content or b'')} bytes"
+        )
+        return self._with_retries(changed, full)
+
+    def _merge(self, rows: List[Dict[str, Any]], full: bool) -> List[Dict[str, Any]]:
+        changed = []
+        seen = set()
+        for row in rows:
+            store_id = row.get("id")
+            seen.add(store_id)
+            if row.get("deleted_at"):
+                self._forget(store_id)
+                continue
+
+            fingerprint = self._fingerprint(row)
+            if self.fingerprints.get(store_id) != fingerprint:
+                self.fingerprints[store_id] = fingerprint
+                self.snapshot[store_id] = row
+                changed.append(row)
+
+            updated_at = row.get("updated_at")
+            if updated_at and (self.cursor is None or str(updated_at) > self.cursor):
+                self.cursor = str(updated_at)
+
+        if full:
+            for store_id in set(self.snapshot) - seen:
+                self._forget(store_id)
+        return changed
+
+    def _forget(self, store_id: int) -> None:
+        self.snapshot.pop(store_id, None)
+        self.fingerprints.pop(store_id, None)
+
+    @staticmethod
+    def _fingerprint(row: Dict[str, Any]) -> str:
+        return hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _load(self) -> None:
+        if not self.snapshot_path or not os.path.isfile(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable store snapshot {self.snapshot_path}: {e}")
+            return
+        self.snapshot = {int(store_id): row for store_id, row in state.get("stores", {}).items()}
+        self.fingerprints = {store_id: self._fingerprint(row) for store_id, row in self.snapshot.items()}
+        self.cursor = state.get("cursor")
+        self.etag = state.get("etag")
+        self.force_full = False
+
+    def _save(self) -> None:
+        if not self.snapshot_path:
+            return
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"cursor": self.cursor, "etag": self.etag, "stores": self.snapshot}, f, default=str)
+        os.replace(tmp_path, self.snapshot_path)
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SessionCache:
+    """
+    Playwright storage state (cookies + localStorage) per WordPress domain/user.
+
+    A context created with the cached state is already logged in, so the login
+    form only has to be submitted when WordPress redirects to ``wp-login.php``.
+    Files are written with 0600 permissions since they hold auth cookies.
+    """
+
+    def __init__(self, directory: str = 'profile/sessions'):
+        self.directory = Path(directory)
+
+    def path(self, domain: str, username: str) -> Path:
+        host = re.sub(r'[^A-Za-z0-9.-]+', '_', re.sub(r'^https?://', '', domain or ''))
+        user = hashlib.sha1((username or '').encode('utf-8')).hexdigest()[:12]
+        return self.directory / f"{host}__{user}.json"
+
+    def load(self, domain: str, username: str) -> Optional[str]:
+        path = self.path(domain, username)
+        return str(path) if path.is_file() else None
+
+    async def save(self, context, domain: str, username: str) -> None:
+        self._write(await context.storage_state(), domain, username)
+
+    def load_cookies(self, domain: str, username: str) -> List[Dict[str, Any]]:
+        """Cookies of the cached storage state, for HTTP clients that reuse the browser's login."""
+        path = self.path(domain, username)
+        if not path.is_file():
+            return []
+        try:
+            return json.loads(path.read_text()).get('cookies', [])
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable session for {domain}: {e}")
+            return []
+
+    def save_cookies(self, cookies: List[Dict[str, Any]], domain: str, username: str) -> None:
+        """Store cookies from an HTTP login in storage state format so browsers can reuse them too."""
+        self._write({'cookies': cookies, 'origins': []}, domain, username)
+
+    def _write(self, state: Dict[str, Any], domain: str, username: str) -> None:
+        """Atomically replace the cached state; the file is created 0600 so it is never readable by others."""
+        path = self.path(domain, username)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+        metrics.incr('session.saved')
+
+    def invalidate(self, domain: str, username: str) -> None:
+        try:
+            self.path(domain, username).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to drop cached session for {domain}: {e}")
@@ -1,31 +1,68 @@
 import asyncio
+import os
+import time
 import traceback
 
 from playwright.async_api import async_playwright
 
 from Http.browser import BrowserManager
-from Http.dependencies.container import Container
+from Http.browser_engines import browser_engine
+from Http.dependencies.container import container
+from Http.request_router import RequestBlocker
+from Http.strategies.wait_strategies import get_wait_strategy
+from core.services.metrics import metrics
+from core.services.pacer import pacer, retry_after
 
+PENDING = 0
 PROCESSING = 2
 ERROR = 3
+# List views scanned by the bulk mode for products that still need publishing
+BULK_SOURCE_STATUSES = ('draft', 'pending')
 
 
 class ClickSubmitEvent:
-    def __init__(self, store_dict):
+    def __init__(self, store_dict, checkpoint=None, stop_event=None, browser_pool=None, page_concurrency=1):
         self.store_dict = store_dict
         self.items = store_dict['history_listings']
+        # Monotonic deadline of this store's time slice, None for no limit
+        self.deadline = store_dict.get('deadline')
+        # Records items between PROCESSING and their final status for resume
+        self.checkpoint = checkpoint
+        # Set when the worker drains: finish the current item, take no new ones
+        self.stop_event = stop_event
+        # Shared BrowserPool of the worker, None launches a browser for this run;
+        # a store that wants another engine than the pool's also gets its own browser
+        self.browser_pool = browser_pool
+        if browser_pool and store_dict.get('browser_engine') \
+                and browser_engine(store_dict)[0] != browser_pool.engine:
+            self.browser_pool = None
+        # Product pages worked in parallel inside the store's logged-in context,
+        # capped by MAX_PAGES_PER_STORE to protect small WordPress hosts
+        max_pages = int(os.environ.get('MAX_PAGES_PER_STORE', 4))
+        self.page_concurrency = max(1, min(int(page_concurrency or 1), max_pages))
+        # How page readiness and publish success are detected, per store or WAIT_STRATEGY
+        self.wait_strategy = get_wait_strategy(
+            store_dict.get('wait_strategy'), store_dict.get('wait_timeouts'), key=store_dict.get('domain')
+        )
+        # 'edit' opens every product's edit page, 'bulk' publishes from the product list table
+        self.publish_mode = store_dict.get('publish_mode') or os.environ.get('PUBLISH_MODE', 'edit')
+        self.bulk_size = max(1, min(int(os.environ.get('BULK_PAGE_SIZE', 50)), 999))
+        self.list_url = f"{store_dict['domain']}/wp-admin/edit.php?post_type=product&orderby=ID&order=asc"
+        self.aborted = False
+        self.processed = 0
+        self.failed = 0
         self.domain_url = f"{store_dict['domain']}/wp-admin"
         self.product_url = f"{store_dict['domain']}/wp-admin/post.php?post=product_id&action=edit"
         self.browser_manager = None
         self.browser = None
         self.page = None
-        self.container = Container()
+        self.container = container
         self.history_listing_service = None
         self.db_pool = None
 
     @classmethod
-    async def process(cls, store_dict):
-        processor = cls(store_dict)
+    async def process(cls, store_dict, **options):
+        processor = cls(store_dict, **options)
         await processor.init_pool()
 
         return await processor._process_images()
@@ -41,57 +78,304 @@ class ClickSubmitEvent:
         )
 
     async def _process_images(self):
+        session_dir = os.environ.get('SESSION_CACHE_DIR', 'sessions')
+        request_blocker = RequestBlocker.from_env()
+        if self.browser_pool:
+            self.browser_manager = BrowserManager(
+                None, self.domain_url, self.store_dict, user_data_dir=session_dir, request_blocker=request_blocker
+            )
+            async with self.browser_pool.context(**self.browser_manager.context_options()) as context:
+                self.page = await self.browser_manager.open(context)
+                return await self._publish()
+
         async with async_playwright() as p:
-            self.browser_manager = BrowserManager(p, self.domain_url, self.store_dict)
+            self.browser_manager = BrowserManager(
+                p, self.domain_url, self.store_dict, user_data_dir=session_dir, request_blocker=request_blocker
+            )
             self.browser, self.page = await self.browser_manager.initialize()
+            try:
+                return await self._publish()
+            finally:
+                await self.browser_manager.close_browser()
+
+    async def _publish(self):
+        if self.publish_mode == 'bulk':
+            return await self._publish_bulk()
+        return await self._publish_items()
+
+    async def _publish_items(self, items=None):
+        items = self.items if items is None else items
+        queue = asyncio.Queue()
+        for history in items:
+            queue.put_nowait(history)
+
+        started = time.monotonic()
+        while True:
+            pages = [self.page]
+            for _ in range(min(self.page_concurrency, queue.qsize()) - 1):
+                pages.append(await self.browser_manager.context.new_page())
+            try:
+                await asyncio.gather(*(self._page_worker(page, queue) for page in pages))
+            finally:
+                for page in pages[1:]:
+                    await page.close()
+            # Page workers only return early for a recycle, once their current item is done
+            if queue.empty() or self.should_stop() or not self.recycle_due():
+                break
+            await self._recycle_context()
+
+        elapsed = time.monotonic() - started
+        if self.processed:
+            rate = self.processed * 60 / max(elapsed, 1e-6)
+            metrics.gauge(f"store.{self.store_dict.get('id')}.products_per_minute", rate)
+            print(f"Store {self.store_dict.get('domain')}: {self.processed} products in {elapsed:.1f}s "
+                  f"({rate:.1f}/min, {len(pages)} pages)")
+
+        remaining = []
+        while not queue.empty():
+            remaining.append(queue.get_nowait())
+        return self.result(remaining)
+
+    async def _publish_bulk(self):
+        """
+        Publishes from ``edit.php?post_type=product`` with the bulk "Edit → Status: Published" action.
 
-            for history in self.items:
-                is_clicked = history.get('is_clicked_submit')
+        edit.php cannot be filtered by a list of ids, so the draft and pending
+        views are walked with BULK_PAGE_SIZE rows per page (the screen option)
+        and the pending products found on each page are published together.
+        Products not found there (already published, missing, other statuses)
+        go through the edit page path afterwards.
+        """
+        pending = {int(h.get('product_wp_id')): h for h in self.items if h.get('is_clicked_submit') != 1}
+        page = self.page
+        started = time.monotonic()
+        await self.set_per_page(page, self.bulk_size)
 
-                if is_clicked == 1:
+        for status in BULK_SOURCE_STATUSES:
+            paged = 1
+            while pending and not self.should_stop():
+                if self.recycle_due():
+                    await self._recycle_context()
+                    page = self.page
+                url = f"{self.list_url}&post_status={status}&paged={paged}"
+                await self.goto(page, url)
+                await self.browser_manager.ensure_logged_in(url, page)
+                on_page = await self.listed_ids(page)
+                if not on_page:
+                    break
+                targets = [pending.pop(post_id) for post_id in on_page if post_id in pending]
+                if not targets:
+                    paged += 1
                     continue
+                # Published rows leave this view, so the same page is read again
+                await self._bulk_publish_rows(page, targets)
+
+        elapsed = time.monotonic() - started
+        if self.processed:
+            rate = self.processed * 60 / max(elapsed, 1e-6)
+            metrics.gauge(f"store.{self.store_dict.get('id')}.products_per_minute", rate)
+            print(f"Store {self.store_dict.get('domain')}: {self.processed} products bulk published in "
+                  f"{elapsed:.1f}s ({rate:.1f}/min)")
+
+        leftovers = list(pending.values())
+        if leftovers and not self.should_stop():
+            return await self._publish_items(leftovers)
+        return self.result(leftovers)
+
+    async def set_per_page(self, page, per_page):
+        """Sets the "Number of items per page" screen option of the product list."""
+        await self.goto(page, self.list_url)
+        await self.browser_manager.ensure_logged_in(self.list_url, page)
+        if not await page.query_selector('#edit_product_per_page'):
+            return
+        await page.click('#show-settings-link')
+        await page.fill('#edit_product_per_page', str(per_page))
+        async with page.expect_navigation():
+            await page.click('#screen-options-apply')
+
+    @staticmethod
+    async def listed_ids(page):
+        return await page.eval_on_selector_all(
+            '#the-list tr[id^="post-"]', "rows => rows.map(row => parseInt(row.id.slice(5), 10))"
+        )
+
+    async def published_ids(self, page):
+        """Ids on the first page of the publish view, most recently modified first, where bulk edited rows land."""
+        url = f"{self.store_dict['domain']}/wp-admin/edit.php?post_type=product&post_status=publish" \
+              f"&orderby=modified&order=desc"
+        await self.goto(page, url)
+        await self.browser_manager.ensure_logged_in(url, page)
+        if not await page.query_selector('#the-list'):
+            raise RuntimeError(f"no product list at {page.url}")
+        return set(await self.listed_ids(page))
+
+    async def _bulk_publish_rows(self, page, targets):
+        """Ticks ``targets``, runs the bulk edit and records per row whether it now shows as published."""
+        for history in targets:
+            await self.history_listing_service.update_clicked(history.get('id'), PROCESSING)
+            self.claim(history)
 
-                product_id = history.get('product_wp_id')
-                history_id = history.get('id')
+        ids = [int(history.get('product_wp_id')) for history in targets]
+        try:
+            for post_id in ids:
+                await page.check(f'#cb-select-{post_id}')
+            await page.select_option('#bulk-action-selector-top', 'edit')
+            await page.click('#doaction')
+            await page.wait_for_selector('#bulk-edit', state='visible')
+            await page.select_option('#bulk-edit select[name="_status"]', 'publish')
+            async with pacer.pace(self.store_dict['domain'], kind='bulk_edit'), page.expect_navigation():
+                await page.click('#bulk_edit')
+            # Landing on wp-login.php or an error screen says nothing about which rows were saved
+            if await self.browser_manager.ensure_logged_in(self.list_url, page) \
+                    or not await page.query_selector('#the-list'):
+                raise RuntimeError(f"bulk edit did not return to the product list ({page.url})")
+            # Rows leave the draft view for any status, scheduled ones too: only the publish view counts
+            published = await self.published_ids(page)
+        except Exception as e:
+            print("❌ Bulk edit failed:", str(e))
+            traceback.print_exc()
+            published = set()
 
-                try:
-                    await self.history_listing_service.update_clicked(history_id, PROCESSING)
-                    await asyncio.sleep(1)
-                    url = self.product_url.replace('product_id', str(product_id))
+        for history, post_id in zip(targets, ids):
+            history_id = history.get('id')
+            if post_id not in published:
+                await self.history_listing_service.update_clicked(history_id, ERROR)
+                self.failed += 1
+                print(f"❌ Product ID {post_id} was not published by the bulk edit")
+            else:
+                await self.history_listing_service.update_clicked(history_id)
+                self.processed += 1
+                print(f"Successfully processed product ID: {post_id}")
+            self.release(history_id)
+        metrics.incr('bulk_publish.pages')
 
-                    await self.page.goto(url)
-                    if await self.page.query_selector('#error-page'):
-                        continue
+    async def _page_worker(self, page, queue):
+        """Takes product ids from the shared queue until it is empty or the run stops."""
+        while not queue.empty() and not self.should_stop() and not self.recycle_due():
+            history = queue.get_nowait()
+            if not await self._publish_one(page, history):
+                # Same as the sequential loop: the first failure ends the run
+                self.aborted = True
 
-                    await self.page.wait_for_load_state('networkidle')
-                    await self.page.evaluate("window.scrollTo(0, 0)")
+    async def _publish_one(self, page, history):
+        """Publishes one product, returns False if it failed."""
+        is_clicked = history.get('is_clicked_submit')
 
-                    publish_button = await self.page.query_selector('#publishing-action')
+        if is_clicked == 1:
+            return True
 
-                    await asyncio.sleep(1)
+        product_id = history.get('product_wp_id')
+        history_id = history.get('id')
 
-                    if not publish_button:
-                        continue
+        try:
+            await self.history_listing_service.update_clicked(history_id, PROCESSING)
+            self.claim(history)
+            url = self.product_url.replace('product_id', str(product_id))
 
-                    await publish_button.click()
-                    await self.page.wait_for_load_state('networkidle')
-                    await self.page.wait_for_url("**")
-                    message = self.page.locator("#message.notice-success")
-                    await message.wait_for(state="visible")
+            await self.goto(page, url)
+            await self.browser_manager.ensure_logged_in(url, page)
+            if await page.query_selector('#error-page'):
+                self.release(history_id)
+                return True
 
-                    await self.history_listing_service.update_clicked(history_id)
+            await self.wait_strategy.wait_loaded(page)
+            await page.evaluate("window.scrollTo(0, 0)")
 
-                    print(f"Successfully processed product ID: {product_id}")
-                    print('--------------------------------------')
+            publish_button = await page.query_selector('#publishing-action')
+
+            if not publish_button:
+                self.release(history_id)
+                return True
+
+            async with pacer.pace(self.store_dict['domain'], kind='publish'):
+                await self.wait_strategy.click_and_wait_published(page, publish_button)
+
+            await self.history_listing_service.update_clicked(history_id)
+            self.release(history_id)
+            self.processed += 1
+
+            print(f"Successfully processed product ID: {product_id}")
+            print('--------------------------------------')
+            return True
+
+        except Exception as e:
+            await self.history_listing_service.update_clicked(history_id, ERROR)
+            self.release(history_id)
+            self.failed += 1
+            print("❌ Exception:", str(e))
+            traceback.print_exc()
+            return False
+
+    def recycle_due(self):
+        """Pooled contexts are recycled by page count and memory, standalone browsers live for one store only."""
+        return bool(self.browser_pool) and self.browser_pool.needs_recycle(self.browser_manager.context)
+
+    async def _recycle_context(self):
+        """Swaps the context for a fresh one between items, logged in again from the session cache."""
+        context = await self.browser_pool.renew(
+            self.browser_manager.context, **self.browser_manager.context_options()
+        )
+        self.page = await self.browser_manager.open(context)
+        metrics.incr(f"store.{self.store_dict.get('id')}.context_recycles")
+
+    async def goto(self, page, url):
+        """Opens ``url`` in the store domain's pace and reports the response back to it."""
+        async with pacer.pace(self.store_dict['domain'], kind='navigation') as signal:
+            response = await page.goto(url, wait_until=self.wait_strategy.goto_wait_until)
+            if response is not None:
+                signal['status'] = response.status
+                signal['retry_after'] = retry_after(response.headers)
+        return response
+
+    def should_stop(self):
+        if self.aborted:
+            return True
+        if self.stop_event and self.stop_event.is_set():
+            return True
+        return bool(self.deadline) and time.monotonic() >= self.deadline
+
+    def claim(self, history):
+        if self.checkpoint:
+            self.checkpoint.claim(self.store_dict.get('id'), history)
+
+    def release(self, history_id):
+        if self.checkpoint:
+            self.checkpoint.release(history_id)
+
+    async def publish_in_browser(self, items, result):
+        """Publishes ``items`` by clicking in the browser and adds the outcome to ``result``."""
+        browser = ClickSubmitEvent(
+            {**self.store_dict, 'history_listings': items},
+            checkpoint=self.checkpoint,
+            stop_event=self.stop_event,
+            browser_pool=self.browser_pool,
+            page_concurrency=self.page_concurrency,
+        )
+        browser.history_listing_service = self.history_listing_service
+        fallback = await browser._process_images()
+        return {
+            'processed': result['processed'] + fallback['processed'],
+            'failed': result['failed'] + fallback['failed'],
+            'remaining': result['remaining'] + fallback['remaining'],
+        }
 
-                except Exception as e:
-                    await self.history_listing_service.update_clicked(history_id, ERROR)
-                    print("❌ Exception:", str(e))
-                    traceback.print_exc()
-                    return None
+    async def publish_fallback(self, items, result):
+        """
+        Publishes ``items`` in the browser, or, when this run has to stop,
+        hands them back as pending in ``result['remaining']`` for the next turn.
+        """
+        if not items:
+            return result
+        if not self.should_stop():
+            return await self.publish_in_browser(items, result)
+        for history in items:
+            await self.history_listing_service.update_clicked(history.get('id'), PENDING)
+            self.release(history.get('id'))
+        return {**result, 'remaining': result['remaining'] + items}
 
-            await self.browser.close()
-            return None
+    def result(self, remaining):
+        """Outcome of this run, ``remaining`` are the items left for the next turn."""
+        return {'processed': self.processed, 'failed': self.failed, 'remaining': remaining}
 
     async def close(self):
         await self.browser_manager.close_browser()
@@ -0,0 +1,253 @@
+import os
+import re
+import time
+import traceback
+import unicodedata
+from typing import Dict, List
+from urllib.parse import quote
+
+from Http.services.history_listing_service import SUCCESS
+from Http.strategies.click_submit_event import ClickSubmitEvent, ERROR, PROCESSING
+from core.database.pool_registry import store_pools
+from core.services.metrics import metrics
+from core.services.pacer import pacer
+
+DATABASE_AVAILABLE = 1
+
+# Caches WooCommerce keeps in transients that go stale when a product is published
+PRODUCT_TRANSIENTS = ('wc_product_children_{id}', 'wc_var_prices_{id}', 'wc_related_{id}')
+SHOP_TRANSIENTS = ('wc_featured_products', 'wc_products_onsale', 'wc_term_counts', 'wc_count_comments')
+PRODUCT_TAXONOMIES = ('product_cat', 'product_tag')
+# What the browser path publishes: trashed, auto-draft, private or scheduled products are left alone
+PUBLISHABLE_STATUSES = ('draft', 'pending')
+
+
+def placeholders(values) -> str:
+    return ', '.join(['%s'] * len(values))
+
+
+def sanitize_title(title: str) -> str:
+    """
+    Close to WordPress ``sanitize_title`` in the save context: tags and
+    entities dropped, accents removed, other non-ASCII characters
+    percent-encoded, lowercase, words joined by single dashes.
+    """
+    title = re.sub(r'<[^>]*>|&[^;\s]+;', '', title or '')
+    title = ''.join(ch for ch in unicodedata.normalize('NFKD', title) if not unicodedata.combining(ch))
+    title = ''.join(ch if ch.isascii() else quote(ch).lower() for ch in title).lower().replace('.', '-')
+    title = re.sub(r'[^%a-z0-9 _-]', '', title)
+    title = re.sub(r'-+', '-', re.sub(r'\s+', '-', title)).strip('-')
+    return title[:200]
+
+
+def unique_slug(slug: str, taken) -> str:
+    """``wp_unique_post_slug``: the first of ``slug``, ``slug-2``, ``slug-3``... not in ``taken``."""
+    candidate, suffix = slug, 2
+    while candidate in taken:
+        candidate = f"{slug[:200 - len(str(suffix)) - 1]}-{suffix}"
+        suffix += 1
+    return candidate
+
+
+class DatabasePublishEvent(ClickSubmitEvent):
+    """
+    Publishes products by writing to the store's own WordPress database.
+
+    Connections come from ``store_pools``, one small aiomysql pool per store
+    database. Each batch of DB_PUBLISH_BATCH_SIZE products is one transaction
+    that locks the draft and pending product rows (trashed, private and
+    auto-draft products are skipped as not found), sets ``post_status =
+    'publish'`` with fresh modified dates (and a publish date and unique slug
+    for never-published drafts), recounts the product_cat / product_tag
+    terms the products belong to, and deletes
+    the WooCommerce transients and bumps ``product-transient-version`` the
+    way the ``save_post`` / ``transition_post_status`` hooks would.
+
+    Stores whose ``status_database`` is not available, or without DB
+    credentials, are published in the browser; so is a batch whose
+    transaction fails. Persistent object caches and page caches are outside
+    the database, stores that rely on them should keep a browser or REST engine.
+    """
+
+    def __init__(self, store_dict, **options):
+        super().__init__(store_dict, **options)
+        self.batch_size = max(1, int(os.environ.get('DB_PUBLISH_BATCH_SIZE', 200)))
+        self.prefix = store_dict.get('db_prefix') or os.environ.get('WP_TABLE_PREFIX', 'wp_')
+        if not re.fullmatch(r'[A-Za-z0-9_]+', self.prefix):
+            raise ValueError(f"Invalid WordPress table prefix '{self.prefix}'")
+        self.fallback_items: List[Dict] = []
+
+    def database_available(self) -> bool:
+        return (self.store_dict.get('status_database') == DATABASE_AVAILABLE
+                and bool(self.store_dict.get('db_host') and self.store_dict.get('db_database')))
+
+    def connection_params(self) -> Dict:
+        return {
+            'host': self.store_dict['db_host'],
+            'port': int(self.store_dict.get('db_port') or 3306),
+            'user': self.store_dict.get('db_username') or '',
+            'password': self.store_dict.get('db_password') or '',
+            'db': self.store_dict['db_database'],
+            'charset': 'utf8mb4',
+            'autocommit': False,
+        }
+
+    def table(self, name: str) -> str:
+        return f"`{self.prefix}{name}`"
+
+    async def _process_images(self):
+        pending = [history for history in self.items if history.get('is_clicked_submit') != 1]
+        if not self.database_available():
+            print(f"Store {self.store_dict.get('domain')} database is not available, publishing in the browser")
+            self.fallback_items = pending
+            pending = []
+
+        remaining = []
+        started = time.monotonic()
+        for offset in range(0, len(pending), self.batch_size):
+            if self.should_stop():
+                remaining = pending[offset:]
+                break
+            await self._publish_batch(pending[offset:offset + self.batch_size])
+
+        elapsed = time.monotonic() - started
+        if self.processed:
+            rate = self.processed * 60 / max(elapsed, 1e-6)
+            metrics.gauge(f"store.{self.store_dict.get('id')}.products_per_minute", rate)
+            print(f"Store {self.store_dict.get('domain')}: {self.processed} products published in the database "
+                  f"in {elapsed:.1f}s ({rate:.1f}/min)")
+
+        result = self.result(remaining)
+        return await self.publish_fallback(self.fallback_items, result)
+
+    async def _publish_batch(self, batch: List[Dict]):
+        for history in batch:
+            await self.history_listing_service.update_clicked(history.get('id'), PROCESSING)
+            self.claim(history)
+
+        started = time.monotonic()
+        try:
+            async with pacer.pace(self.store_dict['domain'], kind='database'):
+                published = await self._publish_rows([int(h.get('product_wp_id')) for h in batch])
+        except Exception as e:
+            print(f"❌ Database publish failed: {e}, publishing {len(batch)} products in the browser")
+            traceback.print_exc()
+            metrics.incr('db_publish.fallbacks')
+            self.fallback_items.extend(batch)
+            return
+        metrics.observe('db_publish.batch_seconds', time.monotonic() - started)
+
+        for history in batch:
+            history_id = history.get('id')
+            product_id = int(history.get('product_wp_id'))
+            if product_id not in published:
+                # Same as #error-page in the browser: no such product, or trashed / not a draft
+                print(f"Product ID {product_id} not found as a draft or pending product, skipped")
+                metrics.incr('db_publish.not_found')
+                self.release(history_id)
+                continue
+            try:
+                await self.history_listing_service.update_clicked(history_id, SUCCESS)
+                self.processed += 1
+                metrics.incr('db_publish.published')
+                print(f"Successfully processed product ID: {product_id}")
+            except Exception as e:
+                await self.history_listing_service.update_clicked(history_id, ERROR)
+                self.failed += 1
+                print("❌ Exception:", str(e))
+            self.release(history_id)
+
+    async def _publish_rows(self, product_ids: List[int]) -> set:
+        """Publishes ``product_ids`` in one transaction, returns the ids that were drafts or pending."""
+        posts = self.table('posts')
+        async with store_pools.connection(**self.connection_params()) as conn:
+            try:
+                await conn.begin()
+                async with conn.cursor() as cursor:
+                    await cursor.execute(
+                        f"SELECT ID FROM {posts} WHERE ID IN ({placeholders(product_ids)}) "
+                        f"AND post_type = 'product' AND post_status IN ({placeholders(PUBLISHABLE_STATUSES)}) "
+                        f"FOR UPDATE",
+                        [*product_ids, *PUBLISHABLE_STATUSES],
+                    )
+                    found = [row[0] for row in await cursor.fetchall()]
+                    if found:
+                        await self._update_posts(cursor, found)
+                        await self._recount_terms(cursor, found)
+                        await self._bust_caches(cursor, found)
+                await conn.commit()
+                return set(found)
+            except Exception:
+                await conn.rollback()
+                raise
+
+    async def _update_posts(self, cursor, ids: List[int]):
+        await self._assign_slugs(cursor, ids)
+        await cursor.execute(
+            f"UPDATE {self.table('posts')} SET "
+            f"post_date = IF(post_date_gmt = '0000-00-00 00:00:00', NOW(), post_date), "
+            f"post_date_gmt = IF(post_date_gmt = '0000-00-00 00:00:00', UTC_TIMESTAMP(), post_date_gmt), "
+            f"post_status = 'publish', post_modified = NOW(), post_modified_gmt = UTC_TIMESTAMP() "
+            f"WHERE ID IN ({placeholders(ids)})",
+            ids,
+        )
+
+    async def _assign_slugs(self, cursor, ids: List[int]):
+        """Drafts have no post_name yet, publishing gives them a unique one like ``wp_insert_post`` does."""
+        posts = self.table('posts')
+        await cursor.execute(
+            f"SELECT ID, post_title FROM {posts} WHERE ID IN ({placeholders(ids)}) AND post_name = ''",
+            ids,
+        )
+        assigned = set()
+        for post_id, title in await cursor.fetchall():
+            slug = sanitize_title(title) or str(post_id)
+            pattern = slug.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '-%'
+            await cursor.execute(
+                f"SELECT post_name FROM {posts} WHERE post_type = 'product' AND ID != %s "
+                f"AND (post_name = %s OR post_name LIKE %s)",
+                [post_id, slug, pattern],
+            )
+            taken = {row[0] for row in await cursor.fetchall()} | assigned
+            slug = unique_slug(slug, taken)
+            assigned.add(slug)
+            await cursor.execute(f"UPDATE {posts} SET post_name = %s WHERE ID = %s", [slug, post_id])
+
+    async def _recount_terms(self, cursor, ids: List[int]):
+        """Same counts ``_update_post_term_count`` keeps: published products per term."""
+        term_taxonomy = self.table('term_taxonomy')
+        relationships = self.table('term_relationships')
+        await cursor.execute(
+            f"SELECT DISTINCT tt.term_taxonomy_id FROM {term_taxonomy} tt "
+            f"JOIN {relationships} tr ON tr.term_taxonomy_id = tt.term_taxonomy_id "
+            f"WHERE tr.object_id IN ({placeholders(ids)}) AND tt.taxonomy IN ({placeholders(PRODUCT_TAXONOMIES)})",
+            [*ids, *PRODUCT_TAXONOMIES],
+        )
+        term_ids = [row[0] for row in await cursor.fetchall()]
+        if not term_ids:
+            return
+        await cursor.execute(
+            f"UPDATE {term_taxonomy} tt SET tt.count = ("
+            f"SELECT COUNT(*) FROM {relationships} tr JOIN {self.table('posts')} p ON p.ID = tr.object_id "
+            f"WHERE tr.term_taxonomy_id = tt.term_taxonomy_id AND p.post_status = 'publish' "
+            f"AND p.post_type = 'product') "
+            f"WHERE tt.term_taxonomy_id IN ({placeholders(term_ids)})",
+            term_ids,
+        )
+
+    async def _bust_caches(self, cursor, ids: List[int]):
+        names = [name.format(id=product_id) for product_id in ids for name in PRODUCT_TRANSIENTS]
+        names += list(SHOP_TRANSIENTS)
+        option_names = [f"{kind}{name}" for name in names for kind in ('_transient_', '_transient_timeout_')]
+        options = self.table('options')
+        await cursor.execute(
+            f"DELETE FROM {options} WHERE option_name IN ({placeholders(option_names)})",
+            option_names,
+        )
+        # WooCommerce drops every versioned product transient when the version changes
+        await cursor.execute(
+            f"INSERT INTO {options} (option_name, option_value, autoload) "
+            f"VALUES ('_transient_product-transient-version', %s, 'yes') "
+            f"ON DUPLICATE KEY UPDATE option_value = VALUES(option_value)",
+            [str(int(time.time()))],
+        )
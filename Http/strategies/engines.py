@@ -0,0 +1,23 @@
+import os
+from typing import Dict, Optional, Type
+
+from Http.strategies.click_submit_event import ClickSubmitEvent
+from Http.strategies.database_publish_event import DatabasePublishEvent
+from Http.strategies.form_replay_event import FormReplayEvent
+from Http.strategies.woocommerce_batch_event import WooCommerceBatchEvent
+
+# Engines share ClickSubmitEvent's ``process(store_dict, **options)`` interface
+PUBLISH_ENGINES: Dict[str, Type[ClickSubmitEvent]] = {
+    'click': ClickSubmitEvent,
+    'form_replay': FormReplayEvent,
+    'woocommerce': WooCommerceBatchEvent,
+    'database': DatabasePublishEvent,
+}
+
+
+def get_publish_engine(name: Optional[str] = None) -> Type[ClickSubmitEvent]:
+    """The engine a store asks for, else PUBLISH_ENGINE, else the browser click."""
+    name = name or os.environ.get('PUBLISH_ENGINE', 'click')
+    if name not in PUBLISH_ENGINES:
+        raise ValueError(f"Unknown publish engine '{name}', expected one of {', '.join(PUBLISH_ENGINES)}")
+    return PUBLISH_ENGINES[name]
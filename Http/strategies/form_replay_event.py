@@ -0,0 +1,296 @@
+import asyncio
+import os
+import time
+import traceback
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urljoin
+
+import httpx
+
+from Http.session_cache import SessionCache
+from Http.strategies.click_submit_event import ClickSubmitEvent, ERROR, PROCESSING
+from core.services.metrics import metrics
+from core.services.pacer import pacer, retry_after
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0'
+
+
+class FormParseError(Exception):
+    """The edit page did not contain a classic ``form#post`` that can be replayed."""
+
+
+class EditFormParser(HTMLParser):
+    """Collects the fields of ``<form id="post">`` the way a browser would submit them."""
+
+    def __init__(self, form_id: str = 'post'):
+        super().__init__(convert_charrefs=True)
+        self.form_id = form_id
+        self.found = False
+        self.action = None
+        self.fields: List[Tuple[str, str]] = []
+        self.submit: Optional[Tuple[str, str]] = None
+        self._in_form = False
+        self._textarea = None
+        self._select = None
+        self._options: List[List] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'form':
+            if attrs.get('id') == self.form_id:
+                self._in_form = self.found = True
+                self.action = attrs.get('action')
+            return
+        if not self._in_form:
+            return
+
+        name = attrs.get('name')
+        if tag == 'input' and name:
+            input_type = (attrs.get('type') or 'text').lower()
+            if attrs.get('id') == 'publish':
+                # Disabled until the editor script runs, submitted by the click
+                self.submit = (name, attrs.get('value') or '')
+            elif 'disabled' in attrs or input_type in ('submit', 'button', 'image', 'reset', 'file'):
+                return
+            elif input_type in ('checkbox', 'radio'):
+                if 'checked' in attrs:
+                    self.fields.append((name, attrs.get('value') or 'on'))
+            else:
+                self.fields.append((name, attrs.get('value') or ''))
+        elif tag == 'textarea' and name and 'disabled' not in attrs:
+            self._textarea = [name, '']
+        elif tag == 'select' and name and 'disabled' not in attrs:
+            self._select = (name, 'multiple' in attrs)
+            self._options = []
+        elif tag == 'option' and self._select:
+            self._options.append([attrs.get('value'), 'selected' in attrs, ''])
+
+    def handle_data(self, data):
+        if self._textarea is not None:
+            self._textarea[1] += data
+        elif self._select and self._options and self._options[-1][0] is None:
+            self._options[-1][2] += data
+
+    def handle_endtag(self, tag):
+        if tag == 'textarea' and self._textarea is not None:
+            name, value = self._textarea
+            # Browsers drop the newline right after <textarea>
+            self.fields.append((name, value[1:] if value.startswith('\n') else value))
+            self._textarea = None
+        elif tag == 'select' and self._select:
+            name, multiple = self._select
+            values = [o[0] if o[0] is not None else o[2].strip() for o in self._options]
+            selected = [v for v, o in zip(values, self._options) if o[1]]
+            if not selected and values and not multiple:
+                selected = values[:1]
+            self.fields.extend((name, value) for value in (selected if multiple else selected[-1:]))
+            self._select = None
+        elif tag == 'form' and self._in_form:
+            self._in_form = False
+
+
+def parse_edit_form(html: str) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+    """Returns ``(action, fields)`` ready to POST, including the publish/update button."""
+    parser = EditFormParser()
+    parser.feed(html)
+    parser.close()
+    if not parser.found:
+        raise FormParseError("form#post not found, the store probably uses the block editor")
+    names = {name for name, _ in parser.fields}
+    missing = {'_wpnonce', 'post_ID', 'action'} - names
+    if missing:
+        raise FormParseError(f"edit form is missing {', '.join(sorted(missing))}")
+    if parser.submit is None:
+        raise FormParseError("publish button not found in edit form")
+    return parser.action, parser.fields + [parser.submit]
+
+
+class FormReplayEvent(ClickSubmitEvent):
+    """
+    Publishes products without a browser by replaying wp-admin's edit form.
+
+    The WordPress session comes from the SessionCache entry the browser path
+    saved, or from a plain HTTP login through ``wp-login.php``. For every
+    product ``post.php?post=<id>&action=edit`` is fetched, ``form#post`` is
+    parsed (``_wpnonce``, hidden fields, current values) and submitted with the
+    publish/update button, over one pooled ``httpx.AsyncClient`` per store.
+
+    Products whose edit page cannot be parsed (block editor, custom admin
+    screens) are handed to ClickSubmitEvent at the end of the run.
+    """
+
+    def __init__(self, store_dict, **options):
+        super().__init__(store_dict, **options)
+        self.client: Optional[httpx.AsyncClient] = None
+        self.session_cache = SessionCache(f"profile/{os.environ.get('SESSION_CACHE_DIR', 'sessions')}")
+        self.session_key = (store_dict.get('domain'), store_dict.get('username_login'))
+        self.login_url = f"{store_dict['domain']}/wp-login.php"
+        self.fallback_items: List[Dict] = []
+        self._login_lock = asyncio.Lock()
+        # Bumped by every login, a request that saw the login page under an older
+        # generation does not log in again when another connection already did
+        self.session_generation = 0
+
+    def create_client(self) -> httpx.AsyncClient:
+        timeout = float(os.environ.get('FORM_REPLAY_TIMEOUT', 60))
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=self.page_concurrency, max_keepalive_connections=self.page_concurrency),
+            transport=httpx.AsyncHTTPTransport(retries=1),
+            headers={'User-Agent': USER_AGENT},
+            follow_redirects=True,
+        )
+
+    async def _process_images(self):
+        async with self.create_client() as self.client:
+            self.restore_session()
+            result = await self._replay_items()
+        return await self.publish_fallback(self.fallback_items, result)
+
+    def restore_session(self):
+        for cookie in self.session_cache.load_cookies(*self.session_key):
+            self.client.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''),
+                                    path=cookie.get('path', '/'))
+
+    @staticmethod
+    def needs_login(response: httpx.Response) -> bool:
+        return 'wp-login.php' in str(response.url)
+
+    async def login(self, stale_session: bool = False, generation: Optional[int] = None):
+        """
+        Logs in over HTTP and stores the cookies where the browser path finds them too.
+
+        ``generation`` is the ``session_generation`` the caller's request was
+        sent under; if a login happened since, the caller just retries.
+        """
+        async with self._login_lock:
+            if generation is not None and generation != self.session_generation:
+                return
+            if stale_session:
+                self.session_cache.invalidate(*self.session_key)
+                self.client.cookies.clear()
+            await self.request('GET', self.login_url)
+            response = await self.request('POST', self.login_url, data={
+                'log': self.store_dict['username_login'],
+                'pwd': self.store_dict['password_login'],
+                'wp-submit': 'Log In',
+                'redirect_to': self.domain_url,
+                'testcookie': '1',
+            })
+            metrics.incr('session.logins')
+            if self.needs_login(response):
+                raise RuntimeError(f"Login to {self.store_dict.get('domain')} failed")
+            self.session_generation += 1
+            self.session_cache.save_cookies(self.export_cookies(), *self.session_key)
+
+    def export_cookies(self) -> List[Dict]:
+        return [{
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires if cookie.expires else -1,
+            'httpOnly': cookie.has_nonstandard_attr('HttpOnly'),
+            'secure': cookie.secure,
+            'sameSite': 'Lax',
+        } for cookie in self.client.cookies.jar]
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """One request in the store domain's pace."""
+        async with pacer.pace(self.store_dict['domain'], kind=method) as signal:
+            response = await self.client.request(method, url, **kwargs)
+            signal['status'] = response.status_code
+            signal['retry_after'] = retry_after(response.headers)
+        return response
+
+    async def open_edit_page(self, url: str) -> httpx.Response:
+        generation = self.session_generation
+        response = await self.request('GET', url)
+        if self.needs_login(response):
+            await self.login(stale_session=bool(self.client.cookies), generation=generation)
+            response = await self.request('GET', url)
+        return response
+
+    async def _replay_items(self):
+        queue = asyncio.Queue()
+        for history in self.items:
+            queue.put_nowait(history)
+
+        started = time.monotonic()
+        await asyncio.gather(*(self._replay_worker(queue) for _ in range(min(self.page_concurrency, len(self.items)))))
+
+        elapsed = time.monotonic() - started
+        if self.processed:
+            rate = self.processed * 60 / max(elapsed, 1e-6)
+            metrics.gauge(f"store.{self.store_dict.get('id')}.products_per_minute", rate)
+            print(f"Store {self.store_dict.get('domain')}: {self.processed} products replayed in {elapsed:.1f}s "
+                  f"({rate:.1f}/min, {self.page_concurrency} connections)")
+
+        remaining = []
+        while not queue.empty():
+            remaining.append(queue.get_nowait())
+        return self.result(remaining)
+
+    async def _replay_worker(self, queue):
+        while not queue.empty() and not self.should_stop():
+            history = queue.get_nowait()
+            if not await self._replay_one(history):
+                self.aborted = True
+
+    async def _replay_one(self, history):
+        """Publishes one product over HTTP, returns False if it failed."""
+        if history.get('is_clicked_submit') == 1:
+            return True
+
+        product_id = history.get('product_wp_id')
+        history_id = history.get('id')
+
+        try:
+            await self.history_listing_service.update_clicked(history_id, PROCESSING)
+            self.claim(history)
+            url = self.product_url.replace('product_id', str(product_id))
+            started = time.monotonic()
+
+            response = await self.open_edit_page(url)
+            if response.status_code == 404 or 'id="error-page"' in response.text:
+                self.release(history_id)
+                return True
+
+            try:
+                action, fields = parse_edit_form(response.text)
+            except FormParseError as e:
+                print(f"Product {product_id}: {e}, publishing it in the browser")
+                metrics.incr('form_replay.fallbacks')
+                self.fallback_items.append(history)
+                return True
+
+            response = await self.request(
+                'POST',
+                urljoin(str(response.url), action or 'post.php'),
+                # Encoded by hand: fields repeat names and keep the form's order, httpx ``data`` takes a dict
+                content=urlencode(fields),
+                headers={'Referer': url, 'Origin': self.store_dict['domain'],
+                         'Content-Type': 'application/x-www-form-urlencoded'},
+            )
+            if response.status_code >= 400 or 'message=' not in str(response.url):
+                raise RuntimeError(f"Publish of product {product_id} was not confirmed "
+                                   f"(HTTP {response.status_code}, {response.url})")
+            metrics.observe('form_replay.product_seconds', time.monotonic() - started)
+            metrics.incr('form_replay.published')
+
+            await self.history_listing_service.update_clicked(history_id)
+            self.release(history_id)
+            self.processed += 1
+
+            print(f"Successfully processed product ID: {product_id}")
+            print('--------------------------------------')
+            return True
+
+        except Exception as e:
+            await self.history_listing_service.update_clicked(history_id, ERROR)
+            self.release(history_id)
+            self.failed += 1
+            print("❌ Exception:", str(e))
+            traceback.print_exc()
+            return False
@@ -0,0 +1,156 @@
+import os
+import statistics
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Hashable, Optional, Tuple, Type
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from core.services.metrics import metrics
+
+SUCCESS_NOTICE = '#message.notice-success'
+PUBLISH_BUTTON = '#publishing-action'
+
+# Recent networkidle timings per (store, step), the baseline saved_seconds is measured against
+_baselines: Dict[Tuple[Hashable, str], Deque[float]] = defaultdict(lambda: deque(maxlen=50))
+
+
+class WaitStrategy:
+    """
+    How ClickSubmitEvent decides a product page is ready and a publish went through.
+
+    Two steps are waited on, each with its own timeout in seconds:
+    ``load`` after opening the edit page and ``publish`` after clicking the
+    publish button. When a step times out and ``fallback`` is on, the step is
+    finished with the networkidle wait instead of failing the product.
+
+    Every step is recorded as ``wait.{name}.{step}_seconds``. Once the same
+    store (``key``) has been measured under networkidle, the difference to that
+    median for the same step is recorded as ``wait.{step}.saved_seconds``;
+    without a real baseline nothing is reported.
+    """
+    name = 'networkidle'
+    # ``wait_until`` for page.goto, the strategy does the rest
+    goto_wait_until = 'load'
+
+    def __init__(self, load_timeout: float = 30, publish_timeout: float = 60, fallback: bool = True,
+                 key: Hashable = None):
+        self.timeouts = {'load': load_timeout, 'publish': publish_timeout}
+        self.fallback = fallback
+        self.key = key
+
+    def timeout_ms(self, step: str) -> float:
+        return self.timeouts[step] * 1000
+
+    async def wait_loaded(self, page) -> None:
+        started = time.monotonic()
+        try:
+            await self._loaded(page)
+        except PlaywrightTimeoutError:
+            if not self.fallback or self.name == NetworkIdleWait.name:
+                raise
+            metrics.incr(f'wait.{self.name}.fallbacks')
+            await NetworkIdleWait._loaded(self, page)
+        self._record('load', started)
+
+    async def click_and_wait_published(self, page, button) -> None:
+        started = time.monotonic()
+        clicked = []
+
+        async def click():
+            await button.click()
+            clicked.append(True)
+
+        try:
+            await self._published(page, click)
+        except PlaywrightTimeoutError:
+            if not clicked or not self.fallback or self.name == NetworkIdleWait.name:
+                raise
+            metrics.incr(f'wait.{self.name}.fallbacks')
+            await NetworkIdleWait._confirm(self, page)
+        self._record('publish', started)
+
+    async def _loaded(self, page) -> None:
+        await page.wait_for_load_state('networkidle', timeout=self.timeout_ms('load'))
+
+    async def _published(self, page, click) -> None:
+        await click()
+        await self._confirm(page)
+
+    async def _confirm(self, page) -> None:
+        await page.wait_for_load_state('networkidle', timeout=self.timeout_ms('publish'))
+        await page.wait_for_url("**", timeout=self.timeout_ms('publish'))
+        await page.locator(SUCCESS_NOTICE).wait_for(state='visible', timeout=self.timeout_ms('publish'))
+
+    def _record(self, step: str, started: float) -> None:
+        elapsed = time.monotonic() - started
+        metrics.observe(f'wait.{self.name}.{step}_seconds', elapsed)
+        baseline = _baselines[(self.key, step)]
+        if self.name == NetworkIdleWait.name:
+            baseline.append(elapsed)
+        elif baseline:
+            metrics.observe(f'wait.{step}.saved_seconds', statistics.median(baseline) - elapsed)
+
+
+class NetworkIdleWait(WaitStrategy):
+    """The original behaviour: wait for 500 ms without network traffic."""
+    name = 'networkidle'
+
+
+class SelectorWait(WaitStrategy):
+    """Ready once the publish box is visible, published once the success notice is."""
+    name = 'selector'
+    goto_wait_until = 'domcontentloaded'
+
+    async def _loaded(self, page) -> None:
+        await page.wait_for_selector(PUBLISH_BUTTON, state='visible', timeout=self.timeout_ms('load'))
+
+    async def _published(self, page, click) -> None:
+        await click()
+        await page.locator(SUCCESS_NOTICE).wait_for(state='visible', timeout=self.timeout_ms('publish'))
+
+
+class ResponseWait(SelectorWait):
+    """Published once the ``post.php`` POST of the edit form answers and the redirect has rendered."""
+    name = 'response'
+
+    @staticmethod
+    def is_publish_response(response) -> bool:
+        return response.request.method == 'POST' and '/wp-admin/post.php' in response.url
+
+    async def _published(self, page, click) -> None:
+        async with page.expect_response(self.is_publish_response, timeout=self.timeout_ms('publish')) as info:
+            await click()
+        response = await info.value
+        if response.status >= 400:
+            raise RuntimeError(f"Publish request failed with HTTP {response.status}")
+        await page.wait_for_load_state('domcontentloaded', timeout=self.timeout_ms('publish'))
+        await page.locator(SUCCESS_NOTICE).wait_for(state='visible', timeout=self.timeout_ms('publish'))
+
+
+WAIT_STRATEGIES: Dict[str, Type[WaitStrategy]] = {
+    NetworkIdleWait.name: NetworkIdleWait,
+    SelectorWait.name: SelectorWait,
+    ResponseWait.name: ResponseWait,
+}
+
+
+def get_wait_strategy(name: Optional[str] = None, timeouts: Optional[Dict[str, float]] = None,
+                      key: Hashable = None) -> WaitStrategy:
+    """
+    Build the strategy for a store.
+
+    ``name`` and ``timeouts`` come from the store when it sets them, otherwise
+    from WAIT_STRATEGY / WAIT_LOAD_TIMEOUT / WAIT_PUBLISH_TIMEOUT. ``key``
+    identifies the store whose networkidle timings are the baseline.
+    """
+    name = name or os.environ.get('WAIT_STRATEGY', NetworkIdleWait.name)
+    if name not in WAIT_STRATEGIES:
+        raise ValueError(f"Unknown wait strategy '{name}', expected one of {', '.join(WAIT_STRATEGIES)}")
+    timeouts = timeouts or {}
+    return WAIT_STRATEGIES[name](
+        load_timeout=float(timeouts.get('load') or os.environ.get('WAIT_LOAD_TIMEOUT', 30)),
+        publish_timeout=float(timeouts.get('publish') or os.environ.get('WAIT_PUBLISH_TIMEOUT', 60)),
+        fallback=os.environ.get('WAIT_FALLBACK', '1') == '1',
+        key=key,
+    )
@@ -0,0 +1,174 @@
+import base64
+import hashlib
+import hmac
+import os
+import time
+import traceback
+import uuid
+from typing import Dict, List
+from urllib.parse import quote
+
+import httpx
+
+from Http.services.history_listing_service import SUCCESS
+from Http.strategies.click_submit_event import ClickSubmitEvent, ERROR, PROCESSING
+from core.services.metrics import metrics
+from core.services.pacer import pacer, retry_after
+
+# WooCommerce rejects batches with more than 100 create/update/delete items
+WC_BATCH_LIMIT = 100
+
+
+def oauth1_params(method: str, url: str, key: str, secret: str) -> Dict[str, str]:
+    """
+    One-legged OAuth 1.0a query parameters, what WooCommerce requires of REST
+    calls over plain HTTP (it only accepts basic auth and query keys over HTTPS).
+
+    Signed the way ``WC_REST_Authentication::check_oauth_signature`` checks:
+    ``METHOD&url&params`` without the body, HMAC-SHA256 keyed with ``secret&``.
+    """
+    params = {
+        'oauth_consumer_key': key,
+        'oauth_nonce': uuid.uuid4().hex,
+        'oauth_signature_method': 'HMAC-SHA256',
+        'oauth_timestamp': str(int(time.time())),
+    }
+    normalized = '%26'.join(f"{quote(k, safe='')}%3D{quote(v, safe='')}" for k, v in sorted(params.items()))
+    base_string = f"{method.upper()}&{quote(url, safe='')}&{normalized}"
+    digest = hmac.new(f"{secret}&".encode(), base_string.encode(), hashlib.sha256).digest()
+    return {**params, 'oauth_signature': base64.b64encode(digest).decode()}
+
+
+class WooCommerceBatchEvent(ClickSubmitEvent):
+    """
+    Publishes a store's products through ``POST /wp-json/wc/v3/products/batch``.
+
+    Pending items are sent as ``{"update": [{"id": product_wp_id, "status": "publish"}]}``
+    in chunks of WC_BATCH_SIZE (at most 100), authenticated with the store's
+    ``api_key``/``secret_key`` consumer keys: basic auth over HTTPS, an
+    OAuth 1.0a signature over plain HTTP. Every entry of the response is mapped back to its
+    history_listing: published products become SUCCESS, per-item errors
+    ERROR, and ids WooCommerce does not know are skipped like a missing edit
+    page in the browser path.
+
+    A store without consumer keys, or a batch the API refuses as a whole
+    (auth, REST disabled, server error, a 200 that is not JSON), is
+    published by ClickSubmitEvent.
+    """
+
+    def __init__(self, store_dict, **options):
+        super().__init__(store_dict, **options)
+        self.batch_size = max(1, min(int(os.environ.get('WC_BATCH_SIZE', WC_BATCH_LIMIT)), WC_BATCH_LIMIT))
+        self.endpoint = f"{store_dict['domain']}/wp-json/wc/v3/products/batch"
+        self.fallback_items: List[Dict] = []
+
+    def has_credentials(self) -> bool:
+        return bool(self.store_dict.get('api_key') and self.store_dict.get('secret_key'))
+
+    def auth_options(self) -> Dict:
+        key, secret = self.store_dict['api_key'], self.store_dict['secret_key']
+        if self.endpoint.startswith('https://'):
+            return {'auth': (key, secret)}
+        return {'params': oauth1_params('POST', self.endpoint, key, secret)}
+
+    async def _process_images(self):
+        pending = [history for history in self.items if history.get('is_clicked_submit') != 1]
+        if not self.has_credentials():
+            print(f"Store {self.store_dict.get('domain')} has no WooCommerce keys, publishing in the browser")
+            self.fallback_items = pending
+            pending = []
+
+        remaining = []
+        started = time.monotonic()
+        timeout = float(os.environ.get('WC_BATCH_TIMEOUT', 120))
+        async with httpx.AsyncClient(timeout=httpx.Timeout(timeout, connect=10.0)) as client:
+            for offset in range(0, len(pending), self.batch_size):
+                if self.should_stop():
+                    remaining = pending[offset:]
+                    break
+                await self._publish_batch(client, pending[offset:offset + self.batch_size])
+
+        elapsed = time.monotonic() - started
+        if self.processed:
+            rate = self.processed * 60 / max(elapsed, 1e-6)
+            metrics.gauge(f"store.{self.store_dict.get('id')}.products_per_minute", rate)
+            print(f"Store {self.store_dict.get('domain')}: {self.processed} products published via REST "
+                  f"in {elapsed:.1f}s ({rate:.1f}/min)")
+
+        result = self.result(remaining)
+        return await self.publish_fallback(self.fallback_items, result)
+
+    async def _publish_batch(self, client: httpx.AsyncClient, batch: List[Dict]):
+        for history in batch:
+            await self.history_listing_service.update_clicked(history.get('id'), PROCESSING)
+            self.claim(history)
+
+        started = time.monotonic()
+        try:
+            async with pacer.pace(self.store_dict['domain'], kind='rest_batch') as signal:
+                response = await client.post(
+                    self.endpoint,
+                    json={'update': [{'id': int(h.get('product_wp_id')), 'status': 'publish'} for h in batch]},
+                    **self.auth_options(),
+                )
+                signal['status'] = response.status_code
+                signal['retry_after'] = retry_after(response.headers)
+        except httpx.HTTPError as e:
+            print(f"❌ WooCommerce batch request failed: {e}, publishing {len(batch)} products in the browser")
+            metrics.incr('wc_batch.fallbacks')
+            self.fallback_items.extend(batch)
+            return
+        metrics.observe('wc_batch.request_seconds', time.monotonic() - started)
+        metrics.incr('wc_batch.requests')
+
+        if response.status_code != 200:
+            print(f"❌ WooCommerce batch refused (HTTP {response.status_code}): {response.text[:200]}, "
+                  f"publishing {len(batch)} products in the browser")
+            metrics.incr('wc_batch.fallbacks')
+            self.fallback_items.extend(batch)
+            return
+
+        try:
+            entries = response.json().get('update', [])
+        except (ValueError, AttributeError):
+            # A maintenance or security plugin page served with 200
+            print(f"❌ WooCommerce batch answered without JSON: {response.text[:200]}, "
+                  f"publishing {len(batch)} products in the browser")
+            metrics.incr('wc_batch.fallbacks')
+            self.fallback_items.extend(batch)
+            return
+
+        results = {}
+        for entry in entries:
+            results.setdefault(int(entry.get('id') or 0), entry)
+        for history in batch:
+            await self._apply_result(history, results.get(int(history.get('product_wp_id'))))
+
+    async def _apply_result(self, history: Dict, entry):
+        product_id = history.get('product_wp_id')
+        history_id = history.get('id')
+        try:
+            error = (entry or {}).get('error')
+            if entry is None or error:
+                code = error.get('code') if error else 'missing_from_response'
+                if code == 'woocommerce_rest_product_invalid_id':
+                    # Same as #error-page in the browser: nothing to publish
+                    self.release(history_id)
+                    return
+                raise RuntimeError(f"{code}: {error.get('message') if error else 'no result for this id'}")
+            if entry.get('status') != 'publish':
+                raise RuntimeError(f"status is '{entry.get('status')}' after the update")
+
+            await self.history_listing_service.update_clicked(history_id, SUCCESS)
+            self.release(history_id)
+            self.processed += 1
+            metrics.incr('wc_batch.published')
+            print(f"Successfully processed product ID: {product_id}")
+
+        except Exception as e:
+            await self.history_listing_service.update_clicked(history_id, ERROR)
+            self.release(history_id)
+            self.failed += 1
+            metrics.incr('wc_batch.failed')
+            print(f"❌ Product {product_id}:", str(e))
+            traceback.print_exc()
@@ -0,0 +1,96 @@
+"""
+Launch time, context creation, publish latency and peak RSS per browser engine.
+
+For every engine the browser is launched cold, ``--contexts`` contexts are
+created and closed, and ``--products`` products are published on the local
+wp-admin stand-in with the same flow as ClickSubmitEvent. A MemoryWatchdog
+samples the RSS of all browser processes in the background; its peak is
+reported. Engines whose browser is not installed are reported as such.
+
+Usage:
+    python -m benchmarks.browser_engines --engines chromium,firefox,webkit --products 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from playwright.async_api import Error as PlaywrightError, async_playwright
+
+from Http.browser_engines import ENGINES, browser_engine, launch_browser
+from benchmarks.request_blocking import publish_products
+from benchmarks.wp_admin_standin import start_standin
+from core.utils.memory_watchdog import MemoryWatchdog
+
+
+async def sample_peak(watchdog: MemoryWatchdog, stop: asyncio.Event, interval: float = 0.2) -> float:
+    peak = 0.0
+    while not stop.is_set():
+        watchdog.sample()
+        peak = max(peak, watchdog.browser_rss_mb)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+    return peak
+
+
+async def measure(playwright, engine: str, base_url: str, products: int, contexts: int, first_id: int):
+    _, launch_options = browser_engine({'browser_engine': engine})
+    watchdog = MemoryWatchdog()
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_peak(watchdog, stop))
+    try:
+        started = time.perf_counter()
+        browser = await launch_browser(playwright, engine, True, **launch_options)
+        launch_seconds = time.perf_counter() - started
+
+        context_times = []
+        for _ in range(contexts):
+            started = time.perf_counter()
+            context = await browser.new_context()
+            context_times.append(time.perf_counter() - started)
+            await context.close()
+
+        elapsed = await publish_products(browser, base_url, products, first_id=first_id)
+        await browser.close()
+    finally:
+        stop.set()
+        peak_rss = await sampler
+    return {
+        'launch_s': launch_seconds,
+        'context_ms': statistics.median(context_times) * 1000,
+        'publish_s': elapsed / products,
+        'peak_rss_mb': peak_rss,
+    }
+
+
+async def main(engines, products: int, contexts: int, latency: float):
+    server, base_url, _ = start_standin(latency=latency)
+    results = {}
+    async with async_playwright() as p:
+        for index, engine in enumerate(engines, start=1):
+            try:
+                results[engine] = await measure(p, engine, base_url, products, contexts, index * 100_000)
+            except PlaywrightError as e:
+                results[engine] = str(e).splitlines()[0]
+    server.shutdown()
+
+    print(f"{'engine':<10}{'launch s':>10}{'context ms':>12}{'s/product':>11}{'peak RSS MB':>13}")
+    for engine, row in results.items():
+        if isinstance(row, str):
+            print(f"{engine:<10}  not available: {row}")
+            continue
+        print(f"{engine:<10}{row['launch_s']:>10.2f}{row['context_ms']:>12.1f}"
+              f"{row['publish_s']:>11.3f}{row['peak_rss_mb']:>13.0f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--engines', default=','.join(ENGINES))
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--contexts', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds added to every response')
+    args = parser.parse_args()
+    asyncio.run(main([e.strip() for e in args.engines.split(',') if e.strip()], args.products, args.contexts,
+                     args.latency))
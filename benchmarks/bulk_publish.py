@@ -0,0 +1,66 @@
+"""
+Items per minute of ClickSubmitEvent's edit page mode against its bulk mode.
+
+Both modes publish the same number of draft products on the local wp-admin
+stand-in through Firefox. Product statuses are recorded in memory instead of
+being sent to DOMAIN_API.
+
+Usage:
+    python -m benchmarks.bulk_publish --products 200 --page-size 50
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from Http.strategies.click_submit_event import ClickSubmitEvent
+from benchmarks.publish_engines import StatusRecorder
+from benchmarks.wp_admin_standin import start_standin
+
+
+async def run_mode(base_url: str, mode: str, products: int, first_id: int):
+    store_dict = {
+        'id': 1,
+        'domain': base_url,
+        'username_login': 'admin',
+        'password_login': 'admin',
+        'publish_mode': mode,
+        'history_listings': [{'id': i, 'product_wp_id': i, 'is_clicked_submit': 0}
+                             for i in range(first_id, first_id + products)],
+    }
+    event = ClickSubmitEvent(store_dict)
+    event.history_listing_service = StatusRecorder()
+    started = time.perf_counter()
+    result = await event._process_images()
+    elapsed = time.perf_counter() - started
+    assert result['processed'] == products, result
+    return elapsed
+
+
+async def main(products: int, page_size: int, latency: float):
+    os.environ.setdefault('HEADLESS', '1')
+    os.environ['SESSION_CACHE_DIR'] = 'benchmark-sessions'
+    os.environ['BULK_PAGE_SIZE'] = str(page_size)
+    server, base_url, state = start_standin(latency=latency)
+
+    results = {}
+    for index, mode in enumerate(('edit', 'bulk'), start=1):
+        first_id = index * 100_000 + 1
+        state.products.update({post_id: 'draft' for post_id in range(first_id, first_id + products)})
+        state.reset()
+        elapsed = await run_mode(base_url, mode, products, first_id)
+        results[mode] = (elapsed, state.requests)
+    server.shutdown()
+
+    print(f"{'mode':<8}{'seconds':>10}{'items/min':>12}{'requests':>10}")
+    for mode, (elapsed, requests) in results.items():
+        print(f"{mode:<8}{elapsed:>10.1f}{products * 60 / elapsed:>12.1f}{requests:>10}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds added to every response')
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.page_size, args.latency))
@@ -0,0 +1,93 @@
+"""
+Throughput of the publish engines on the local wp-admin stand-in.
+
+Every engine publishes the same number of products: the click flow through
+Firefox (one page), form replay over HTTP with one and with
+``--concurrency`` connections, and WooCommerce REST batches. Product
+statuses are recorded in memory instead of being sent to DOMAIN_API.
+
+Usage:
+    python -m benchmarks.publish_engines --products 50 --concurrency 4
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from playwright.async_api import async_playwright
+
+from Http.strategies.form_replay_event import FormReplayEvent
+from Http.strategies.woocommerce_batch_event import WooCommerceBatchEvent
+from benchmarks.request_blocking import publish_products
+from benchmarks.wp_admin_standin import CONSUMER_KEY, CONSUMER_SECRET, start_standin
+
+
+class StatusRecorder:
+    """Collects ``update_clicked`` calls in place of HistoryListingService."""
+
+    def __init__(self):
+        self.statuses = {}
+
+    async def update_clicked(self, history_id, status=1):
+        self.statuses[history_id] = status
+        return []
+
+
+async def run_engine(engine, base_url: str, products: int, concurrency: int, first_id: int):
+    store_dict = {
+        'id': 1,
+        'domain': base_url,
+        'username_login': 'admin',
+        'password_login': 'admin',
+        'api_key': CONSUMER_KEY,
+        'secret_key': CONSUMER_SECRET,
+        'history_listings': [{'id': i, 'product_wp_id': i, 'is_clicked_submit': 0}
+                             for i in range(first_id, first_id + products)],
+    }
+    event = engine(store_dict, page_concurrency=concurrency)
+    event.history_listing_service = StatusRecorder()
+    started = time.perf_counter()
+    result = await event._process_images()
+    elapsed = time.perf_counter() - started
+    assert result['processed'] == products, result
+    return elapsed
+
+
+async def main(products: int, concurrency: int, latency: float):
+    os.environ['SESSION_CACHE_DIR'] = tempfile.mkdtemp(prefix='sessions-')
+    os.environ.setdefault('MAX_PAGES_PER_STORE', str(concurrency))
+    server, base_url, state = start_standin(latency=latency)
+    results = {}
+
+    async with async_playwright() as p:
+        browser = await p.firefox.launch(headless=True)
+        state.reset()
+        started = time.perf_counter()
+        await publish_products(browser, base_url, products, first_id=1)
+        results['click (1 page)'] = (time.perf_counter() - started, state.requests)
+        await browser.close()
+
+    runs = (
+        ('form_replay (1 connection)', FormReplayEvent, 1),
+        (f'form_replay ({concurrency} connections)', FormReplayEvent, concurrency),
+        ('woocommerce (REST batch)', WooCommerceBatchEvent, 1),
+    )
+    for index, (label, engine, connections) in enumerate(runs, start=1):
+        state.reset()
+        elapsed = await run_engine(engine, base_url, products, connections, first_id=index * 10_000 + 1)
+        results[label] = (elapsed, state.requests)
+    server.shutdown()
+
+    print(f"{'engine':<32}{'s/product':>12}{'products/min':>14}{'requests':>10}")
+    for label, (elapsed, requests) in results.items():
+        print(f"{label:<32}{elapsed / products:>12.3f}{products * 60 / elapsed:>14.1f}{requests:>10}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds added to every response')
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.concurrency, args.latency))
@@ -0,0 +1,72 @@
+"""
+Bytes and time per published product with and without the RequestBlocker.
+
+Runs the same login + publish flow as ClickSubmitEvent against the local
+wp-admin stand-in, once with a plain context and once with the blocker
+installed, and prints bytes served and seconds per product for both.
+
+Usage:
+    python -m benchmarks.request_blocking --products 20 --latency 0.02
+"""
+import argparse
+import asyncio
+import time
+
+from playwright.async_api import async_playwright
+
+from Http.request_router import DEFAULT_BLOCKED_HOSTS, RequestBlocker
+from benchmarks.wp_admin_standin import start_standin
+
+
+async def publish_products(browser, base_url: str, products: int, blocker=None, first_id: int = 1):
+    context = await browser.new_context()
+    if blocker:
+        await blocker.install(context)
+    page = await context.new_page()
+    await page.goto(f'{base_url}/wp-admin/')
+    await page.fill('input[name="log"]', 'admin')
+    await page.fill('input[name="pwd"]', 'admin')
+    await page.click('input[name="wp-submit"]')
+    await page.wait_for_load_state('networkidle')
+
+    started = time.perf_counter()
+    for post_id in range(first_id, first_id + products):
+        await page.goto(f'{base_url}/wp-admin/post.php?post={post_id}&action=edit')
+        await page.wait_for_load_state('networkidle')
+        await page.click('#publishing-action #publish')
+        await page.wait_for_load_state('networkidle')
+        await page.locator('#message.notice-success').wait_for(state='visible')
+    elapsed = time.perf_counter() - started
+    await context.close()
+    return elapsed
+
+
+async def main(products: int, latency: float):
+    server, base_url, state = start_standin(latency=latency)
+    # The stand-in serves its third-party script from localhost
+    blocker = RequestBlocker(blocked_hosts=DEFAULT_BLOCKED_HOSTS + ('localhost',))
+    results = {}
+    async with async_playwright() as p:
+        browser = await p.firefox.launch(headless=True)
+        for label, active in (('off', None), ('on', blocker)):
+            first_id = len(results) * products + 1
+            await publish_products(browser, base_url, 1, active, first_id=10_000 + first_id)  # warm-up
+            state.reset()
+            elapsed = await publish_products(browser, base_url, products, active, first_id=first_id)
+            results[label] = (state.bytes_sent / products, elapsed / products, state.requests / products)
+        await browser.close()
+    server.shutdown()
+
+    print(f"{'blocking':<10}{'KB/product':>12}{'s/product':>12}{'requests/product':>18}")
+    for label, (size, seconds, requests) in results.items():
+        print(f"{label:<10}{size / 1024:>12.1f}{seconds:>12.3f}{requests:>18.1f}")
+    off, on = results['off'], results['on']
+    print(f"bytes -{(1 - on[0] / off[0]) * 100:.0f}%, time -{(1 - on[1] / off[1]) * 100:.0f}%")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds added to every response')
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.latency))
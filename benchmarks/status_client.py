@@ -0,0 +1,137 @@
+"""
+Event-loop lag while publish workers report their status to DOMAIN_API.
+
+Each simulated product does what the publish engines do around a publish:
+``update_clicked(id, PROCESSING)``, the publish itself (an ``asyncio.sleep``),
+then ``update_clicked(id, SUCCESS)``. A ticker task sleeps in short steps
+and records how late it wakes up. The run is repeated with the old
+``requests.post`` implementation and with HistoryListingService on the
+pooled ``status_client``, then with the write-behind batcher in 'single'
+mode (coalesced update_history requests) and 'api' mode (update_histories),
+against the status endpoints of the local stand-in.
+
+Prints the ticker's p50 / p99 / max lag, the p99 time a worker waits in
+``update_clicked``, the wall time, the TCP connections the stand-in
+accepted and the status requests it served for each.
+
+Usage:
+    python -m benchmarks.status_client --products 200 --concurrency 8 --latency 0.02
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Any, List
+
+import requests
+
+from Http.services.history_listing_service import HistoryListingService, SUCCESS
+from benchmarks.wp_admin_standin import start_standin
+from core.services.http_client import HttpClient
+from core.services.write_behind import WriteBehindBatcher
+
+PROCESSING = 2
+
+
+class BlockingHistoryListingService(HistoryListingService):
+    """``update_clicked`` as it was: a synchronous ``requests.post`` per call."""
+
+    async def update_clicked(self, history_id: int, status: int = SUCCESS) -> dict[str, Any]:
+        url = f"{os.environ.get('DOMAIN_API')}/api/update_history/{history_id}"
+        # Same limit as status_client's STATUS_API_TIMEOUT, a stalled stand-in must not hang the run
+        response = requests.post(url, headers={"Accept": "application/json"}, json={"is_clicked_submit": status},
+                                 timeout=10)
+        data = []
+        if response.status_code == 200:
+            data = response.json().get('response', []).get('data', [])
+        return data
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+async def ticker(lags: List[float], interval: float, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run(service, products: int, concurrency: int, publish_seconds: float, interval: float):
+    lags: List[float] = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, interval, stop))
+    waits: List[float] = []
+    ids = iter(range(1, products + 1))
+
+    async def update(history_id: int, status: int):
+        started = time.perf_counter()
+        await service.update_clicked(history_id, status)
+        waits.append(time.perf_counter() - started)
+
+    async def worker():
+        for history_id in ids:
+            await update(history_id, PROCESSING)
+            await asyncio.sleep(publish_seconds)
+            await update(history_id, SUCCESS)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    if service.batcher is not None:
+        await service.batcher.close()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick
+    return lags, waits, elapsed
+
+
+async def main(products: int, concurrency: int, latency: float, publish_seconds: float, interval: float,
+               batch_size: int, batch_interval: float):
+    server, base_url, state = start_standin(latency=latency)
+    os.environ['DOMAIN_API'] = base_url
+    client = HttpClient(use_http2=False, persistent=True, max_concurrency=concurrency)
+    services = {
+        'requests': BlockingHistoryListingService(None),
+        'pooled': HistoryListingService(None, http_client=client),
+    }
+    for mode in ('single', 'api'):
+        service = HistoryListingService(None, http_client=client, bulk_mode=mode)
+        service.batcher = WriteBehindBatcher(service.send_statuses, max_batch=batch_size, interval=batch_interval,
+                                             name=f'benchmark_{mode}')
+        services[f'batch {mode}'] = service
+
+    results = {}
+    for label, service in services.items():
+        service.batcher = service.batcher if label.startswith('batch') else None
+        await service.update_clicked(0, PROCESSING)  # warm-up
+        if service.batcher is not None:
+            await service.batcher.flush()
+        state.reset()
+        lags, waits, elapsed = await run(service, products, concurrency, publish_seconds, interval)
+        assert all(state.history[i] == SUCCESS for i in range(1, products + 1))
+        results[label] = (lags, waits, elapsed, state.connections, state.status_updates)
+    await client.aclose()
+    server.shutdown()
+
+    print(f"{'client':<14}{'p50 lag ms':>12}{'p99 lag ms':>12}{'max lag ms':>12}{'p99 wait ms':>13}"
+          f"{'wall s':>9}{'connections':>13}{'requests':>10}")
+    for label, (lags, waits, elapsed, connections, requests_served) in results.items():
+        print(f"{label:<14}{percentile(lags, 50) * 1000:>12.1f}{percentile(lags, 99) * 1000:>12.1f}"
+              f"{max(lags, default=0) * 1000:>12.1f}{percentile(waits, 99) * 1000:>13.1f}"
+              f"{elapsed:>9.2f}{connections:>13}{requests_served:>10}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8, help='publish workers, like PAGE_CONCURRENCY')
+    parser.add_argument('--latency', type=float, default=0.02, help='seconds the status endpoint takes')
+    parser.add_argument('--publish-seconds', type=float, default=0.05, help='simulated publish per product')
+    parser.add_argument('--interval', type=float, default=0.005, help='ticker sleep')
+    parser.add_argument('--batch-size', type=int, default=100, help='STATUS_BATCH_SIZE')
+    parser.add_argument('--batch-interval', type=float, default=0.5, help='STATUS_BATCH_INTERVAL')
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.concurrency, args.latency, args.publish_seconds, args.interval,
+                     args.batch_size, args.batch_interval))
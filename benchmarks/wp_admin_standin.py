@@ -0,0 +1,433 @@
+"""
+Minimal stand-in for a WordPress admin, used by the benchmarks in this package.
+
+It serves just enough of wp-login.php and post.php for the publish flow:
+a login form, a product edit page with ``#publishing-action`` and a
+``#message.notice-success`` notice after publishing. Logins are counted in
+``StandinState.logins``; ``expire_sessions()`` invalidates every session
+cookie handed out so far. The edit page pulls in
+the same kinds of assets a real wp-admin does (images, a video, a web font,
+the editor script that enables the publish button and a third-party
+analytics script served from ``localhost`` while the admin runs on
+``127.0.0.1``), so bytes and time per product can be compared locally.
+
+``POST /wp-json/wc/v3/products/batch`` behaves like WooCommerce: consumer
+key auth (basic auth or query string keys only when
+``StandinState.https`` says the request came over TLS, an OAuth 1.0a
+signature otherwise), at most 100 items per request and per-item errors
+for unknown product ids. ``StandinState.rest_html`` makes it answer 200
+with an HTML page instead.
+
+``edit.php?post_type=product`` renders the product list table with screen
+options, row checkboxes and the bulk "Edit" panel; a bulk edit skips
+products listed in ``StandinState.locked``.
+
+``POST /api/update_history/{id}`` stands in for DOMAIN_API's status
+endpoint and records ``is_clicked_submit`` in ``StandinState.history``;
+``POST /api/update_histories`` takes ``{"histories": [{id, is_clicked_submit}]}``.
+
+Usage:
+    python -m benchmarks.wp_admin_standin 8080
+"""
+import base64
+import hashlib
+import hmac
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs, quote, urlparse
+
+SESSION_COOKIE = 'wordpress_logged_in_standin'
+NONCE = 'standin-nonce'
+CONSUMER_KEY = 'ck_standin'
+CONSUMER_SECRET = 'cs_standin'
+WC_BATCH_LIMIT = 100
+
+ASSETS = {
+    '/wp-content/uploads/hero-1.jpg': ('image/jpeg', 350_000),
+    '/wp-content/uploads/hero-2.jpg': ('image/jpeg', 250_000),
+    '/wp-content/uploads/gallery-1.png': ('image/png', 180_000),
+    '/wp-content/uploads/preview.mp4': ('video/mp4', 600_000),
+    '/wp-includes/fonts/dashicons.woff2': ('font/woff2', 60_000),
+    '/wp-admin/css/edit.css': ('text/css', 40_000),
+    '/wp-includes/js/vendor.js': ('application/javascript', 120_000),
+    '/analytics.js': ('application/javascript', 90_000),
+}
+
+MESSAGES = {'1': 'updated', '6': 'published'}
+
+EDITOR_JS = b"""
+document.addEventListener('DOMContentLoaded', function () {
+    var button = document.getElementById('publish');
+    if (button) { button.disabled = false; }
+});
+"""
+
+
+@dataclass
+class StandinState:
+    """Counters shared by all handler threads, reset between benchmark runs."""
+    products: Dict[int, str] = field(default_factory=dict)
+    # Products whose edit page has no classic form#post, like the block editor
+    block_editor: Set[int] = field(default_factory=set)
+    # Product ids the WooCommerce API answers with "Invalid ID."
+    missing: Set[int] = field(default_factory=set)
+    # Products a bulk edit skips because another user is editing them
+    locked: Set[int] = field(default_factory=set)
+    # Products dated in the future: publishing them schedules them instead
+    future_dated: Set[int] = field(default_factory=set)
+    # Last-modified order of the products, for the list's orderby=modified
+    modified: Dict[int, int] = field(default_factory=dict)
+    # Requests count as HTTPS (behind a TLS terminator): basic auth and query keys are accepted
+    https: bool = False
+    # The REST API answers 200 with an HTML page, like a maintenance or security plugin
+    rest_html: bool = False
+    # Rows per list page, the edit_product_per_page screen option
+    per_page: int = 20
+    bytes_sent: int = 0
+    requests: int = 0
+    publishes: int = 0
+    # is_clicked_submit per history id, as stored by DOMAIN_API's /api/update_history
+    history: Dict[int, int] = field(default_factory=dict)
+    status_updates: int = 0
+    # Value of the current session cookie, expire_sessions() logs every client out
+    session: int = 1
+    logins: int = 0
+    connections: int = 0
+    latency: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def reset(self):
+        with self.lock:
+            self.bytes_sent = 0
+            self.requests = 0
+            self.publishes = 0
+            self.status_updates = 0
+            self.connections = 0
+
+    def set_status(self, post_id: int, status: str):
+        """Saves a product the way wp_update_post would, counting publishes."""
+        if status == 'publish' and post_id in self.future_dated:
+            status = 'future'
+        with self.lock:
+            self.products[post_id] = status
+            self.modified[post_id] = max(self.modified.values(), default=0) + 1
+            if status == 'publish':
+                self.publishes += 1
+
+    def expire_sessions(self):
+        with self.lock:
+            self.session += 1
+
+    def count(self, size: int):
+        with self.lock:
+            self.bytes_sent += size
+            self.requests += 1
+
+
+def login_page() -> str:
+    return """<html><body><form id="loginform" method="post" action="/wp-login.php">
+<input type="text" name="log" id="user_login">
+<input type="password" name="pwd" id="user_pass">
+<input type="submit" name="wp-submit" id="wp-submit" value="Log In">
+</form></body></html>"""
+
+
+def edit_page(post_id: int, status: str, message: str, host: str, block_editor: bool = False) -> str:
+    third_party = host.replace('127.0.0.1', 'localhost')
+    notice = f'<div id="message" class="updated notice notice-success"><p>Product {MESSAGES[message]}.</p></div>' \
+        if message in MESSAGES else ''
+    publish = '<input type="submit" name="save" id="publish" value="Update" disabled>' if status == 'publish' \
+        else '<input type="submit" name="publish" id="publish" value="Publish" disabled>'
+    form = f"""<form id="post" method="post" action="post.php" name="post">
+<input type="hidden" name="_wpnonce" value="{NONCE}">
+<input type="hidden" name="_wp_http_referer" value="/wp-admin/post.php?post={post_id}&amp;action=edit">
+<input type="hidden" name="action" value="editpost">
+<input type="hidden" name="post_ID" value="{post_id}">
+<input type="hidden" name="original_post_status" value="{status}">
+<input type="text" name="post_title" value="Product {post_id} &amp; co">
+<textarea name="content">
+Description of product {post_id}</textarea>
+<select name="product-type"><option value="simple" selected>Simple</option><option value="variable">Variable</option></select>
+<input type="checkbox" name="_featured" value="yes">
+<input type="checkbox" name="comment_status" value="open" checked>
+<div id="publishing-action">{publish}</div>
+</form>""" if not block_editor else '<div id="editor" class="block-editor"></div>'
+    return f"""<html><head>
+<link rel="stylesheet" href="/wp-admin/css/edit.css">
+<style>@font-face {{ font-family: dashicons; src: url('/wp-includes/fonts/dashicons.woff2'); }}
+body {{ font-family: dashicons, sans-serif; }}</style>
+<script src="/wp-includes/js/vendor.js"></script>
+<script src="/wp-includes/js/editor.js"></script>
+<script async src="http://{third_party}/analytics.js"></script>
+</head><body>{notice}
+<h1>Edit product {post_id} ({status})</h1>
+<img src="/wp-content/uploads/hero-1.jpg"><img src="/wp-content/uploads/hero-2.jpg">
+<img src="/wp-content/uploads/gallery-1.png">
+<video src="/wp-content/uploads/preview.mp4" preload="auto"></video>
+{form}</body></html>"""
+
+
+LIST_JS = """
+document.addEventListener('DOMContentLoaded', function () {
+    document.getElementById('show-settings-link').addEventListener('click', function () {
+        document.getElementById('screen-meta').style.display = 'block';
+    });
+    document.getElementById('doaction').addEventListener('click', function (event) {
+        if (document.getElementById('bulk-action-selector-top').value === 'edit') {
+            event.preventDefault();
+            document.getElementById('bulk-edit').style.display = 'table-row';
+        }
+    });
+});
+"""
+
+
+def list_page(rows, status: str, paged: int, per_page: int, updated: Optional[str]) -> str:
+    notice = f'<div id="message" class="updated notice is-dismissible"><p>{updated} products updated.</p></div>' \
+        if updated else ''
+    body = ''.join(
+        f'<tr id="post-{post_id}"><th class="check-column">'
+        f'<input id="cb-select-{post_id}" type="checkbox" name="post[]" value="{post_id}"></th>'
+        f'<td class="title column-title">Product {post_id}</td><td class="status">{product_status}</td></tr>'
+        for post_id, product_status in rows
+    )
+    return f"""<html><head><script>{LIST_JS}</script></head><body>{notice}
+<button type="button" id="show-settings-link">Screen Options</button>
+<div id="screen-meta" style="display:none"><form id="adv-settings" method="post" action="edit.php?post_type=product">
+<input type="hidden" name="wp_screen_options[option]" value="edit_product_per_page">
+<input type="number" name="wp_screen_options[value]" id="edit_product_per_page" value="{per_page}">
+<input type="submit" name="screen-options-apply" id="screen-options-apply" value="Apply">
+</form></div>
+<form id="posts-filter" method="get" action="edit.php">
+<input type="hidden" name="post_type" value="product">
+<input type="hidden" name="post_status" value="{status}">
+<input type="hidden" name="paged" value="{paged}">
+<input type="hidden" name="_wpnonce" value="{NONCE}">
+<select name="action" id="bulk-action-selector-top"><option value="-1">Bulk actions</option>
+<option value="edit">Edit</option><option value="trash">Move to Trash</option></select>
+<input type="submit" id="doaction" value="Apply">
+<table class="wp-list-table"><tbody id="the-list">{body}
+<tr id="bulk-edit" class="inline-edit-row" style="display:none"><td>
+<select name="_status"><option value="-1">— No Change —</option><option value="publish">Published</option>
+<option value="pending">Pending Review</option><option value="draft">Draft</option></select>
+<input type="submit" name="bulk_edit" id="bulk_edit" value="Update">
+</td></tr></tbody></table></form></body></html>"""
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    state: StandinState = None
+    # Keep-alive, so clients that pool connections reuse them
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def logged_in(self) -> bool:
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        return SESSION_COOKIE in cookie and cookie[SESSION_COOKIE].value == str(self.state.session)
+
+    def send(self, status: int, body: bytes = b'', content_type: str = 'text/html', headers: Dict[str, str] = None):
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.state.count(len(body))
+
+    def redirect(self, location: str, headers: Dict[str, str] = None):
+        self.send(302, headers={'Location': location, **(headers or {})})
+
+    def read_form(self) -> Dict[str, str]:
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        return {key: values[-1] for key, values in form.items()}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path in ASSETS:
+            content_type, size = ASSETS[url.path]
+            return self.send(200, b'\0' * size, content_type)
+        if url.path == '/wp-includes/js/editor.js':
+            return self.send(200, EDITOR_JS, 'application/javascript')
+        if url.path == '/wp-login.php':
+            return self.send(200, login_page().encode())
+        if not self.logged_in():
+            return self.redirect(f'/wp-login.php?redirect_to={quote(self.path)}')
+        if url.path == '/wp-admin/post.php' and query.get('post'):
+            post_id = int(query['post'])
+            status = self.state.products.setdefault(post_id, 'draft')
+            html = edit_page(post_id, status, query.get('message'), self.headers.get('Host', ''),
+                             post_id in self.state.block_editor)
+            return self.send(200, html.encode())
+        if url.path == '/wp-admin/edit.php':
+            return self.edit_list(url)
+        if url.path.startswith('/wp-admin'):
+            return self.send(200, b'<html><body><h1>Dashboard</h1></body></html>')
+        return self.send(404, b'not found')
+
+    def edit_list(self, url):
+        """``edit.php?post_type=product``: list table, bulk edit submits back here as GET."""
+        query = parse_qs(url.query)
+        status = query.get('post_status', ['all'])[-1]
+        paged = max(1, int(query.get('paged', ['1'])[-1] or 1))
+        if 'bulk_edit' in query:
+            if query.get('_wpnonce', [''])[-1] != NONCE:
+                return self.send(403, b'<html><body id="error-page">The link you followed has expired.</body></html>')
+            new_status = query.get('_status', ['-1'])[-1]
+            updated = 0
+            for post_id in map(int, query.get('post[]', [])):
+                if post_id in self.state.locked or new_status == '-1':
+                    continue
+                self.state.set_status(post_id, new_status)
+                updated += 1
+            return self.redirect(f'/wp-admin/edit.php?post_type=product&post_status={status}&paged={paged}'
+                                 f'&updated={updated}')
+        rows = sorted((post_id, product_status) for post_id, product_status in self.state.products.items()
+                      if status == 'all' or product_status == status)
+        if query.get('orderby', [''])[-1] == 'modified':
+            rows.sort(key=lambda row: self.state.modified.get(row[0], 0),
+                      reverse=query.get('order', [''])[-1] == 'desc')
+        per_page = self.state.per_page
+        rows = rows[(paged - 1) * per_page:paged * per_page]
+        html = list_page(rows, status, paged, per_page, query.get('updated', [None])[-1])
+        return self.send(200, html.encode())
+
+    def send_json(self, status: int, payload):
+        self.send(status, json.dumps(payload).encode(), 'application/json')
+
+    def wc_authorized(self, query: Dict[str, str]) -> bool:
+        if 'oauth_signature' in query:
+            return self.oauth_authorized(query)
+        if not self.state.https:
+            # WooCommerce only reads basic auth and query keys over SSL
+            return False
+        auth = self.headers.get('Authorization', '')
+        if auth.startswith('Basic '):
+            key, _, secret = base64.b64decode(auth[6:]).decode().partition(':')
+        else:
+            key, secret = query.get('consumer_key'), query.get('consumer_secret')
+        return (key, secret) == (CONSUMER_KEY, CONSUMER_SECRET)
+
+    def oauth_authorized(self, query: Dict[str, str]) -> bool:
+        """``WC_REST_Authentication::check_oauth_signature`` for HMAC-SHA1/SHA256 signatures."""
+        params = dict(query)
+        signature = params.pop('oauth_signature')
+        algorithm = {'HMAC-SHA1': hashlib.sha1, 'HMAC-SHA256': hashlib.sha256}.get(params.get('oauth_signature_method'))
+        if params.get('oauth_consumer_key') != CONSUMER_KEY or algorithm is None:
+            return False
+        if abs(time.time() - int(params.get('oauth_timestamp') or 0)) > 15 * 60:
+            return False
+        url = f"http://{self.headers.get('Host', '')}{urlparse(self.path).path}"
+        normalized = '%26'.join(f"{quote(k, safe='')}%3D{quote(v, safe='')}" for k, v in sorted(params.items()))
+        string_to_sign = f"{self.command}&{quote(url, safe='')}&{normalized}"
+        expected = base64.b64encode(hmac.new(f'{CONSUMER_SECRET}&'.encode(), string_to_sign.encode(), algorithm).digest())
+        return hmac.compare_digest(expected.decode(), signature)
+
+    def wc_batch(self, query: Dict[str, str]):
+        """``POST /wp-json/wc/v3/products/batch`` with WooCommerce's limit and per-item errors."""
+        if self.state.rest_html:
+            return self.send(200, b'<html><body><h1>Briefly unavailable for scheduled maintenance.</h1></body></html>')
+        if not self.wc_authorized(query):
+            return self.send_json(401, {'code': 'woocommerce_rest_cannot_edit',
+                                        'message': 'Sorry, you are not allowed to edit this resource.',
+                                        'data': {'status': 401}})
+        length = int(self.headers.get('Content-Length') or 0)
+        updates = json.loads(self.rfile.read(length) or b'{}').get('update', [])
+        if len(updates) > WC_BATCH_LIMIT:
+            return self.send_json(413, {'code': 'rest_request_entity_too_large',
+                                        'message': f'Unable to accept more than {WC_BATCH_LIMIT} items for this request.',
+                                        'data': {'status': 413}})
+        results = []
+        for update in updates:
+            post_id = int(update.get('id') or 0)
+            if not post_id or post_id in self.state.missing:
+                results.append({'id': post_id, 'error': {'code': 'woocommerce_rest_product_invalid_id',
+                                                         'message': 'Invalid ID.', 'data': {'status': 400}}})
+                continue
+            self.state.set_status(post_id, update.get('status') or self.state.products.setdefault(post_id, 'draft'))
+            results.append({'id': post_id, 'status': self.state.products[post_id], 'name': f'Product {post_id}'})
+        return self.send_json(200, {'update': results})
+
+    def update_history(self, history_id: int):
+        """DOMAIN_API's ``POST /api/update_history/{id}`` with ``{"is_clicked_submit": status}``."""
+        length = int(self.headers.get('Content-Length') or 0)
+        status = json.loads(self.rfile.read(length) or b'{}').get('is_clicked_submit')
+        with self.state.lock:
+            self.state.history[history_id] = status
+            self.state.status_updates += 1
+        return self.send_json(200, {'response': {'data': {'id': history_id, 'is_clicked_submit': status}}})
+
+    def update_histories(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        histories = json.loads(self.rfile.read(length) or b'{}').get('histories', [])
+        with self.state.lock:
+            for history in histories:
+                self.state.history[int(history['id'])] = history.get('is_clicked_submit')
+            self.state.status_updates += 1
+        return self.send_json(200, {'response': {'data': histories}})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == '/wp-json/wc/v3/products/batch':
+            return self.wc_batch({key: values[-1] for key, values in parse_qs(url.query).items()})
+        if url.path == '/api/update_histories':
+            return self.update_histories()
+        if url.path.startswith('/api/update_history/'):
+            return self.update_history(int(url.path.rsplit('/', 1)[-1]))
+        form = self.read_form()
+        if url.path == '/wp-login.php':
+            if form.get('log') and form.get('pwd'):
+                with self.state.lock:
+                    self.state.logins += 1
+                return self.redirect('/wp-admin/', {'Set-Cookie': f'{SESSION_COOKIE}={self.state.session}; Path=/'})
+            return self.send(200, login_page().encode())
+        if not self.logged_in():
+            return self.send(403, b'forbidden')
+        if url.path == '/wp-admin/edit.php' and form.get('wp_screen_options[option]') == 'edit_product_per_page':
+            self.state.per_page = max(1, min(999, int(form.get('wp_screen_options[value]') or 20)))
+            return self.redirect('/wp-admin/edit.php?post_type=product')
+        if url.path == '/wp-admin/post.php' and form.get('action') == 'editpost':
+            if form.get('_wpnonce') != NONCE:
+                return self.send(403, b'<html><body id="error-page">The link you followed has expired.</body></html>')
+            post_id = int(form['post_ID'])
+            message = '1'
+            if 'publish' in form:
+                self.state.set_status(post_id, 'publish')
+                message = '6'
+            return self.redirect(f'/wp-admin/post.php?post={post_id}&action=edit&message={message}')
+        return self.send(404, b'not found')
+
+
+def start_standin(port: int = 0, latency: float = 0.0,
+                  state: Optional[StandinState] = None) -> Tuple[ThreadingHTTPServer, str, StandinState]:
+    """Serve the stand-in on 127.0.0.1 from a daemon thread, returns (server, base_url, state)."""
+    state = state or StandinState(latency=latency)
+    handler = type('BoundStandinHandler', (StandinHandler,), {'state': state})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}', state
+
+
+if __name__ == '__main__':
+    server, base_url, _ = start_standin(int(sys.argv[1]) if len(sys.argv) > 1 else 8080)
+    print(f"wp-admin stand-in on {base_url}/wp-admin/ (any username/password logs in)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
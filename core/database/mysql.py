@@ -3,10 +3,10 @@ from pathlib import Path
 from typing import Optional, Dict, Any, Union
 from dotenv import load_dotenv
 import aiomysql
-import pymysql
 
 from ..configs import settings
 from ..logger import logger
+from .pool_registry import db_pools
 
 class MySQLConnector:
     """Asynchronous MySQL database connector using aiomysql."""
@@ -101,30 +101,14 @@ class MySQLConnector:
             if not db_name:
                 raise ValueError("Database name must be provided either as parameter or in .env as MYSQL_DB")
 
-        try:
-            # Create a connection pool
-            self.pool = await aiomysql.create_pool(
-                **self._connection_params,
-                db=db_name,
-                autocommit=True
-            )
-
-            # Get a connection from the pool to test it
-            async with self.pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    await cursor.execute("SELECT 1")
-                    result = await cursor.fetchone()
-                    if result and result[0] == 1:
-                        logger.info(f"Successfully connected to MySQL database: {db_name}")
-                    else:
-                        raise ConnectionError("Failed to verify MySQL connection")
-
-            return self.pool
-
-        except (pymysql.err.OperationalError, pymysql.err.InternalError) as e:
-            error_msg = f"Failed to connect to MySQL: {str(e)}"
-            logger.error(error_msg)
-            raise ConnectionError(error_msg)
+        # The pool for this DSN is shared by the whole process, created and
+        # checked with SELECT 1 on first use only
+        self.pool = await db_pools.acquire(
+            **self._connection_params,
+            db=db_name,
+            autocommit=True
+        )
+        return self.pool
 
     async def execute_query(self, query: str, params: Optional[tuple] = None) -> Any:
         """
@@ -185,8 +169,7 @@ class MySQLConnector:
     async def close(self) -> None:
         """Close the MySQL connection pool asynchronously."""
         if self.pool:
-            self.pool.close()
-            await self.pool.wait_closed()
+            await db_pools.close_pool(self.pool)
             logger.info("MySQL connection closed")
             self.pool = None
 
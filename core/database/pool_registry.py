@@ -0,0 +1,220 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Hashable, Optional
+
+import aiomysql
+import pymysql
+
+from ..logger import logger
+from ..services.metrics import metrics
+
+
+class PoolRegistry:
+    """
+    LRU registry of aiomysql pools keyed by connection parameters.
+
+    At most ``max_pools`` pools stay open; opening one more closes the least
+    recently used pool that has no connection checked out. Pools unused for
+    ``idle_timeout`` seconds are closed on the next acquire, so a worker that
+    cycles through hundreds of stores keeps only the recent ones connected.
+    ``0`` disables either limit, pools then live until ``close()``.
+
+    Pools are opened outside the registry lock, one opener per key; other
+    callers for the same key wait for it, the rest carry on, so an
+    unreachable database does not hold up checkouts for every other store.
+
+    ``stats()`` publishes pools, connections and connections in use as
+    ``{name}.*`` gauges; connections still checked out when a pool closes
+    are reported as leaks.
+
+    Example:
+        >>> async with store_pools.connection(host='db', port=3306, user='wp', password='...', db='shop') as conn:
+        ...     async with conn.cursor() as cursor:
+        ...         await cursor.execute("SELECT 1")
+    """
+
+    def __init__(self, max_pools: int = 32, idle_timeout: float = 300, pool_size: int = 2, name: str = 'db_pools'):
+        self.name = name
+        self.max_pools = max_pools
+        self.idle_timeout = idle_timeout
+        self.pool_size = pool_size
+        self._pools: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        # Created on first use: the registries are module-level and on Python < 3.10
+        # a lock made at import binds whatever loop is current then, not asyncio.run's
+        self._lock: Optional[asyncio.Lock] = None
+        # Pools being opened, outside the lock: key -> future of the error, None on success
+        self._creating: Dict[Hashable, asyncio.Future] = {}
+
+    def lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @staticmethod
+    def key(params: Dict[str, Any]) -> Hashable:
+        return tuple(sorted(params.items()))
+
+    async def acquire(self, **params) -> aiomysql.Pool:
+        """The pool for ``params``, created on first use; marks it as recently used."""
+        key = self.key(params)
+        while True:
+            async with self.lock():
+                await self._evict_idle()
+                entry = self._pools.get(key)
+                if entry is not None:
+                    self._pools.move_to_end(key)
+                    entry['last_used'] = time.monotonic()
+                    return entry['pool']
+                creating = self._creating.get(key)
+                if creating is None:
+                    creating = self._creating[key] = asyncio.get_running_loop().create_future()
+                    break
+            # Another task is opening this pool: wait for it, then take it from the registry
+            error = await asyncio.shield(creating)
+            if error is not None:
+                raise ConnectionError(str(error)) from error
+
+        # Opened outside the lock: an unreachable database only holds up its own callers
+        try:
+            pool = await self._create(params)
+        except BaseException as e:
+            self._creating.pop(key, None)
+            # A cancelled opener lets the waiters try themselves
+            creating.set_result(e if isinstance(e, Exception) else None)
+            raise
+        async with self.lock():
+            self._creating.pop(key, None)
+            if self.max_pools > 0:
+                await self._evict_lru(self.max_pools - 1)
+            self._pools[key] = {'pool': pool, 'in_use': 0, 'last_used': time.monotonic()}
+            metrics.incr(f'{self.name}.created')
+            metrics.gauge(f'{self.name}.open', len(self._pools))
+        creating.set_result(None)
+        return pool
+
+    async def _create(self, params: Dict[str, Any]) -> aiomysql.Pool:
+        """Open a pool and check it with ``SELECT 1``, closing it again if the check fails."""
+        pool = None
+        try:
+            pool = await aiomysql.create_pool(
+                minsize=0,
+                maxsize=self.pool_size,
+                connect_timeout=10,
+                pool_recycle=int(self.idle_timeout) if self.idle_timeout > 0 else -1,
+                **params,
+            )
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute("SELECT 1")
+        except (pymysql.err.OperationalError, pymysql.err.InternalError) as e:
+            await self._discard(pool)
+            error_msg = f"Failed to connect to MySQL {params.get('host')}/{params.get('db')}: {e}"
+            logger.error(error_msg)
+            raise ConnectionError(error_msg) from e
+        except BaseException:
+            await self._discard(pool)
+            raise
+        logger.info(f"Opened MySQL pool for {params.get('host')}/{params.get('db')}")
+        return pool
+
+    @staticmethod
+    async def _discard(pool: Optional[aiomysql.Pool]) -> None:
+        if pool is not None:
+            pool.close()
+            await pool.wait_closed()
+
+    @asynccontextmanager
+    async def connection(self, **params):
+        """Check out one connection; the pool is not evicted while it is in use."""
+        pool = await self.acquire(**params)
+        entry = self._pools[self.key(params)]
+        entry['in_use'] += 1
+        try:
+            async with pool.acquire() as conn:
+                yield conn
+        finally:
+            entry['in_use'] -= 1
+            entry['last_used'] = time.monotonic()
+
+    async def _evict_idle(self):
+        if self.idle_timeout <= 0:
+            return
+        now = time.monotonic()
+        for key, entry in list(self._pools.items()):
+            if not entry['in_use'] and now - entry['last_used'] >= self.idle_timeout:
+                await self._close(key)
+
+    async def _evict_lru(self, keep: int):
+        for key, entry in list(self._pools.items()):
+            if len(self._pools) <= keep:
+                break
+            if not entry['in_use']:
+                await self._close(key)
+
+    async def _close(self, key: Hashable):
+        entry = self._pools.pop(key)
+        pool = entry['pool']
+        leaked = pool.size - pool.freesize
+        if leaked:
+            params = dict(key)
+            logger.warning(f"Closing MySQL pool {params.get('host')}/{params.get('db')} with "
+                           f"{leaked} connections still checked out")
+            metrics.incr(f'{self.name}.leaked_connections', leaked)
+        pool.close()
+        await pool.wait_closed()
+        metrics.incr(f'{self.name}.closed')
+        metrics.gauge(f'{self.name}.open', len(self._pools))
+
+    async def close_pool(self, pool: aiomysql.Pool) -> None:
+        """Close one pool handed out by this registry."""
+        async with self.lock():
+            for key, entry in list(self._pools.items()):
+                if entry['pool'] is pool:
+                    await self._close(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Pools, connections and connections in use, also published as gauges."""
+        pools = [entry['pool'] for entry in self._pools.values()]
+        stats = {
+            'pools': len(pools),
+            'connections': sum(pool.size for pool in pools),
+            'in_use': sum(pool.size - pool.freesize for pool in pools),
+        }
+        for key, value in stats.items():
+            metrics.gauge(f'{self.name}.{key}', value)
+        exhausted = sum(1 for pool in pools if pool.size - pool.freesize >= pool.maxsize)
+        if exhausted:
+            logger.warning(f"{exhausted} MySQL pools ({self.name}) have every connection checked out, "
+                           f"a connection may be leaking")
+        return stats
+
+    async def close(self) -> None:
+        async with self.lock():
+            for key in list(self._pools):
+                try:
+                    await self._close(key)
+                except Exception as e:
+                    logger.warning(f"Failed to close MySQL pool: {e}")
+
+    def __len__(self) -> int:
+        return len(self._pools)
+
+
+# One pool per DSN of the worker's own database, open for the process lifetime
+db_pools = PoolRegistry(
+    max_pools=0,
+    idle_timeout=0,
+    pool_size=int(os.environ.get('MYSQL_POOL_SIZE', 10)),
+    name='db_pools',
+)
+
+# Pools to the stores' own WordPress databases, shared by everything in the process
+store_pools = PoolRegistry(
+    max_pools=int(os.environ.get('STORE_DB_MAX_POOLS', 32)),
+    idle_timeout=float(os.environ.get('STORE_DB_IDLE_TIMEOUT', 300)),
+    pool_size=int(os.environ.get('STORE_DB_POOL_SIZE', 2)),
+    name='store_db_pools',
+)
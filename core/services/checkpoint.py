@@ -0,0 +1,58 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ..logger import logger
+
+
+class Checkpoint:
+    """
+    Small on-disk record of items claimed but not finished yet.
+
+    Items are added when they move to PROCESSING and removed once they reach a
+    final status. The file is rewritten atomically on every change, so it is
+    accurate after a graceful drain as well as after a hard kill, and the next
+    start can resume exactly those items.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.claims: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Read the claims left by the previous run."""
+        if not self.path.is_file():
+            return {}
+        try:
+            self.claims = json.loads(self.path.read_text(encoding="utf-8")).get("claims", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            self.claims = {}
+        return dict(self.claims)
+
+    def claim(self, store_id: Any, history: Dict[str, Any]) -> None:
+        self.claims[str(history.get("id"))] = {
+            "store_id": store_id,
+            "id": history.get("id"),
+            "product_wp_id": history.get("product_wp_id"),
+            "claimed_at": time.time(),
+        }
+        self.save()
+
+    def release(self, history_id: Any) -> None:
+        if self.claims.pop(str(history_id), None) is not None:
+            self.save()
+
+    def by_store(self) -> Dict[Any, List[Dict[str, Any]]]:
+        grouped: Dict[Any, List[Dict[str, Any]]] = {}
+        for claim in self.claims.values():
+            grouped.setdefault(claim["store_id"], []).append(claim)
+        return grouped
+
+    def save(self) -> None:
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"saved_at": time.time(), "claims": self.claims}), encoding="utf-8")
+        os.replace(tmp_path, self.path)
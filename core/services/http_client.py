@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 
 import httpx
@@ -10,6 +11,11 @@ class HttpClient:
 
     This class provides methods for making HTTP requests with automatic
     logging, request ID generation, and consistent parameter handling.
+
+    By default every request gets its own client. With ``persistent=True`` one
+    ``httpx.AsyncClient`` is kept for the lifetime of the instance, so
+    connections are reused (keep-alive) until ``aclose()``; ``max_concurrency``
+    then bounds the requests in flight.
     """
 
     def __init__(
@@ -18,6 +24,11 @@ class HttpClient:
             default_connect_timeout: float = 10.0,
             default_retries: int = 3,
             use_http2: bool = True,
+            persistent: bool = False,
+            max_connections: int = 20,
+            max_keepalive_connections: int = 10,
+            keepalive_expiry: float = 30.0,
+            max_concurrency: Optional[int] = None,
     ):
         """
         Initialize the HTTP client with default configuration.
@@ -27,11 +38,40 @@ class HttpClient:
             default_connect_timeout: The maximum time allowed to establish a connection in seconds
             default_retries: Number of retries for failed requests
             use_http2: Whether to use HTTP/2 protocol
+            persistent: Keep one pooled client instead of a client per request
+            max_connections: Connection limit of the persistent client
+            max_keepalive_connections: Idle connections the persistent client keeps open
+            keepalive_expiry: Seconds an idle connection is kept open
+            max_concurrency: Requests in flight at once, None for no limit
+
+        The persistent client is created on the first request and keeps that
+        request's ``verify`` setting.
         """
         self.default_timeout = default_timeout
         self.default_connect_timeout = default_connect_timeout
         self.default_retries = default_retries
         self.use_http2 = use_http2
+        self.persistent = persistent
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_concurrency = max_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _build_client(self, verify: bool = True, limits: Optional[httpx.Limits] = None) -> httpx.AsyncClient:
+        timeout = httpx.Timeout(self.default_timeout, connect=self.default_connect_timeout)
+        options = {'limits': limits} if limits else {}
+        transport = httpx.AsyncHTTPTransport(retries=self.default_retries, verify=verify, **options)
+        return httpx.AsyncClient(timeout=timeout, transport=transport, http2=self.use_http2)
+
+    async def aclose(self) -> None:
+        """Close the persistent client and its connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def send(
             self,
@@ -64,10 +104,6 @@ class HttpClient:
         Returns:
             httpx.Response: The HTTP response
         """
-        # Set timeouts
-        timeout = httpx.Timeout(self.default_timeout, connect=self.default_connect_timeout)
-        transport = httpx.AsyncHTTPTransport(retries=self.default_retries, verify=verify)
-
         # Generate request ID and enrich headers
         request_id = str(uuid.uuid4())
         kwargs = {
@@ -84,14 +120,18 @@ class HttpClient:
         kwargs = {k: v for k, v in kwargs.items() if v is not None}
         kwargs = self._enrich_headers(kwargs, request_id)
 
-        async with httpx.AsyncClient(
-                timeout=timeout,
-                transport=transport,
-                http2=self.use_http2
-        ) as client:
-            response = await client.request(method, url, **kwargs)
-
-        return response
+        if not self.persistent:
+            async with self._build_client(verify) as client:
+                return await client.request(method, url, **kwargs)
+
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client(verify, self.limits)
+        if self.max_concurrency and self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self._semaphore is None:
+            return await self._client.request(method, url, **kwargs)
+        async with self._semaphore:
+            return await self._client.request(method, url, **kwargs)
 
     async def get(
             self,
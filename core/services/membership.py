@@ -0,0 +1,63 @@
+import json
+import os
+import socket
+import time
+from pathlib import Path
+from typing import List
+
+from ..logger import logger
+
+
+class FileMembershipRegistry:
+    """
+    Heartbeat-based worker membership stored as one small file per member.
+
+    Each live worker rewrites ``<directory>/<member_id>.json`` every heartbeat,
+    members whose heartbeat is older than ``ttl`` seconds are considered gone.
+    All workers of a host share the directory, so they agree on the member list
+    without any extra service.
+    """
+
+    def __init__(self, directory: str, member_id: str, ttl: float = 15.0):
+        self.directory = Path(directory)
+        self.member_id = member_id
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{self.member_id}.json"
+
+    def heartbeat(self) -> None:
+        """Announce this member, written atomically so readers never see half a file."""
+        payload = {
+            "member_id": self.member_id,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "heartbeat_at": time.time(),
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload))
+        os.replace(tmp_path, self.path)
+
+    def members(self) -> List[str]:
+        """Return the ids of members with a fresh heartbeat, always including this one."""
+        now = time.time()
+        alive = {self.member_id}
+        for path in self.directory.glob("*.json"):
+            try:
+                payload = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if now - payload.get("heartbeat_at", 0) <= self.ttl:
+                alive.add(payload.get("member_id", path.stem))
+        return sorted(alive)
+
+    def leave(self) -> None:
+        """Remove this member so the others rebalance without waiting for the ttl."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to leave membership registry: {e}")
@@ -0,0 +1,84 @@
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, Optional
+
+from ..logger import logger
+
+
+class Metrics:
+    """
+    Lightweight in-process metrics registry.
+
+    Counters keep a timestamped history so rates (per minute / per hour) can be
+    derived, timings keep a bounded window of samples for percentiles and gauges
+    hold the last reported value.
+    """
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.gauges: Dict[str, Any] = {}
+        self._events = defaultdict(lambda: deque(maxlen=self.window))
+        self._timings = defaultdict(lambda: deque(maxlen=self.window))
+
+    def incr(self, name: str, value: float = 1) -> None:
+        """Increment a counter and remember when it happened."""
+        self.counters[name] += value
+        self._events[name].append((time.time(), value))
+
+    def gauge(self, name: str, value: Any) -> None:
+        """Set a gauge to its latest value."""
+        self.gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a timing / size sample."""
+        self._timings[name].append(value)
+
+    def rate(self, name: str, per: float = 60.0, window: Optional[float] = None) -> float:
+        """
+        Rate of a counter over the recent window.
+
+        Args:
+            name: Counter name
+            per: Unit of the rate in seconds (60 = per minute, 3600 = per hour)
+            window: Look-back window in seconds, defaults to ``per``
+
+        Returns:
+            float: Counter increments per ``per`` seconds
+        """
+        window = window or per
+        since = time.time() - window
+        total = sum(value for ts, value in self._events[name] if ts >= since)
+        return total * per / window
+
+    def percentile(self, name: str, pct: float) -> Optional[float]:
+        samples = sorted(self._timings[name])
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def summary(self, name: str) -> Dict[str, Any]:
+        samples = self._timings[name]
+        if not samples:
+            return {"count": 0}
+        return {
+            "count": len(samples),
+            "avg": sum(samples) / len(samples),
+            "p50": self.percentile(name, 50),
+            "p99": self.percentile(name, 99),
+            "max": max(samples),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "timings": {name: self.summary(name) for name in list(self._timings)},
+        }
+
+    def log(self, prefix: str = "") -> None:
+        logger.info(f"{prefix}metrics: {self.snapshot()}")
+
+
+metrics = Metrics()
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from .metrics import metrics
+
+
+@dataclass
+class DomainState:
+    rate: float
+    next_at: float = 0.0
+    # Smoothed and fastest latency per request kind, a publish is not comparable to a page load
+    latencies: Dict[str, float] = field(default_factory=dict)
+    baselines: Dict[str, float] = field(default_factory=dict)
+
+
+def domain_key(domain: str) -> str:
+    return (urlparse(domain).hostname if '://' in domain else domain.split('/')[0]).lower()
+
+
+def is_timeout(error: BaseException) -> bool:
+    return isinstance(error, asyncio.TimeoutError) or 'Timeout' in type(error).__name__
+
+
+class DomainPacer:
+    """
+    AIMD request pacing per WordPress domain.
+
+    Every request to a domain waits for its slot, slots are ``1 / rate``
+    seconds apart. Each request that completes in time adds ``increase``
+    requests/s to the domain's rate; a 429, a 5xx, a timeout, an error or a
+    latency above ``latency_tolerance`` times the fastest latency seen for the
+    same ``kind`` of request multiplies the rate by ``decrease``. Latencies are
+    only compared within a kind: a page load, a form POST and a publish click
+    that waits for the editor to save take very different times on a healthy
+    host. ``Retry-After`` is honoured. Rates stay within
+    ``[min_rate, max_rate]`` and are published as ``pacer.{domain}.rate``.
+
+    Example:
+        >>> async with pacer.pace(store_domain, kind='navigation') as signal:
+        ...     response = await page.goto(url)
+        ...     signal['status'] = response.status
+    """
+
+    def __init__(self, initial_rate: float = 1.0, min_rate: float = 0.1, max_rate: float = 10.0,
+                 increase: float = 0.1, decrease: float = 0.5, latency_tolerance: float = 3.0,
+                 clock=time.monotonic):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.clock = clock
+        self._domains: Dict[str, DomainState] = {}
+
+    def state(self, domain: str) -> DomainState:
+        key = domain_key(domain)
+        if key not in self._domains:
+            self._domains[key] = DomainState(rate=self.initial_rate)
+        return self._domains[key]
+
+    def delay(self, domain: str) -> float:
+        """Reserve the next slot of ``domain`` and return how long to wait for it."""
+        state = self.state(domain)
+        now = self.clock()
+        slot = max(now, state.next_at)
+        state.next_at = slot + 1 / state.rate
+        return slot - now
+
+    async def wait(self, domain: str) -> None:
+        delay = self.delay(domain)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record(self, domain: str, latency: Optional[float] = None, status: Optional[int] = None,
+               timeout: bool = False, retry_after: Optional[float] = None, failed: bool = False,
+               kind: str = 'request') -> float:
+        """Feed one outcome back, returns the domain's new rate."""
+        state = self.state(domain)
+        congested = timeout or failed or status == 429 or (status is not None and status >= 500)
+        if latency is not None:
+            previous = state.latencies.get(kind)
+            state.latencies[kind] = latency if previous is None else 0.8 * previous + 0.2 * latency
+            # The baseline follows the fastest responses and drifts up slowly when the host gets slower
+            baseline = state.baselines.get(kind)
+            baseline = state.baselines[kind] = latency if baseline is None else min(latency, baseline * 1.01)
+            if latency > baseline * self.latency_tolerance:
+                congested = True
+
+        if congested:
+            state.rate = max(self.min_rate, state.rate * self.decrease)
+            metrics.incr('pacer.backoffs')
+        else:
+            state.rate = min(self.max_rate, state.rate + self.increase)
+        if retry_after:
+            state.next_at = max(state.next_at, self.clock() + retry_after)
+
+        metrics.gauge(f'pacer.{domain_key(domain)}.rate', round(state.rate, 3))
+        return state.rate
+
+    @asynccontextmanager
+    async def pace(self, domain: str, kind: str = 'request'):
+        """
+        Waits for a slot, times the block and records it; set ``status``/``retry_after`` on the yielded dict.
+
+        An exception raised by the block counts as a failure, a cancellation
+        (drain, store timeout) says nothing about the host and is not recorded.
+        """
+        await self.wait(domain)
+        signal = {'status': None, 'retry_after': None}
+        started = self.clock()
+        try:
+            yield signal
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            self.record(domain, status=signal['status'], timeout=is_timeout(e), failed=True, kind=kind)
+            raise
+        self.record(domain, self.clock() - started, signal['status'], retry_after=signal['retry_after'], kind=kind)
+
+    def rate(self, domain: str) -> float:
+        return self.state(domain).rate
+
+    def rates(self) -> Dict[str, float]:
+        """Current requests/s per domain."""
+        return {key: round(state.rate, 3) for key, state in self._domains.items()}
+
+
+def retry_after(headers) -> Optional[float]:
+    """Seconds from a ``Retry-After`` header given in seconds, None otherwise."""
+    value = (headers or {}).get('retry-after') or (headers or {}).get('Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+# Shared by every engine in the process so a domain is paced as a whole
+pacer = DomainPacer(
+    initial_rate=float(os.environ.get('PACER_INITIAL_RATE', 1.0)),
+    min_rate=float(os.environ.get('PACER_MIN_RATE', 0.1)),
+    max_rate=float(os.environ.get('PACER_MAX_RATE', 10.0)),
+    increase=float(os.environ.get('PACER_INCREASE', 0.1)),
+    decrease=float(os.environ.get('PACER_DECREASE', 0.5)),
+    latency_tolerance=float(os.environ.get('PACER_LATENCY_TOLERANCE', 3.0)),
+)
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import time
+from typing import Optional
+
+from ..logger import logger
+from .metrics import metrics
+from .redis_cache import RedisCache
+
+
+class AdaptivePoller:
+    """
+    Decides how long the worker loop waits before the next poll.
+
+    - a cycle that made progress re-polls after ``min_interval``, which is
+      never zero so a store that keeps failing cannot turn the loop into a
+      busy poll of ``/api/stores``
+    - cycles without progress back off exponentially from ``base_interval`` up to ``max_interval``
+    - ``wake()`` (called locally or from a push trigger) ends the current wait at once
+
+    Metrics:
+        poller.polls            counter, ``polls_per_hour`` derives the hourly rate
+        poller.interval         gauge of the current back-off in seconds
+        poller.enqueue_to_pickup_seconds
+                                time between a wake-up that announced work and
+                                the poll that picked it up
+    """
+
+    # Lowest wait between two polls, whatever min_interval is configured
+    MIN_FLOOR = 0.1
+
+    def __init__(
+            self,
+            base_interval: float = 3.0,
+            max_interval: float = 60.0,
+            min_interval: float = 1.0,
+            factor: float = 2.0,
+    ):
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.min_interval = max(self.MIN_FLOOR, min_interval)
+        self.factor = factor
+        self.interval = base_interval
+        self._wake = asyncio.Event()
+        self._announced_at: Optional[float] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def record(self, found_work: bool) -> float:
+        """
+        Feed back the outcome of a poll and compute the next wait.
+
+        ``found_work`` should mean progress (items published), not "something
+        is pending": items that stay pending because they keep failing must
+        let the poller back off.
+
+        Returns:
+            float: Seconds to wait before the next poll
+        """
+        metrics.incr("poller.polls")
+        if found_work:
+            if self._announced_at is not None:
+                metrics.observe("poller.enqueue_to_pickup_seconds", time.time() - self._announced_at)
+                self._announced_at = None
+            self.interval = self.min_interval
+        elif self.interval < self.base_interval:
+            self.interval = self.base_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.factor)
+
+        metrics.gauge("poller.interval", self.interval)
+        metrics.gauge("poller.polls_per_hour", self.polls_per_hour)
+        return self.interval
+
+    def observe_pickup(self, enqueued_at: Optional[float]) -> None:
+        """Record enqueue-to-pickup latency for work that carries its own timestamp."""
+        if enqueued_at:
+            metrics.observe("poller.enqueue_to_pickup_seconds", max(0.0, time.time() - enqueued_at))
+
+    @property
+    def polls_per_hour(self) -> float:
+        return metrics.rate("poller.polls", per=3600)
+
+    def wake(self, enqueued_at: Optional[float] = None) -> None:
+        if self._announced_at is None:
+            self._announced_at = enqueued_at or time.time()
+        self._wake.set()
+
+    async def wait(self) -> bool:
+        """
+        Sleep for the current interval unless woken earlier.
+
+        Returns:
+            bool: True if the wait ended because of a wake-up
+        """
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            woken = True
+        except asyncio.TimeoutError:
+            woken = False
+        self._wake.clear()
+        if woken:
+            self.interval = self.min_interval
+            metrics.incr("poller.wakeups")
+        return woken
+
+    def listen(self, cache: RedisCache, channel: str) -> asyncio.Task:
+        """Wake the poller whenever a message is published on ``channel``."""
+        self._listener = asyncio.create_task(self._listen(cache, channel))
+        return self._listener
+
+    async def _listen(self, cache: RedisCache, channel: str):
+        while True:
+            try:
+                pubsub = await cache.subscribe(channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    self.wake(self._parse_enqueued_at(message.get("data")))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Wake-up listener on {channel} failed, retrying: {e}")
+                await asyncio.sleep(self.base_interval)
+
+    @staticmethod
+    def _parse_enqueued_at(data) -> Optional[float]:
+        try:
+            return float(json.loads(data).get("enqueued_at"))
+        except (TypeError, ValueError, AttributeError):
+            return None
+
+    async def close(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+
+
+async def announce_work(cache: RedisCache, channel: str, **payload) -> None:
+    """Publish a wake-up for pollers listening on ``channel``."""
+    payload.setdefault("enqueued_at", time.time())
+    await cache.publish(channel, json.dumps(payload, default=str))
@@ -43,3 +43,15 @@ class RedisCache:
         if self.redis is None:
             await self.initialize()
         await self.redis.delete(key)
+
+    async def publish(self, channel: str, message: Any):
+        if self.redis is None:
+            await self.initialize()
+        return await self.redis.publish(channel, message)
+
+    async def subscribe(self, channel: str):
+        if self.redis is None:
+            await self.initialize()
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(channel)
+        return pubsub
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from ..logger import logger
+from .metrics import metrics
+
+# Receives ``{key: value}``, returns the entries that failed (None or {} when all were written)
+SendCallable = Callable[[Dict[Hashable, Any]], Awaitable[Optional[Dict[Hashable, Any]]]]
+
+
+class StatusJournal:
+    """
+    Append-only local journal of status changes, drained to a remote store in the background.
+
+    ``record()`` appends ``{"seq", "key", "value", "ts"}`` as one JSON line and
+    returns once the line is on disk. Lines written within ``fsync_interval``
+    share one fsync (group commit), so the caller waits for the local disk and
+    never for the remote side. A drain task sends the pending entries to
+    ``send`` in batches of ``batch_size``, writes an ``{"ack"}`` line for every
+    entry that went through and backs off up to ``max_backoff`` seconds while
+    the remote side fails. Only the latest value per key is sent.
+
+    On ``open()`` the file is replayed: entries without an ack are pending
+    again and are drained first. Once the file is larger than
+    ``compact_bytes`` it is rewritten with only the pending entries.
+
+    Example:
+        >>> journal = StatusJournal('/var/lib/worker-wp/journal/0.jsonl')
+        >>> await journal.open(service.send_statuses)
+        >>> await journal.record(history_id, SUCCESS)
+        >>> await journal.close()
+    """
+
+    def __init__(self, path: str, fsync_interval: float = 0.05, batch_size: int = 100,
+                 drain_interval: float = 1.0, max_backoff: float = 60.0, compact_bytes: int = 1024 * 1024,
+                 name: str = 'status_journal'):
+        self.path = Path(path)
+        self.fsync_interval = fsync_interval
+        self.batch_size = max(1, batch_size)
+        self.drain_interval = drain_interval
+        self.max_backoff = max_backoff
+        self.compact_bytes = compact_bytes
+        self.name = name
+        # key -> (seq, value, ts) of the latest entry not acknowledged yet
+        self.pending: Dict[Hashable, Tuple[int, Any, float]] = {}
+        self.seq = 0
+        # Lines of the file that no longer matter: acks and the entries they or newer values replaced
+        self.dead_lines = 0
+        self._send: Optional[SendCallable] = None
+        self._file = None
+        self._io_lock = asyncio.Lock()
+        self._synced: Optional[asyncio.Future] = None
+        # The loop only keeps weak references to tasks, a pending fsync must not be collected
+        self._fsync_task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._drain_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    async def open(self, send: SendCallable) -> None:
+        """Replays the journal and starts draining it to ``send``."""
+        self._send = send
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.replay()
+        self._file = self.path.open('a', encoding='utf-8')
+        if self.pending:
+            logger.info(f"{self.name}: {len(self.pending)} status changes from the previous run are pending")
+            self._wake.set()
+        self._publish_gauges()
+        self._drain_task = asyncio.create_task(self._drain_loop())
+
+    def replay(self) -> None:
+        self.pending.clear()
+        if not self.path.is_file():
+            return
+        with self.path.open(encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write, it was never acknowledged to the caller
+                    logger.warning(f"{self.name}: skipping unreadable line {number} of {self.path}")
+                    continue
+                self.seq = max(self.seq, entry['seq'])
+                self.dead_lines += 1
+                if 'ack' in entry:
+                    if self.pending.get(entry['key'], (None,))[0] == entry['seq']:
+                        del self.pending[entry['key']]
+                else:
+                    self.pending[entry['key']] = (entry['seq'], entry['value'], entry.get('ts', 0.0))
+        self.dead_lines -= len(self.pending)
+
+    async def record(self, key: Hashable, value: Any) -> None:
+        """Journals ``value`` for ``key`` and waits until it is on disk."""
+        self.seq += 1
+        now = time.time()
+        self._write({'seq': self.seq, 'key': key, 'value': value, 'ts': round(now, 3)})
+        if key in self.pending:
+            self.dead_lines += 1
+        self.pending[key] = (self.seq, value, now)
+        metrics.incr(f'{self.name}.recorded')
+        await self._sync()
+        if len(self.pending) >= self.batch_size:
+            self._wake.set()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Latest journaled value of ``key`` that the remote side has not acknowledged yet."""
+        entry = self.pending.get(key)
+        return entry[1] if entry else default
+
+    def overlay(self, rows: Iterable[Dict[str, Any]], field: str, key: str = 'id') -> None:
+        """Replaces ``row[field]`` with the pending value of ``row[key]``, the remote copy may be behind."""
+        for row in rows:
+            entry = self.pending.get(row.get(key))
+            if entry:
+                row[field] = entry[1]
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry) + '\n')
+
+    async def _sync(self) -> None:
+        """Group commit: every writer waiting within ``fsync_interval`` shares one fsync."""
+        if self._synced is None:
+            self._synced = asyncio.get_running_loop().create_future()
+            asyncio.get_running_loop().call_later(self.fsync_interval, self._start_fsync)
+        await asyncio.shield(self._synced)
+
+    def _start_fsync(self) -> None:
+        self._fsync_task = asyncio.create_task(self._fsync())
+
+    async def _fsync(self) -> None:
+        synced, self._synced = self._synced, None
+        if synced is None or self._file is None:
+            return
+        started = time.monotonic()
+        try:
+            async with self._io_lock:
+                self._file.flush()
+                await asyncio.to_thread(os.fsync, self._file.fileno())
+            synced.set_result(None)
+        except Exception as e:
+            synced.set_exception(e)
+        metrics.incr(f'{self.name}.fsyncs')
+        metrics.observe(f'{self.name}.fsync_seconds', time.monotonic() - started)
+
+    async def _drain_loop(self) -> None:
+        backoff = self.drain_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                drained = await self.drain()
+            except Exception as e:
+                # Writing acks or compacting failed (disk full, file gone): keep the loop alive and retry
+                logger.exception(f"{self.name}: drain failed: {e}")
+                metrics.incr(f'{self.name}.drain_errors')
+                drained = False
+            if drained:
+                backoff = self.drain_interval
+            else:
+                backoff = min(self.max_backoff, max(backoff, self.drain_interval) * 2)
+                logger.warning(f"{self.name}: {len(self.pending)} status changes pending, retrying in {backoff:.1f}s")
+
+    async def drain(self) -> bool:
+        """Sends everything pending once, returns False when a batch failed."""
+        ok = True
+        while self.pending and ok:
+            batch = dict(list(self.pending.items())[:self.batch_size])
+            started = time.monotonic()
+            try:
+                failed = await self._send({key: entry[1] for key, entry in batch.items()}) or {}
+            except Exception as e:
+                logger.warning(f"{self.name}: sending {len(batch)} status changes failed: {e}")
+                failed = batch
+            metrics.observe(f'{self.name}.send_seconds', time.monotonic() - started)
+            ok = not failed
+            acked = [key for key in batch if key not in failed and self.pending.get(key, (None,))[0] == batch[key][0]]
+            for key in acked:
+                self._write({'seq': batch[key][0], 'key': key, 'ack': True})
+                del self.pending[key]
+            self.dead_lines += 2 * len(acked)
+            metrics.incr(f'{self.name}.acked', len(acked))
+            if failed:
+                metrics.incr(f'{self.name}.failures', len(failed))
+            if acked:
+                # Acks need no fsync of their own: a lost ack only means the entry is sent again
+                self._file.flush()
+        self._publish_gauges()
+        if self.dead_lines and self.path.stat().st_size > self.compact_bytes:
+            await self.compact()
+        return ok
+
+    async def compact(self) -> None:
+        """Rewrites the journal with only the pending entries."""
+        async with self._io_lock:
+            tmp_path = self.path.with_suffix('.tmp')
+            with tmp_path.open('w', encoding='utf-8') as f:
+                for key, (seq, value, ts) in sorted(self.pending.items(), key=lambda item: item[1][0]):
+                    f.write(json.dumps({'seq': seq, 'key': key, 'value': value, 'ts': round(ts, 3)}) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp_path, self.path)
+            self._file = self.path.open('a', encoding='utf-8')
+            self.dead_lines = 0
+        metrics.incr(f'{self.name}.compactions')
+
+    def _publish_gauges(self) -> None:
+        metrics.gauge(f'{self.name}.pending', len(self.pending))
+        oldest = min((entry[2] for entry in self.pending.values()), default=None)
+        metrics.gauge(f'{self.name}.lag_seconds', round(time.time() - oldest, 1) if oldest else 0)
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Stops draining after one last attempt of up to ``timeout`` seconds; what is left stays journaled."""
+        if self._drain_task:
+            self._drain_task.cancel()
+            await asyncio.gather(self._drain_task, return_exceptions=True)
+        if self._file is None:
+            return
+        try:
+            await asyncio.wait_for(self.drain(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        if self._synced is not None:
+            await self._fsync()
+        async with self._io_lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+        if self.pending:
+            logger.warning(f"{self.name}: {len(self.pending)} status changes left in {self.path} for the next start")
@@ -0,0 +1,257 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..logger import logger
+from .metrics import metrics
+from .redis_cache import RedisCache
+
+# Delete the lock only if this refresher still holds it
+# KEYS[1] = lock key, ARGV[1] = token
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Store fields that never go to the shared Redis, each worker keeps them in memory
+SECRET_FIELDS = ('username_login', 'password_login', 'api_key', 'secret_key', 'db_username', 'db_password')
+
+
+def strip_secrets(row: Dict[str, Any], fields=SECRET_FIELDS) -> Dict[str, Any]:
+    """``row`` without its credentials, what may be written to the shared Redis."""
+    return {field: value for field, value in row.items() if field not in fields}
+
+
+class StoreSecrets:
+    """
+    Store credentials of this process, from its own ``/api/stores`` fetches.
+
+    ``with_secrets`` puts them back into rows read from the shared Redis. It
+    fetches again when they are older than ``ttl``, or when a row has none
+    and the last fetch is older than ``retry_after``; rows still without
+    credentials are dropped.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[List[Dict[str, Any]]]], fields=SECRET_FIELDS,
+                 ttl: float = 300.0, retry_after: float = 3.0):
+        self.fetch = fetch
+        self.fields = tuple(fields)
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._secrets: Dict[Any, Dict[str, Any]] = {}
+        self._fetched_at: Optional[float] = None
+        self._loading: Optional[asyncio.Task] = None
+
+    def remember(self, stores: List[Dict[str, Any]]) -> None:
+        """Keeps the credentials of a full store list this process fetched."""
+        self._secrets = {row["id"]: {field: row.get(field) for field in self.fields} for row in stores}
+        self._fetched_at = time.monotonic()
+
+    async def with_secrets(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """``rows`` with this process's credentials put back, rows without any are dropped."""
+        age = time.monotonic() - self._fetched_at if self._fetched_at is not None else None
+        missing = any(row["id"] not in self._secrets for row in rows)
+        # A store missing from the last fetch is looked for again at most once per retry_after
+        if age is None or age >= self.ttl or (missing and age >= self.retry_after):
+            try:
+                await self._load()
+            except Exception as e:
+                logger.warning(f"Store credentials refresh failed: {e}")
+                metrics.incr("store_cache.secret_errors")
+        known = [{**row, **self._secrets[row["id"]]} for row in rows if row["id"] in self._secrets]
+        if len(known) < len(rows):
+            logger.warning(f"Skipping {len(rows) - len(known)} stores without credentials")
+        return known
+
+    async def _load(self) -> None:
+        if self._loading is None or self._loading.done():
+            self._loading = asyncio.create_task(self.fetch())
+        self.remember(await asyncio.shield(self._loading))
+        metrics.incr("store_cache.secret_fetches")
+
+
+class StoreListCache:
+    """
+    ``/api/stores`` shared by every worker process through Redis.
+
+    A snapshot is one hash of ``store id -> row JSON`` plus a JSON index of
+    the ids, both under a version number; ``{prefix}:meta`` points at the
+    current version and its fetch time. Readers load the index, keep the ids
+    ``select`` accepts (the stores the worker owns) and ``HMGET`` only those
+    rows, so each worker deserializes just its own shard.
+
+    Freshness:
+        - younger than ``ttl``: served from Redis
+        - younger than ``stale_ttl``: served from Redis while one worker
+          refreshes it in the background (stale-while-revalidate)
+        - older or missing: the caller waits for a refresh
+
+    Refreshes are single-flight: within a process concurrent callers share
+    one task, across processes one worker wins a ``lock_ttl`` lock
+    (``SET NX PX``) and the others keep serving the snapshot they have, or
+    wait up to ``lock_ttl`` for the winner's snapshot when there is none.
+    If the lock holder disappears they fetch themselves.
+
+    Rows are cached without ``secret_fields``: ``secrets`` (a
+    ``StoreSecrets``) keeps the credentials of this process's own fetches in
+    memory and puts them back into the rows it reads.
+
+    A snapshot may predate this process's own publishes: statuses passed to
+    ``record_status`` replace the snapshot's ``is_clicked_submit`` for
+    ``stale_ttl + lock_ttl`` seconds, the longest a served snapshot lags.
+
+    Example:
+        >>> cache = StoreListCache(RedisCache(), store_service.require_list_stores, ttl=3)
+        >>> stores = await cache.get(select=lambda store_id: store_id % total == index)
+    """
+
+    def __init__(self, cache: RedisCache, fetch: Callable[[], Awaitable[List[Dict[str, Any]]]],
+                 ttl: float = 3.0, stale_ttl: float = 60.0, lock_ttl: float = 10.0, name: str = "stores",
+                 secret_fields=SECRET_FIELDS, secrets_ttl: float = 300.0):
+        self.cache = cache
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.lock_ttl = lock_ttl
+        self.prefix = f"worker-wp:store-list:{name}"
+        self.meta_key = f"{self.prefix}:meta"
+        self.lock_key = f"{self.prefix}:lock"
+        self._refreshing: Optional[asyncio.Task] = None
+        self.secrets = StoreSecrets(fetch, secret_fields, ttl=secrets_ttl, retry_after=ttl)
+        # history id -> (monotonic time, status) of the changes this process made
+        self._statuses: Dict[Any, Tuple[float, int]] = {}
+
+    def rows_key(self, version: int) -> str:
+        return f"{self.prefix}:v{version}:rows"
+
+    def index_key(self, version: int) -> str:
+        return f"{self.prefix}:v{version}:index"
+
+    async def _redis(self):
+        await self.cache.initialize()
+        return self.cache.redis
+
+    async def meta(self) -> Optional[Dict[str, Any]]:
+        body = await (await self._redis()).get(self.meta_key)
+        return json.loads(body) if body else None
+
+    async def get(self, select: Optional[Callable[[int], bool]] = None) -> List[Dict[str, Any]]:
+        """Stores of the current snapshot, only those whose id ``select`` accepts when given."""
+        meta = await self.meta()
+        age = time.time() - meta["fetched_at"] if meta else None
+        if meta and age < self.ttl:
+            metrics.incr("store_cache.hits")
+        elif meta and age < self.stale_ttl:
+            metrics.incr("store_cache.stale_hits")
+            self._refresh_in_background()
+        else:
+            metrics.incr("store_cache.misses")
+            try:
+                meta = await self._refresh_or_wait() or meta
+            except Exception as e:
+                # Same as get_list_stores on an API error, but an expired snapshot beats none
+                logger.warning(f"Store list refresh failed: {e}")
+                metrics.incr("store_cache.errors")
+            if meta is None:
+                return []
+        rows = await self.secrets.with_secrets(await self.read(meta["version"], select))
+        self._overlay_statuses(rows)
+        return rows
+
+    async def read(self, version: int, select: Optional[Callable[[int], bool]] = None) -> List[Dict[str, Any]]:
+        redis = await self._redis()
+        ids = json.loads(await redis.get(self.index_key(version)) or "[]")
+        if select is not None:
+            ids = [store_id for store_id in ids if select(store_id)]
+        if not ids:
+            return []
+        started = time.monotonic()
+        rows = [json.loads(body) for body in await redis.hmget(self.rows_key(version), ids) if body]
+        metrics.observe("store_cache.parse_seconds", time.monotonic() - started)
+        metrics.gauge("store_cache.rows_read", len(rows))
+        return rows
+
+    def record_status(self, history_id: Any, status: int) -> None:
+        """Remembers a status this process wrote, served over the snapshot's until it catches up."""
+        self._statuses[history_id] = (time.monotonic(), status)
+
+    def _overlay_statuses(self, rows: List[Dict[str, Any]]) -> None:
+        expired = time.monotonic() - self.stale_ttl - self.lock_ttl
+        self._statuses = {history_id: entry for history_id, entry in self._statuses.items() if entry[0] > expired}
+        if not self._statuses:
+            return
+        for row in rows:
+            for history in row.get("history_listing") or []:
+                entry = self._statuses.get(history.get("id"))
+                if entry:
+                    history["is_clicked_submit"] = entry[1]
+
+    def _refresh_in_background(self) -> None:
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self._refresh())
+            self._refreshing.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Store list refresh failed: {task.exception()}")
+
+    async def _refresh_or_wait(self) -> Optional[Dict[str, Any]]:
+        """Waits for this process's refresh, or for the one another worker holds the lock for."""
+        deadline = time.monotonic() + self.lock_ttl
+        while True:
+            if self._refreshing is None or self._refreshing.done():
+                self._refreshing = asyncio.create_task(self._refresh())
+            meta = await asyncio.shield(self._refreshing)
+            if meta is not None:
+                return meta
+            # Another worker is refreshing, its snapshot shows up in meta
+            metrics.incr("store_cache.waits")
+            await asyncio.sleep(0.1)
+            meta = await self.meta()
+            if meta and time.time() - meta["fetched_at"] < self.stale_ttl:
+                return meta
+            if time.monotonic() > deadline:
+                logger.warning("Store list lock holder did not refresh in time, fetching directly")
+                return await self._refresh(force=True)
+
+    async def _refresh(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Fetches and publishes a new snapshot, None when another worker holds the lock."""
+        redis = await self._redis()
+        token = uuid.uuid4().hex
+        if not await redis.set(self.lock_key, token, nx=True, px=int(self.lock_ttl * 1000)) and not force:
+            return None
+        try:
+            # The previous holder may have finished while this worker waited for the lock
+            meta = await self.meta()
+            if meta and time.time() - meta["fetched_at"] < self.ttl and not force:
+                return meta
+            started = time.monotonic()
+            stores = await self.fetch()
+            metrics.incr("store_cache.refreshes")
+            metrics.observe("store_cache.fetch_seconds", time.monotonic() - started)
+            return await self.publish(stores)
+        finally:
+            await redis.eval(_RELEASE_SCRIPT, 1, self.lock_key, token)
+
+    async def publish(self, stores: List[Dict[str, Any]]) -> Dict[str, Any]:
+        self.secrets.remember(stores)
+        redis = await self._redis()
+        version = await redis.incr(f"{self.prefix}:version")
+        # Old versions stay readable for whoever is still reading them, then expire
+        expire = int(self.stale_ttl + self.lock_ttl) + 60
+        meta = {"version": version, "fetched_at": time.time(), "count": len(stores)}
+        pipe = redis.pipeline()
+        if stores:
+            rows = {str(row["id"]): json.dumps(strip_secrets(row, self.secrets.fields)) for row in stores}
+            pipe.hset(self.rows_key(version), mapping=rows)
+            pipe.expire(self.rows_key(version), expire)
+        pipe.set(self.index_key(version), json.dumps([row["id"] for row in stores]), ex=expire)
+        pipe.set(self.meta_key, json.dumps(meta), ex=expire)
+        await pipe.execute()
+        return meta
+
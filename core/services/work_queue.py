@@ -0,0 +1,253 @@
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from ..logger import logger
+from .redis_cache import RedisCache
+
+# Pop one id from a backlog and mark it in flight in a single step, so a worker
+# dying between the two can never lose an item.
+# KEYS[1] = backlog list, KEYS[2] = in-flight zset
+# ARGV[1] = "left" | "right", ARGV[2] = deadline, ARGV[3] = claim key prefix,
+# ARGV[4] = claim token, ARGV[5] = visibility timeout in ms
+_CLAIM_SCRIPT = """
+local item_id
+if ARGV[1] == 'left' then
+    item_id = redis.call('LPOP', KEYS[1])
+else
+    item_id = redis.call('RPOP', KEYS[1])
+end
+if not item_id then
+    return nil
+end
+redis.call('ZADD', KEYS[2], ARGV[2], item_id)
+redis.call('SET', ARGV[3] .. item_id, ARGV[4], 'PX', ARGV[5])
+return item_id
+"""
+
+# A claim is still held by ``token`` when the claim key carries it, or when the
+# key expired but the item was not requeued (it is still in the in-flight zset)
+_HOLDS_CLAIM = """
+local holder = redis.call('GET', KEYS[2])
+local held = holder == ARGV[2] or (not holder and redis.call('ZSCORE', KEYS[1], ARGV[1]))
+"""
+
+# Finish an item, only for the claim holder
+# KEYS[1] = in-flight zset, KEYS[2] = claim key, KEYS[3] = payload hash, KEYS[4] = queued set
+# ARGV[1] = item id, ARGV[2] = claim token
+_ACK_SCRIPT = _HOLDS_CLAIM + """
+if not held then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('DEL', KEYS[2])
+redis.call('HDEL', KEYS[3], ARGV[1])
+redis.call('SREM', KEYS[4], ARGV[1])
+return 1
+"""
+
+# Extend the visibility timeout, only for the claim holder
+# KEYS[1] = in-flight zset, KEYS[2] = claim key
+# ARGV[1] = item id, ARGV[2] = claim token, ARGV[3] = deadline, ARGV[4] = visibility timeout in ms
+_TOUCH_SCRIPT = _HOLDS_CLAIM + """
+if not held then
+    return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+redis.call('SET', KEYS[2], ARGV[2], 'PX', ARGV[4])
+return 1
+"""
+
+# Put an in-flight item back on its owner's backlog; an empty token releases
+# whatever claim there is (visibility timeout), otherwise only the holder's
+# KEYS[1] = in-flight zset, KEYS[2] = claim key, KEYS[3] = payload hash, KEYS[4] = queued set
+# ARGV[1] = item id, ARGV[2] = claim token or '', ARGV[3] = backlog key prefix
+_RELEASE_SCRIPT = _HOLDS_CLAIM + """
+if ARGV[2] ~= '' and not held then
+    return 0
+end
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('DEL', KEYS[2])
+local body = redis.call('HGET', KEYS[3], ARGV[1])
+local owner = body and cjson.decode(body).owner
+if owner then
+    redis.call('LPUSH', ARGV[3] .. owner, ARGV[1])
+else
+    redis.call('SREM', KEYS[4], ARGV[1])
+end
+return 1
+"""
+
+
+class WorkStealingQueue:
+    """
+    Redis-backed work queue shared by all worker processes.
+
+    Every member owns a backlog list. A producer pushes items to the backlog of
+    their preferred owner, members pop from the head of their own backlog and,
+    when it is empty, steal from the tail of the longest other backlog.
+
+    Guarantees:
+        - an item id is queued or in flight at most once (per-item exclusivity)
+        - a claimed item stays invisible until acked or its visibility timeout
+          expires, after which ``requeue_expired`` puts it back
+        - ``touch``/``ack``/``release`` take the claim's token and do nothing
+          for a worker whose claim was requeued and taken by someone else
+        - a member that disappears leaves its backlog stealable by the others
+
+    Any redis-compatible client works: point ``REDIS_HOST`` at a local
+    ``redis-server`` (or hand a ``RedisCache`` whose ``redis`` attribute is a
+    stand-in client) to exercise it without the shared instance.
+    """
+
+    def __init__(self, cache: RedisCache, name: str = "stores", visibility_timeout: float = 600.0):
+        self.cache = cache
+        self.visibility_timeout = visibility_timeout
+        self.prefix = f"worker-wp:queue:{name}"
+        self.members_key = f"{self.prefix}:members"
+        self.queued_key = f"{self.prefix}:queued"
+        self.payload_key = f"{self.prefix}:payload"
+        self.inflight_key = f"{self.prefix}:inflight"
+        self.claim_prefix = f"{self.prefix}:claim:"
+        self.producer_key = f"{self.prefix}:producer"
+
+    def backlog_key(self, member: str) -> str:
+        return f"{self.prefix}:backlog:{member}"
+
+    async def _redis(self):
+        await self.cache.initialize()
+        return self.cache.redis
+
+    async def enqueue(self, item_id: Any, payload: Dict[str, Any], owner: str) -> bool:
+        """
+        Queue an item on ``owner``'s backlog.
+
+        Returns:
+            bool: False if the item is already queued or in flight
+        """
+        redis = await self._redis()
+        item_id = str(item_id)
+        if not await redis.sadd(self.queued_key, item_id):
+            return False
+
+        body = json.dumps({"owner": owner, "enqueued_at": time.time(), "data": payload}, default=str)
+        pipe = redis.pipeline()
+        pipe.hset(self.payload_key, item_id, body)
+        pipe.sadd(self.members_key, owner)
+        pipe.rpush(self.backlog_key(owner), item_id)
+        await pipe.execute()
+        return True
+
+    async def claim(self, member: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim the next item for ``member``, stealing from another backlog if needed.
+
+        Returns:
+            dict: ``{"id", "token", "owner", "enqueued_at", "data", "stolen"}`` or
+            None when every backlog is empty
+        """
+        redis = await self._redis()
+        await redis.sadd(self.members_key, member)
+
+        token = f"{member}:{uuid.uuid4().hex}"
+        item_id = await self._claim_from(redis, self.backlog_key(member), "left", token)
+        stolen = False
+        if item_id is None:
+            for victim in await self._steal_order(redis, member):
+                item_id = await self._claim_from(redis, self.backlog_key(victim), "right", token)
+                if item_id is not None:
+                    stolen = True
+                    break
+
+        if item_id is None:
+            return None
+
+        body = await redis.hget(self.payload_key, item_id)
+        if body is None:
+            # Payload vanished (acked elsewhere), drop the stray id
+            await self.ack(item_id, token)
+            return None
+
+        item = json.loads(body)
+        item["id"] = item_id
+        item["token"] = token
+        item["stolen"] = stolen
+        if stolen:
+            logger.info(f"Member {member} stole item {item_id} from {item.get('owner')}")
+        return item
+
+    async def _claim_from(self, redis, backlog_key: str, side: str, token: str) -> Optional[str]:
+        deadline = time.time() + self.visibility_timeout
+        return await redis.eval(
+            _CLAIM_SCRIPT, 2, backlog_key, self.inflight_key,
+            side, deadline, self.claim_prefix, token, int(self.visibility_timeout * 1000),
+        )
+
+    async def _steal_order(self, redis, member: str) -> List[str]:
+        """Other members ordered by backlog length, longest first."""
+        victims = [m for m in await redis.smembers(self.members_key) if m != member]
+        lengths = []
+        for victim in victims:
+            length = await redis.llen(self.backlog_key(victim))
+            if length:
+                lengths.append((length, victim))
+        return [victim for _, victim in sorted(lengths, reverse=True)]
+
+    async def touch(self, item_id: Any, token: str) -> bool:
+        """Extend the visibility timeout of an item still being worked on, False if the claim was lost."""
+        redis = await self._redis()
+        item_id = str(item_id)
+        return bool(await redis.eval(
+            _TOUCH_SCRIPT, 2, self.inflight_key, f"{self.claim_prefix}{item_id}",
+            item_id, token, time.time() + self.visibility_timeout, int(self.visibility_timeout * 1000),
+        ))
+
+    async def ack(self, item_id: Any, token: str) -> bool:
+        """Mark an item as done, it may be enqueued again afterwards. False if the claim was lost."""
+        redis = await self._redis()
+        item_id = str(item_id)
+        return bool(await redis.eval(
+            _ACK_SCRIPT, 4, self.inflight_key, f"{self.claim_prefix}{item_id}", self.payload_key, self.queued_key,
+            item_id, token,
+        ))
+
+    async def release(self, item_id: Any, token: str = "") -> bool:
+        """Give an in-flight item back to the head of its owner's backlog, any claim's without ``token``."""
+        redis = await self._redis()
+        item_id = str(item_id)
+        return bool(await redis.eval(
+            _RELEASE_SCRIPT, 4, self.inflight_key, f"{self.claim_prefix}{item_id}", self.payload_key,
+            self.queued_key, item_id, token, f"{self.prefix}:backlog:",
+        ))
+
+    async def requeue_expired(self) -> int:
+        """Put items whose visibility timeout expired back on their backlog."""
+        redis = await self._redis()
+        expired = await redis.zrangebyscore(self.inflight_key, "-inf", time.time())
+        requeued = 0
+        for item_id in expired:
+            if await self.release(item_id):
+                requeued += 1
+        if requeued:
+            logger.warning(f"Requeued {requeued} items after visibility timeout")
+        return requeued
+
+    async def try_become_producer(self, member: str, ttl: float = 30.0) -> bool:
+        """Elect a single producer through a short-lived lock it keeps renewing."""
+        redis = await self._redis()
+        if await redis.set(self.producer_key, member, nx=True, px=int(ttl * 1000)):
+            return True
+        if await redis.get(self.producer_key) == member:
+            await redis.pexpire(self.producer_key, int(ttl * 1000))
+            return True
+        return False
+
+    async def backlog_sizes(self) -> Dict[str, int]:
+        redis = await self._redis()
+        return {
+            member: await redis.llen(self.backlog_key(member))
+            for member in await redis.smembers(self.members_key)
+        }
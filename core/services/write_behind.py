@@ -0,0 +1,96 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from ..logger import logger
+from .metrics import metrics
+
+# Receives one batch, returns the entries that failed (None or {} when all were written)
+FlushCallable = Callable[[Dict[Hashable, Any]], Awaitable[Optional[Dict[Hashable, Any]]]]
+
+
+class WriteBehindBatcher:
+    """
+    Collects keyed writes in memory and hands them to ``flush`` in batches.
+
+    A write to a key that is still pending replaces the pending value (last
+    write wins), so a PROCESSING followed by a SUCCESS within one window is a
+    single write. A batch is flushed once ``max_batch`` keys are pending or
+    ``interval`` seconds after the first pending write. Entries of a failed
+    batch go back to the pending set unless a newer value arrived and are
+    retried on the next flush. ``close()`` must be awaited on shutdown.
+
+    Publishes ``{name}.received``, ``{name}.coalesced``, ``{name}.requests``,
+    ``{name}.failures`` and ``{name}.flush_seconds``.
+
+    Example:
+        >>> batcher = WriteBehindBatcher(send_statuses, max_batch=100, interval=1.0)
+        >>> await batcher.add(history_id, SUCCESS)
+        >>> await batcher.close()
+    """
+
+    def __init__(self, flush: FlushCallable, max_batch: int = 100, interval: float = 1.0,
+                 name: str = 'write_behind'):
+        self._flush = flush
+        self.max_batch = max(1, max_batch)
+        self.interval = interval
+        self.name = name
+        self._pending: Dict[Hashable, Any] = {}
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def add(self, key: Hashable, value: Any) -> None:
+        if self.closed:
+            raise RuntimeError(f"{self.name} is closed")
+        metrics.incr(f'{self.name}.received')
+        if key in self._pending:
+            metrics.incr(f'{self.name}.coalesced')
+        self._pending[key] = value
+        if len(self._pending) >= self.max_batch:
+            await self.flush()
+        else:
+            self._schedule()
+
+    def _schedule(self) -> None:
+        if self._pending and (self._timer is None or self._timer.done()):
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.interval)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self) -> bool:
+        """Writes everything pending, returns False when a batch failed and was kept for a retry."""
+        async with self._lock:
+            while self._pending:
+                keys = list(self._pending)[:self.max_batch]
+                batch = {key: self._pending.pop(key) for key in keys}
+                started = time.monotonic()
+                try:
+                    failed = await self._flush(batch)
+                except Exception as e:
+                    logger.warning(f"{self.name}: flushing {len(batch)} entries failed: {e}")
+                    failed = batch
+                metrics.incr(f'{self.name}.requests')
+                metrics.observe(f'{self.name}.flush_seconds', time.monotonic() - started)
+                if failed:
+                    metrics.incr(f'{self.name}.failures', len(failed))
+                    for key, value in failed.items():
+                        self._pending.setdefault(key, value)
+                    if not self.closed:
+                        self._schedule()
+                    return False
+        return True
+
+    async def close(self) -> None:
+        """Stops the timer and flushes what is pending, logging entries that could not be written."""
+        self.closed = True
+        if self._timer and not self._timer.done():
+            self._timer.cancel()
+        if not await self.flush():
+            logger.error(f"{self.name}: {len(self._pending)} entries could not be written on shutdown")
@@ -2,5 +2,8 @@ from .convertor import *
 from .validator import *
 from .datetime import *
 from .schemas import *
+from .hash_ring import *
+from .supervisor import *
+from .memory_watchdog import *
 from .logger import *
 from .run_process import *
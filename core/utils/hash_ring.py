@@ -0,0 +1,102 @@
+import bisect
+import hashlib
+from typing import Dict, Hashable, Iterable, List, Optional
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent-hash ring with virtual nodes.
+
+    Every node is placed ``vnodes`` times on the ring, a key belongs to the first
+    node clockwise from its hash. Adding or removing one node out of N only moves
+    about 1/N of the keys.
+
+    Example:
+        >>> ring = HashRing(["worker-a", "worker-b"])
+        >>> ring.get(42) in ("worker-a", "worker-b")
+        True
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 160):
+        self.vnodes = vnodes
+        self._nodes = set()
+        self._keys: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def add(self, node: str) -> None:
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for replica in range(self.vnodes):
+            point = _hash(f"{node}#{replica}")
+            self._owners[point] = node
+            bisect.insort(self._keys, point)
+
+    def remove(self, node: str) -> None:
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        for replica in range(self.vnodes):
+            point = _hash(f"{node}#{replica}")
+            if self._owners.get(point) == node:
+                del self._owners[point]
+                index = bisect.bisect_left(self._keys, point)
+                if index < len(self._keys) and self._keys[index] == point:
+                    self._keys.pop(index)
+
+    def set_nodes(self, nodes: Iterable[str]) -> bool:
+        """
+        Replace the membership of the ring.
+
+        Returns:
+            bool: True if the membership changed
+        """
+        nodes = set(nodes)
+        if nodes == self._nodes:
+            return False
+        for node in self._nodes - nodes:
+            self.remove(node)
+        for node in nodes - self._nodes:
+            self.add(node)
+        return True
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Return the node owning ``key`` or None for an empty ring."""
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(str(key))) % len(self._keys)
+        return self._owners[self._keys[index]]
+
+
+def rebalance_report(keys: Iterable[Hashable], before: HashRing, after: HashRing) -> Dict[str, float]:
+    """
+    Compare two rings over the same keys.
+
+    Returns:
+        dict: ``moved`` fraction of keys whose owner changed and ``skew`` as the
+        largest node load divided by the mean load on the ``after`` ring
+    """
+    keys = list(keys)
+    moved = 0
+    load: Dict[str, int] = {node: 0 for node in after.nodes}
+    for key in keys:
+        owner = after.get(key)
+        load[owner] += 1
+        if before.get(key) != owner:
+            moved += 1
+
+    mean = len(keys) / max(len(load), 1)
+    return {
+        "moved": moved / max(len(keys), 1),
+        "skew": max(load.values()) / mean if mean else 0.0,
+    }
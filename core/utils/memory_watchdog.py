@@ -0,0 +1,128 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+import psutil
+
+from ..logger import logger
+from ..services.metrics import metrics
+
+MB = 1024 * 1024
+
+
+class MemoryWatchdog:
+    """
+    Samples the RSS of the worker process and of every process it spawned.
+
+    The children are the browsers (Firefox and its content processes). Each
+    sample updates ``memory.worker_rss_mb`` / ``memory.browser_rss_mb`` and,
+    with ``timeline_path``, appends one JSON line per process so memory can be
+    plotted per pid over time. Consumers such as BrowserPool read
+    ``over_soft_at`` and ``over_hard`` to recycle contexts or restart the
+    browser.
+
+    ``over_soft_at`` only moves when the browser crosses ``soft_limit_mb``
+    from below, so every context is recycled once per crossing rather than
+    after every sample. If the browser is still above the soft limit
+    ``soft_cooldown`` seconds later, recycling did not help and ``over_hard``
+    is raised as if the hard limit was reached. The consumer calls
+    ``reset()`` once it restarted the browser.
+
+    Example:
+        >>> watchdog = MemoryWatchdog(soft_limit_mb=1500, hard_limit_mb=3000)
+        >>> task = asyncio.create_task(watchdog.run())
+    """
+
+    def __init__(self, interval: float = 15, soft_limit_mb: float = 0, hard_limit_mb: float = 0,
+                 timeline_path: Optional[str] = None, history: int = 240, soft_cooldown: float = 300,
+                 clock=time.time):
+        self.interval = interval
+        self.soft_limit_mb = soft_limit_mb
+        self.hard_limit_mb = hard_limit_mb
+        self.soft_cooldown = soft_cooldown
+        self.clock = clock
+        self.timeline_path = Path(timeline_path) if timeline_path else None
+        self.process = psutil.Process(os.getpid())
+        self.samples: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self.browser_rss_mb = 0.0
+        self.worker_rss_mb = 0.0
+        self.over_soft_at = 0.0
+        self.over_soft = False
+        self.over_hard = False
+        # Set when recycling did not bring the browser back under the soft limit
+        self.escalated = False
+        if self.timeline_path:
+            self.timeline_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def processes(self) -> List[Dict[str, Any]]:
+        rows = [{'pid': self.process.pid, 'role': 'worker', 'name': self.process.name(),
+                 'rss_mb': self.process.memory_info().rss / MB}]
+        for child in self.process.children(recursive=True):
+            try:
+                rows.append({'pid': child.pid, 'role': 'browser', 'name': child.name(),
+                             'rss_mb': child.memory_info().rss / MB})
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return rows
+
+    def sample(self) -> Dict[str, Any]:
+        now = self.clock()
+        rows = self.processes()
+        self.worker_rss_mb = rows[0]['rss_mb']
+        self.browser_rss_mb = sum(row['rss_mb'] for row in rows[1:])
+
+        over_soft = bool(self.soft_limit_mb) and self.browser_rss_mb >= self.soft_limit_mb
+        if over_soft and not self.over_soft:
+            self.over_soft_at = now
+            metrics.incr('memory.soft_limit_crossings')
+        elif over_soft and not self.escalated and now - self.over_soft_at >= self.soft_cooldown:
+            logger.warning(f"Browser still uses {self.browser_rss_mb:.0f} MB {now - self.over_soft_at:.0f}s "
+                           f"after recycling its contexts, restarting it")
+            metrics.incr('memory.soft_limit_escalations')
+            self.escalated = True
+        self.over_soft = over_soft
+        self.over_hard = self.escalated or (bool(self.hard_limit_mb) and self.browser_rss_mb >= self.hard_limit_mb)
+
+        metrics.gauge('memory.worker_rss_mb', round(self.worker_rss_mb, 1))
+        metrics.gauge('memory.browser_rss_mb', round(self.browser_rss_mb, 1))
+        metrics.gauge('memory.browser_processes', len(rows) - 1)
+
+        sample = {'ts': now, 'worker_rss_mb': self.worker_rss_mb, 'browser_rss_mb': self.browser_rss_mb,
+                  'processes': rows}
+        self.samples.append(sample)
+        if self.timeline_path:
+            self._export(now, rows)
+        return sample
+
+    def reset(self) -> None:
+        """The browser was restarted: the last sample is stale, the next one above the soft limit is a new crossing."""
+        self.over_hard = False
+        self.over_soft = False
+        self.escalated = False
+
+    def _export(self, now: float, rows: List[Dict[str, Any]]) -> None:
+        try:
+            with self.timeline_path.open('a', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps({'ts': round(now, 3), **row, 'rss_mb': round(row['rss_mb'], 1)}) + '\n')
+        except OSError as e:
+            logger.warning(f"Failed to write memory timeline {self.timeline_path}: {e}")
+
+    def timeline(self, pid: Optional[int] = None) -> List[Dict[str, Any]]:
+        """``(ts, rss_mb)`` points of one pid, or of the whole browser when ``pid`` is None."""
+        if pid is None:
+            return [{'ts': s['ts'], 'rss_mb': s['browser_rss_mb']} for s in self.samples]
+        return [{'ts': s['ts'], 'rss_mb': row['rss_mb']}
+                for s in self.samples for row in s['processes'] if row['pid'] == pid]
+
+    async def run(self) -> None:
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning(f"Memory sample failed: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,122 @@
+import multiprocessing
+import os
+import signal
+import time
+from typing import Callable, Dict, Optional
+
+from ..logger import logger
+
+
+class Supervisor:
+    """
+    Runs ``processes`` copies of ``target(index, total)`` in child processes.
+
+    - a child that exits is restarted on its own; a child that fails (non-zero
+      exit code or killed by a signal) waits an exponential back-off first,
+      which resets once the child stayed up for ``stable_after`` seconds
+    - every child runs in its own process group, so a SIGINT from the terminal
+      or a SIGTERM to the group reaches the supervisor only; it forwards
+      SIGTERM to every child exactly once, which then get ``drain_timeout``
+      seconds to finish before being killed. Under systemd use
+      ``KillMode=mixed`` so the stop signal goes to the supervisor alone.
+
+    Example:
+        >>> Supervisor(run_child, processes=4).run()
+    """
+
+    def __init__(
+            self,
+            target: Callable[[int, int], None],
+            processes: int,
+            backoff_base: float = 1.0,
+            backoff_max: float = 60.0,
+            stable_after: float = 60.0,
+            drain_timeout: float = 60.0,
+    ):
+        self.target = target
+        self.processes = processes
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+        self.drain_timeout = drain_timeout
+        self.context = multiprocessing.get_context("fork")
+        self.children: Dict[int, Optional[multiprocessing.Process]] = {}
+        self.started_at: Dict[int, float] = {}
+        self.failures: Dict[int, int] = {}
+        self.restart_at: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self, index: int) -> None:
+        process = self.context.Process(
+            target=self._child,
+            args=(index, self.processes),
+            name=f"worker-{index}",
+        )
+        process.start()
+        self.children[index] = process
+        self.started_at[index] = time.monotonic()
+        self.restart_at.pop(index, None)
+        logger.info(f"Started worker {index}/{self.processes} (pid {process.pid})")
+
+    def _child(self, index: int, total: int) -> None:
+        # Out of the supervisor's group: signals meant for the group must not reach the child twice
+        os.setpgrp()
+        self.target(index, total)
+
+    def stop(self, signum, _frame=None) -> None:
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info(f"Received signal {signum}, draining {self.processes} workers")
+        for process in self.children.values():
+            if process and process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    def _check(self, index: int) -> None:
+        process = self.children.get(index)
+        now = time.monotonic()
+
+        if process is not None:
+            if process.is_alive():
+                if now - self.started_at[index] >= self.stable_after:
+                    self.failures[index] = 0
+                return
+
+            process.join()
+            self.children[index] = None
+            delay = 0.0
+            if process.exitcode != 0:
+                self.failures[index] = self.failures.get(index, 0) + 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (self.failures[index] - 1))
+            self.restart_at[index] = now + delay
+            logger.warning(
+                f"Worker {index} (pid {process.pid}) exited with {process.exitcode}, restarting in {delay:.1f}s"
+            )
+
+        if now >= self.restart_at.get(index, 0):
+            self.spawn(index)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for index in range(self.processes):
+            self.spawn(index)
+
+        while not self.stopping:
+            for index in range(self.processes):
+                if self.stopping:
+                    break
+                self._check(index)
+            time.sleep(0.5)
+
+        deadline = time.monotonic() + self.drain_timeout
+        for index, process in self.children.items():
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Worker {index} (pid {process.pid}) did not drain in time, killing it")
+                process.kill()
+                process.join()
+        logger.info("All workers stopped")
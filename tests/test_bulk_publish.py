@@ -0,0 +1,145 @@
+import asyncio
+import re
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
+import httpx
+import pytest
+
+pytest.importorskip("playwright")
+
+from Http.strategies import click_submit_event
+from Http.strategies.click_submit_event import ERROR, ClickSubmitEvent
+from benchmarks.wp_admin_standin import NONCE, start_standin
+from core.services.pacer import DomainPacer
+
+
+class StatusRecorder:
+    """Collects ``update_clicked`` calls in place of HistoryListingService."""
+
+    def __init__(self):
+        self.statuses = {}
+
+    async def update_clicked(self, history_id, status=1):
+        self.statuses[history_id] = status
+        return []
+
+
+class ListPage:
+    """
+    The few Playwright page calls of the bulk mode, played over HTTP against the stand-in.
+
+    The bulk edit form is submitted the way the browser would, as a GET of
+    ``edit.php`` with the ticked rows, so whatever the stand-in answers
+    (the list, or wp-login.php for an expired session) is what the page shows.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.url = ''
+        self.html = ''
+        self.ticked = []
+        self.fields = {}
+
+    async def goto(self, url, **options):
+        response = await self.client.get(url)
+        self.url, self.html = str(response.url), response.text
+        return SimpleNamespace(status=response.status_code, headers=dict(response.headers))
+
+    async def check(self, selector):
+        self.ticked.append(int(selector.rsplit('-', 1)[-1]))
+
+    async def select_option(self, selector, value):
+        self.fields[selector] = value
+
+    async def click(self, selector):
+        if selector != '#bulk_edit':
+            return
+        query = dict(re.findall(r'<input type="hidden" name="(\w+)" value="([^"]*)"', self.html))
+        params = [*query.items(), ('_wpnonce', NONCE), ('action', 'edit'), ('bulk_edit', 'Update'),
+                  ('_status', self.fields['#bulk-edit select[name="_status"]']),
+                  *(('post[]', post_id) for post_id in self.ticked)]
+        self.ticked = []
+        await self.goto(f"{self.url.split('?')[0]}?{urlencode(params)}")
+
+    async def wait_for_selector(self, selector, **options):
+        pass
+
+    @asynccontextmanager
+    async def expect_navigation(self):
+        yield
+
+    async def query_selector(self, selector):
+        return selector == '#the-list' and 'id="the-list"' in self.html or None
+
+    async def eval_on_selector_all(self, selector, script):
+        return [int(post_id) for post_id in re.findall(r'<tr id="post-(\d+)"', self.html)]
+
+
+class LoginManager:
+    """``BrowserManager.ensure_logged_in`` with a form POST to wp-login.php."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    async def ensure_logged_in(self, url, page):
+        if 'wp-login.php' not in page.url:
+            return False
+        await page.client.post(f"{self.base_url}/wp-login.php", data={'log': 'admin', 'pwd': 'admin'})
+        await page.goto(url)
+        return True
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    # Sub-millisecond localhost latencies would make the shared pacer back off
+    monkeypatch.setattr(click_submit_event, 'pacer', DomainPacer(initial_rate=1000, min_rate=1000, max_rate=1000))
+    server, base_url, state = start_standin()
+    yield base_url, state
+    server.shutdown()
+
+
+def bulk_publish(base_url, product_ids, expire_before_submit=None):
+    event = ClickSubmitEvent({
+        'id': 1, 'domain': base_url, 'publish_mode': 'bulk',
+        'history_listings': [{'id': i, 'product_wp_id': i, 'is_clicked_submit': 0} for i in product_ids],
+    })
+    event.history_listing_service = StatusRecorder()
+    event.browser_manager = LoginManager(base_url)
+
+    async def scenario():
+        async with httpx.AsyncClient(follow_redirects=True) as client:
+            page = ListPage(client)
+            await page.goto(f"{base_url}/wp-admin/")
+            await event.browser_manager.ensure_logged_in(event.list_url, page)
+            await page.goto(f"{event.list_url}&post_status=draft")
+            if expire_before_submit:
+                expire_before_submit()
+            targets = [h for h in event.items if h['product_wp_id'] in await event.listed_ids(page)]
+            await event._bulk_publish_rows(page, targets)
+
+    asyncio.run(scenario())
+    return event.history_listing_service.statuses
+
+
+def test_only_rows_in_the_publish_view_count(standin):
+    base_url, state = standin
+    state.products.update({1: 'draft', 2: 'draft', 3: 'draft', 4: 'draft'})
+    state.locked.add(2)
+    state.future_dated.add(3)
+
+    statuses = bulk_publish(base_url, [1, 2, 3, 4])
+
+    assert state.products == {1: 'publish', 2: 'draft', 3: 'future', 4: 'publish'}
+    assert statuses == {1: 1, 2: ERROR, 3: ERROR, 4: 1}
+
+
+def test_a_bulk_edit_that_lands_on_the_login_page_publishes_nothing(standin):
+    base_url, state = standin
+    state.products.update({1: 'draft', 2: 'draft'})
+
+    statuses = bulk_publish(base_url, [1, 2], expire_before_submit=state.expire_sessions)
+
+    assert state.products == {1: 'draft', 2: 'draft'}
+    assert statuses == {1: ERROR, 2: ERROR}
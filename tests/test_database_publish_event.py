@@ -0,0 +1,142 @@
+import asyncio
+import re
+from contextlib import asynccontextmanager
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from Http.strategies import database_publish_event
+from Http.strategies.click_submit_event import PROCESSING
+from Http.strategies.database_publish_event import (
+    PUBLISHABLE_STATUSES,
+    DatabasePublishEvent,
+    sanitize_title,
+    unique_slug,
+)
+from core.services.pacer import DomainPacer
+
+
+class FakeCursor:
+    """Just enough of a posts table for the row lock of ``_publish_rows`` and the slug queries."""
+
+    def __init__(self, posts):
+        self.posts = posts
+        self._rows = []
+
+    async def execute(self, query, args=()):
+        self._rows = []
+        if query.startswith('SELECT ID FROM') and query.endswith('FOR UPDATE'):
+            ids, statuses = args[:-len(PUBLISHABLE_STATUSES)], args[-len(PUBLISHABLE_STATUSES):]
+            self._rows = [(i,) for i in ids if i in self.posts and self.posts[i]['post_status'] in statuses]
+        elif query.startswith('UPDATE') and "post_status = 'publish'" in query:
+            for i in args:
+                self.posts[i]['post_status'] = 'publish'
+        elif query.startswith('SELECT ID, post_title'):
+            self._rows = [(i, self.posts[i]['post_title']) for i in args if self.posts[i]['post_name'] == '']
+        elif query.startswith('SELECT post_name'):
+            post_id, slug, _ = args
+            pattern = re.compile(rf"{re.escape(slug)}(-.+)?")
+            self._rows = [(post['post_name'],) for i, post in self.posts.items()
+                          if i != post_id and pattern.fullmatch(post['post_name'])]
+        elif query.startswith('UPDATE'):
+            slug, post_id = args
+            self.posts[post_id]['post_name'] = slug
+
+    async def fetchall(self):
+        return self._rows
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, posts):
+        self.posts = posts
+        self.committed = False
+
+    async def begin(self):
+        pass
+
+    async def commit(self):
+        self.committed = True
+
+    async def rollback(self):
+        pass
+
+    def cursor(self):
+        return FakeCursor(self.posts)
+
+
+class StatusRecorder:
+    """Collects ``update_clicked`` calls in place of HistoryListingService."""
+
+    def __init__(self):
+        self.statuses = {}
+
+    async def update_clicked(self, history_id, status=1):
+        self.statuses[history_id] = status
+        return []
+
+
+def test_sanitize_title_matches_wordpress():
+    assert sanitize_title('Café Crème & Co. <b>XL</b>') == 'cafe-creme-co-xl'
+    assert sanitize_title('  T-Shirt --  Blue  ') == 't-shirt-blue'
+    assert sanitize_title('中文') == '%e4%b8%ad%e6%96%87'
+    assert sanitize_title('') == ''
+
+
+def test_unique_slug_appends_the_next_free_suffix():
+    assert unique_slug('shirt', set()) == 'shirt'
+    assert unique_slug('shirt', {'shirt', 'shirt-2'}) == 'shirt-3'
+
+
+def test_drafts_get_unique_slugs_on_publish():
+    posts = {
+        1: {'post_title': 'Blue Shirt', 'post_name': 'blue-shirt'},
+        2: {'post_title': 'Blue Shirt', 'post_name': ''},
+        3: {'post_title': 'Blue Shirt', 'post_name': ''},
+        4: {'post_title': '', 'post_name': ''},
+        5: {'post_title': 'Red Shirt', 'post_name': 'kept'},
+    }
+    event = DatabasePublishEvent({'id': 1, 'domain': 'http://shop.test', 'history_listings': []})
+
+    asyncio.run(event._assign_slugs(FakeCursor(posts), [2, 3, 4, 5]))
+
+    assert [posts[i]['post_name'] for i in range(1, 6)] == ['blue-shirt', 'blue-shirt-2', 'blue-shirt-3', '4', 'kept']
+
+
+def test_only_drafts_and_pending_products_are_published(monkeypatch):
+    posts = {
+        1: {'post_title': 'Draft', 'post_name': 'draft', 'post_status': 'draft'},
+        2: {'post_title': 'Pending', 'post_name': 'pending', 'post_status': 'pending'},
+        3: {'post_title': 'Trashed', 'post_name': 'trashed__trashed', 'post_status': 'trash'},
+        4: {'post_title': 'Auto Draft', 'post_name': '', 'post_status': 'auto-draft'},
+        5: {'post_title': 'Private', 'post_name': 'private', 'post_status': 'private'},
+    }
+    connection = FakeConnection(posts)
+
+    @asynccontextmanager
+    async def fake_connection(**params):
+        yield connection
+
+    monkeypatch.setattr(database_publish_event.store_pools, 'connection', fake_connection)
+    monkeypatch.setattr(database_publish_event, 'pacer', DomainPacer(initial_rate=1000, min_rate=1000, max_rate=1000))
+    event = DatabasePublishEvent({
+        'id': 1, 'domain': 'http://shop.test', 'status_database': 1, 'db_host': 'db', 'db_database': 'shop',
+        'history_listings': [{'id': 10 + i, 'product_wp_id': i, 'is_clicked_submit': 0} for i in range(1, 7)],
+    })
+    event.history_listing_service = StatusRecorder()
+
+    asyncio.run(event._publish_batch(event.items))
+
+    assert [posts[i]['post_status'] for i in range(1, 6)] == ['publish', 'publish', 'trash', 'auto-draft', 'private']
+    assert posts[3]['post_name'] == 'trashed__trashed'
+    assert connection.committed
+    assert event.processed == 2
+    # Skipped ids are left as the browser leaves #error-page: PROCESSING, never SUCCESS
+    statuses = event.history_listing_service.statuses
+    assert [statuses[10 + i] for i in range(1, 7)] == [1, 1, PROCESSING, PROCESSING, PROCESSING, PROCESSING]
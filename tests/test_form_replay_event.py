@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from Http.session_cache import SessionCache
+from Http.strategies import form_replay_event
+from Http.strategies.click_submit_event import PENDING, PROCESSING
+from Http.strategies.form_replay_event import FormReplayEvent
+from benchmarks.wp_admin_standin import start_standin
+from core.services.pacer import DomainPacer
+
+
+class StatusRecorder:
+    """Collects ``update_clicked`` calls in place of HistoryListingService."""
+
+    def __init__(self, on_update=None):
+        self.statuses = {}
+        self.on_update = on_update
+
+    async def update_clicked(self, history_id, status=1):
+        self.statuses[history_id] = status
+        if self.on_update:
+            self.on_update(history_id, status)
+        return []
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    # Sub-millisecond localhost latencies would make the shared pacer back off
+    monkeypatch.setattr(form_replay_event, 'pacer', DomainPacer(initial_rate=1000, min_rate=1000, max_rate=1000))
+    server, base_url, state = start_standin()
+    yield base_url, state
+    server.shutdown()
+
+
+def make_event(base_url, product_ids, sessions, concurrency=4, stop_event=None, on_update=None):
+    store_dict = {
+        'id': 1,
+        'domain': base_url,
+        'username_login': 'admin',
+        'password_login': 'admin',
+        'history_listings': [{'id': i, 'product_wp_id': i, 'is_clicked_submit': 0} for i in product_ids],
+    }
+    event = FormReplayEvent(store_dict, page_concurrency=concurrency, stop_event=stop_event)
+    event.history_listing_service = StatusRecorder(on_update)
+    event.session_cache = SessionCache(str(sessions))
+    return event
+
+
+def test_publishes_every_product_over_http(standin, tmp_path):
+    base_url, state = standin
+    event = make_event(base_url, range(1, 7), tmp_path)
+
+    result = asyncio.run(event._process_images())
+
+    assert result == {'processed': 6, 'failed': 0, 'remaining': []}
+    assert all(state.products[i] == 'publish' for i in range(1, 7))
+    assert set(event.history_listing_service.statuses.values()) == {1}
+    assert state.logins == 1
+
+
+def test_expired_session_is_renewed_by_one_login(standin, tmp_path):
+    base_url, state = standin
+    asyncio.run(make_event(base_url, [1], tmp_path)._process_images())
+    state.expire_sessions()
+
+    # Every connection starts from the cached, now stale, cookie and hits wp-login.php at once
+    event = make_event(base_url, range(10, 18), tmp_path)
+    result = asyncio.run(event._process_images())
+
+    assert result['processed'] == 8
+    assert state.logins == 2
+
+
+def test_fallback_items_are_handed_back_when_stopping(standin, tmp_path):
+    base_url, state = standin
+    state.block_editor.add(1)
+    stop_event = asyncio.Event()
+
+    def stop_after_block_editor_product(history_id, status):
+        if history_id == 1 and status == PROCESSING:
+            stop_event.set()
+
+    event = make_event(base_url, [1, 2], tmp_path, concurrency=1, stop_event=stop_event,
+                       on_update=stop_after_block_editor_product)
+    result = asyncio.run(event._process_images())
+
+    assert result['processed'] == 0
+    assert sorted(history['id'] for history in result['remaining']) == [1, 2]
+    # Not left PROCESSING: the next turn picks it up again
+    assert event.history_listing_service.statuses[1] == PENDING
+    assert state.publishes == 0
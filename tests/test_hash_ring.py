@@ -0,0 +1,52 @@
+import pytest
+
+from core.utils.hash_ring import HashRing, rebalance_report
+
+STORE_IDS = range(1, 10001)
+
+
+def ring(count: int) -> HashRing:
+    return HashRing([f"worker-{i}" for i in range(count)])
+
+
+@pytest.mark.parametrize("before, after", [(2, 3), (3, 8)])
+def test_growing_the_ring_moves_only_the_new_workers_share(before, after):
+    report = rebalance_report(STORE_IDS, ring(before), ring(after))
+
+    # Ideal movement is the share the new workers take over: 1 - before/after
+    assert report["moved"] == pytest.approx(1 - before / after, abs=0.03)
+
+
+@pytest.mark.parametrize("count", range(2, 8))
+def test_adding_one_worker_moves_about_one_nth(count):
+    report = rebalance_report(STORE_IDS, ring(count), ring(count + 1))
+
+    assert report["moved"] == pytest.approx(1 / (count + 1), abs=0.03)
+
+
+def test_moved_stores_only_go_to_the_added_worker():
+    before, after = ring(3), ring(4)
+
+    destinations = {after.get(key) for key in STORE_IDS if before.get(key) != after.get(key)}
+
+    assert destinations == {"worker-3"}
+
+
+@pytest.mark.parametrize("count", [2, 3, 8])
+def test_load_skew_stays_bounded(count):
+    report = rebalance_report(STORE_IDS, ring(count), ring(count))
+
+    assert report["moved"] == 0
+    assert report["skew"] < 1.2
+
+
+def test_removing_a_worker_is_the_inverse_of_adding_it():
+    current = ring(3)
+    assert current.set_nodes(["worker-0", "worker-1"])
+    assert not current.set_nodes(["worker-1", "worker-0"])
+
+    assert all(current.get(key) == ring(2).get(key) for key in STORE_IDS)
+
+
+def test_empty_ring_owns_nothing():
+    assert HashRing().get(42) is None
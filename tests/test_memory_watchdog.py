@@ -0,0 +1,57 @@
+from core.utils.memory_watchdog import MemoryWatchdog
+
+
+class FakeWatchdog(MemoryWatchdog):
+    """Browser RSS and clock set by the test instead of read from the system."""
+
+    def __init__(self, **options):
+        self.now = 0.0
+        self.rss_mb = 0.0
+        super().__init__(interval=15, soft_limit_mb=1500, hard_limit_mb=3000, soft_cooldown=300,
+                         clock=lambda: self.now, **options)
+
+    def processes(self):
+        return [{'pid': 1, 'role': 'worker', 'name': 'python', 'rss_mb': 100.0},
+                {'pid': 2, 'role': 'browser', 'name': 'firefox', 'rss_mb': self.rss_mb}]
+
+    def at(self, now, rss_mb):
+        self.now, self.rss_mb = now, rss_mb
+        self.sample()
+
+
+def test_soft_limit_triggers_once_per_crossing():
+    watchdog = FakeWatchdog()
+    watchdog.at(0, 1000)
+    assert watchdog.over_soft_at == 0.0
+
+    watchdog.at(15, 1600)
+    assert watchdog.over_soft_at == 15
+    watchdog.at(30, 1600)
+    watchdog.at(45, 1700)
+    assert watchdog.over_soft_at == 15
+    assert not watchdog.over_hard
+
+    watchdog.at(60, 1200)
+    watchdog.at(75, 1600)
+    assert watchdog.over_soft_at == 75
+
+
+def test_staying_above_the_soft_limit_escalates_to_a_restart():
+    watchdog = FakeWatchdog()
+    watchdog.at(0, 1600)
+    watchdog.at(299, 1600)
+    assert not watchdog.over_hard
+    watchdog.at(300, 1600)
+    assert watchdog.over_hard
+
+    watchdog.reset()
+    watchdog.at(315, 900)
+    assert not watchdog.over_hard
+
+
+def test_hard_limit():
+    watchdog = FakeWatchdog()
+    watchdog.at(0, 3100)
+    assert watchdog.over_hard
+    watchdog.at(15, 2000)
+    assert not watchdog.over_hard
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from core.services.pacer import DomainPacer
+
+DOMAIN = 'https://shop.test'
+
+
+def make_pacer():
+    return DomainPacer(initial_rate=1.0, min_rate=0.1, max_rate=10.0, increase=0.1, decrease=0.5,
+                       latency_tolerance=3.0)
+
+
+def test_latency_is_compared_within_the_same_kind():
+    pacer = make_pacer()
+    for _ in range(5):
+        pacer.record(DOMAIN, latency=0.2, status=200, kind='navigation')
+        # A publish click waits for the save, 10x a page load on a healthy host
+        pacer.record(DOMAIN, latency=2.0, kind='publish')
+    assert pacer.rate(DOMAIN) == pytest.approx(2.0)
+
+    pacer.record(DOMAIN, latency=7.0, kind='publish')
+    assert pacer.rate(DOMAIN) == pytest.approx(1.0)
+
+
+def test_an_error_in_the_block_backs_off():
+    pacer = make_pacer()
+
+    async def scenario():
+        with pytest.raises(ConnectionError):
+            async with pacer.pace(DOMAIN):
+                raise ConnectionError("reset by peer")
+
+    asyncio.run(scenario())
+    assert pacer.rate(DOMAIN) == pytest.approx(0.5)
+
+
+def test_a_cancelled_block_is_not_recorded():
+    pacer = make_pacer()
+
+    async def scenario():
+        async def paced():
+            async with pacer.pace(DOMAIN):
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(paced())
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert pacer.rate(DOMAIN) == pytest.approx(1.0)
@@ -0,0 +1,85 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pymysql
+import pytest
+
+from core.database import pool_registry
+from core.database.pool_registry import PoolRegistry
+
+
+class FakePool:
+    """Stands in for an aiomysql pool; ``SELECT 1`` takes ``delay`` seconds, then raises ``error`` if set."""
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.size = self.freesize = 0
+        self.maxsize = 2
+        self.closed = False
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    @asynccontextmanager
+    async def cursor(self):
+        yield self
+
+    async def execute(self, query):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    created = []
+    behaviour = {
+        'down': {'delay': 0.5, 'error': pymysql.err.OperationalError(2003, "Can't connect")},
+        'slow': {'delay': 0.2},
+    }
+
+    async def create_pool(**params):
+        pool = FakePool(**behaviour.get(params['host'], {}))
+        created.append((params['host'], pool))
+        return pool
+
+    monkeypatch.setattr(pool_registry.aiomysql, 'create_pool', create_pool)
+    return created
+
+
+def test_an_unreachable_database_does_not_block_other_stores(pools):
+    registry = PoolRegistry(max_pools=4, idle_timeout=0)
+
+    async def scenario():
+        down = asyncio.create_task(registry.acquire(host='down', db='a'))
+        await asyncio.sleep(0.05)
+        started = asyncio.get_running_loop().time()
+        await registry.acquire(host='up', db='b')
+        elapsed = asyncio.get_running_loop().time() - started
+        with pytest.raises(ConnectionError):
+            await down
+        return elapsed
+
+    assert asyncio.run(scenario()) < 0.2
+    # The pool whose SELECT 1 failed is closed, not leaked
+    assert [(host, pool.closed) for host, pool in pools] == [('down', True), ('up', False)]
+    assert len(registry) == 1
+
+
+def test_concurrent_callers_share_one_pool(pools):
+    registry = PoolRegistry(max_pools=4, idle_timeout=0)
+
+    async def scenario():
+        return await asyncio.gather(*(registry.acquire(host='slow', db='a') for _ in range(5)))
+
+    acquired = asyncio.run(scenario())
+    assert len(pools) == 1
+    assert all(pool is pools[0][1] for pool in acquired)
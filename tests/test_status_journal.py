@@ -0,0 +1,62 @@
+import asyncio
+
+from core.services.status_journal import StatusJournal
+
+
+def test_recorded_statuses_are_drained_and_replayed(tmp_path):
+    sent = {}
+
+    async def send(batch):
+        sent.update(batch)
+
+    async def scenario():
+        journal = StatusJournal(str(tmp_path / 'journal.jsonl'), fsync_interval=0.01, drain_interval=0.01)
+        await journal.open(send)
+        await journal.record(1, 3)
+        await journal.record(1, 1)
+        await journal.record(2, 1)
+        for _ in range(100):
+            if not journal.pending:
+                break
+            await asyncio.sleep(0.01)
+        await journal.close()
+
+        replayed = StatusJournal(str(tmp_path / 'journal.jsonl'))
+        replayed.replay()
+        return replayed.pending
+
+    assert asyncio.run(scenario()) == {}
+    assert sent == {1: 1, 2: 1}
+
+
+def test_drain_loop_survives_a_failing_drain(tmp_path):
+    sent = {}
+
+    async def send(batch):
+        sent.update(batch)
+
+    async def scenario():
+        journal = StatusJournal(str(tmp_path / 'journal.jsonl'), fsync_interval=0.01, drain_interval=0.01)
+        drain = journal.drain
+        failures = []
+
+        async def flaky_drain():
+            if not failures:
+                failures.append(True)
+                raise OSError("No space left on device")
+            return await drain()
+
+        journal.drain = flaky_drain
+        await journal.open(send)
+        await journal.record(7, 1)
+        for _ in range(200):
+            if not journal.pending:
+                break
+            await asyncio.sleep(0.01)
+        alive = not journal._drain_task.done()
+        await journal.close()
+        return failures, alive
+
+    failures, alive = asyncio.run(scenario())
+    assert failures and alive
+    assert sent == {7: 1}
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from core.services.redis_cache import RedisCache
+from core.services.store_list_cache import StoreListCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+STORES = [
+    {'id': 1, 'domain': 'https://a.test', 'username_login': 'admin', 'password_login': 'hunter2',
+     'history_listing': [{'id': 10, 'is_clicked_submit': 0}, {'id': 11, 'is_clicked_submit': 0}]},
+    {'id': 2, 'domain': 'https://b.test', 'api_key': 'ck_b', 'secret_key': 'cs_b', 'history_listing': []},
+]
+
+
+class CountingFetch:
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return [{**row, 'history_listing': [dict(h) for h in row['history_listing']]} for row in STORES]
+
+
+def make_cache(redis, fetch):
+    cache = RedisCache()
+    cache.redis = redis
+    return StoreListCache(cache, fetch, ttl=60, stale_ttl=120)
+
+
+def test_credentials_stay_out_of_redis():
+    async def scenario():
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        refresher, reader = CountingFetch(), CountingFetch()
+        rows = await make_cache(redis, refresher).get()
+        meta = await make_cache(redis, reader).meta()
+        cached = await redis.hgetall(f"worker-wp:store-list:stores:v{meta['version']}:rows")
+        # Another process reads the snapshot, its credentials come from its own fetch
+        other = await make_cache(redis, reader).get(select=lambda store_id: store_id == 1)
+        return rows, cached, other, refresher.calls, reader.calls
+
+    rows, cached, other, refreshes, reader_fetches = asyncio.run(scenario())
+    assert all(secret not in body for body in cached.values() for secret in ('hunter2', 'cs_b', 'ck_b'))
+    assert rows[0]['password_login'] == 'hunter2' and rows[1]['secret_key'] == 'cs_b'
+    assert [row['password_login'] for row in other] == ['hunter2']
+    assert (refreshes, reader_fetches) == (1, 1)
+
+
+def test_own_statuses_are_served_over_a_stale_snapshot():
+    async def scenario():
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        cache = make_cache(redis, CountingFetch())
+        await cache.get()
+        cache.record_status(10, 1)
+        return await cache.get()
+
+    rows = asyncio.run(scenario())
+    assert [h['is_clicked_submit'] for h in rows[0]['history_listing']] == [1, 0]
@@ -0,0 +1,32 @@
+from Http.services.store_scheduler import StoreScheduler
+
+
+def store(store_id, *history_ids):
+    return {'id': store_id, 'history_listing': [{'id': i, 'is_clicked_submit': 0} for i in history_ids]}
+
+
+def test_state_of_stores_no_longer_listed_is_dropped():
+    now = [1000.0]
+    scheduler = StoreScheduler(item_budget=0, time_slice=0, clock=lambda: now[0])
+    scheduler.plan([store(1, 10, 11), store(2, 20)])
+    scheduler.complete(store(2), {'processed': 0, 'failed': 1})
+    assert set(scheduler.first_seen) == {10, 11, 20}
+    assert set(scheduler.outcomes) == {2}
+
+    # Store 2 timed out without complete(), then left the listing along with item 10
+    now[0] += 60
+    scheduler.plan([store(1, 11), store(3, 30)])
+
+    assert set(scheduler.first_seen) == {11, 30}
+    assert scheduler.first_seen[11] == 1000.0
+    assert set(scheduler.outcomes) == set()
+
+
+def test_outcomes_are_kept_for_listed_stores():
+    scheduler = StoreScheduler(item_budget=0, time_slice=0)
+    scheduler.complete(store(1, 10), {'processed': 1, 'failed': 1})
+    scheduler.plan([store(1, 11), store(2, 20)])
+
+    assert scheduler.failure_rate(1) == 0.5
+    assert scheduler.failure_rate(2) == 0.0
+    assert set(scheduler.outcomes) == {1}
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+from Http.services.store_sync_service import StoreSyncService
+
+
+class FakeResponse:
+    def __init__(self, rows=None, status_code=200):
+        self.status_code = status_code
+        self.content = json.dumps({"response": {"data": rows or []}}).encode()
+        self.headers = {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeStoreService:
+    """Serves the full list on the first call and whatever is queued in ``responses`` afterwards."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.responses = []
+
+    async def fetch_stores(self, params=None, headers=None):
+        return self.responses.pop(0) if self.responses else FakeResponse(self.rows)
+
+
+def ids(rows):
+    return sorted(row["id"] for row in rows)
+
+
+def test_delta_only_yields_changed_stores():
+    async def scenario():
+        service = FakeStoreService([{"id": 1, "v": 1}, {"id": 2, "v": 1}])
+        sync = StoreSyncService(service)
+        assert ids(await sync.sync()) == [1, 2]
+        service.responses.append(FakeResponse([{"id": 1, "v": 1}, {"id": 2, "v": 2}]))
+        assert ids(await sync.sync()) == [2]
+        service.responses.append(FakeResponse(status_code=304))
+        assert await sync.sync() == []
+
+    asyncio.run(scenario())
+
+
+def test_yield_all_returns_the_snapshot_once():
+    async def scenario():
+        service = FakeStoreService([{"id": 1}, {"id": 2}])
+        sync = StoreSyncService(service)
+        await sync.sync()
+        sync.yield_all()
+        service.responses.append(FakeResponse(status_code=304))
+        assert ids(await sync.sync()) == [1, 2]
+        assert await sync.sync() == []
+
+    asyncio.run(scenario())
+
+
+def test_retried_store_is_in_the_next_delta():
+    async def scenario():
+        service = FakeStoreService([{"id": 1}, {"id": 2}, {"id": 3}])
+        sync = StoreSyncService(service)
+        await sync.sync()
+        sync.retry(2)
+        service.responses.append(FakeResponse([{"id": 3, "v": 2}]))
+        assert ids(await sync.sync()) == [2, 3]
+        service.responses.append(FakeResponse(status_code=304))
+        assert await sync.sync() == []
+
+    asyncio.run(scenario())
+
+
+def test_retry_survives_a_failed_sync():
+    async def scenario():
+        service = FakeStoreService([{"id": 1}])
+        sync = StoreSyncService(service)
+        await sync.sync()
+        sync.retry(1)
+        service.responses.append(FakeResponse(status_code=500))
+        assert await sync.sync() == []
+        # The failure forces a full resync, which yields every store anyway
+        assert ids(await sync.sync()) == [1]
+
+    asyncio.run(scenario())
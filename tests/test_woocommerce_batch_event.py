@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+import pytest
+
+pytest.importorskip("playwright")
+
+from Http.strategies import woocommerce_batch_event
+from Http.strategies.click_submit_event import ERROR
+from Http.strategies.woocommerce_batch_event import WooCommerceBatchEvent
+from benchmarks.wp_admin_standin import CONSUMER_KEY, CONSUMER_SECRET, start_standin
+from core.services.pacer import DomainPacer
+
+
+class StatusRecorder:
+    """Collects ``update_clicked`` calls in place of HistoryListingService."""
+
+    def __init__(self):
+        self.statuses = {}
+
+    async def update_clicked(self, history_id, status=1):
+        self.statuses[history_id] = status
+        return []
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    # Sub-millisecond localhost latencies would make the shared pacer back off
+    monkeypatch.setattr(woocommerce_batch_event, 'pacer', DomainPacer(initial_rate=1000, min_rate=1000,
+                                                                      max_rate=1000))
+    server, base_url, state = start_standin()
+    yield base_url, state
+    server.shutdown()
+
+
+def make_event(base_url, product_ids, **store):
+    store_dict = {
+        'id': 1,
+        'domain': base_url,
+        'api_key': CONSUMER_KEY,
+        'secret_key': CONSUMER_SECRET,
+        'history_listings': [{'id': i, 'product_wp_id': i, 'is_clicked_submit': 0} for i in product_ids],
+        **store,
+    }
+    event = WooCommerceBatchEvent(store_dict)
+    event.history_listing_service = StatusRecorder()
+    return event
+
+
+def publish_batch(event):
+    async def scenario():
+        async with httpx.AsyncClient() as client:
+            await event._publish_batch(client, event.items)
+
+    asyncio.run(scenario())
+
+
+def test_publishes_over_http_with_an_oauth_signature(standin):
+    base_url, state = standin
+    state.missing.add(3)
+    event = make_event(base_url, [1, 2, 3])
+
+    result = asyncio.run(event._process_images())
+
+    assert result == {'processed': 2, 'failed': 0, 'remaining': []}
+    assert state.products[1] == state.products[2] == 'publish'
+    assert event.fallback_items == []
+
+
+def test_plain_keys_over_http_are_refused(standin):
+    base_url, state = standin
+    event = make_event(base_url, [1])
+    event.auth_options = lambda: {'params': {'consumer_key': CONSUMER_KEY, 'consumer_secret': CONSUMER_SECRET}}
+
+    publish_batch(event)
+
+    assert event.fallback_items == event.items
+    assert state.publishes == 0
+
+
+def test_wrong_secret_is_refused(standin):
+    base_url, state = standin
+    event = make_event(base_url, [1], secret_key='cs_wrong')
+
+    publish_batch(event)
+
+    assert event.fallback_items == event.items
+    assert state.publishes == 0
+
+
+def test_html_answer_falls_back_to_the_browser(standin):
+    base_url, state = standin
+    state.rest_html = True
+    event = make_event(base_url, [1, 2])
+
+    publish_batch(event)
+
+    assert event.fallback_items == event.items
+    assert ERROR not in event.history_listing_service.statuses.values()
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from core.services.redis_cache import RedisCache
+from core.services.work_queue import WorkStealingQueue
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_queue(visibility_timeout: float = 600.0) -> WorkStealingQueue:
+    cache = RedisCache()
+    # Stand-in for the shared instance, Lua included (fakeredis[lua])
+    cache.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+    return WorkStealingQueue(cache, name="test", visibility_timeout=visibility_timeout)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_an_item_is_queued_once():
+    async def scenario():
+        queue = make_queue()
+        assert await queue.enqueue(1, {"id": 1}, "a")
+        assert not await queue.enqueue(1, {"id": 1}, "b")
+        item = await queue.claim("a")
+        assert not await queue.enqueue(1, {"id": 1}, "a")
+        assert await queue.ack(item["id"], item["token"])
+        assert await queue.enqueue(1, {"id": 1}, "a")
+
+    run(scenario())
+
+
+def test_members_take_their_own_backlog_first_then_steal_from_the_longest():
+    async def scenario():
+        queue = make_queue()
+        for store_id in (1, 2, 3):
+            await queue.enqueue(store_id, {"id": store_id}, "a")
+        await queue.enqueue(4, {"id": 4}, "b")
+
+        own = await queue.claim("b")
+        stolen = await queue.claim("b")
+        assert (own["id"], own["stolen"]) == ("4", False)
+        # Stolen from the tail, "a" keeps working from the head
+        assert (stolen["id"], stolen["stolen"]) == ("3", True)
+        assert (await queue.claim("a"))["id"] == "1"
+        assert await queue.claim("c") is not None
+        assert await queue.claim("c") is None
+
+    run(scenario())
+
+
+def test_a_stale_worker_cannot_ack_or_touch_a_reclaimed_item():
+    async def scenario():
+        queue = make_queue(visibility_timeout=0.05)
+        await queue.enqueue(1, {"id": 1}, "a")
+        stale = await queue.claim("a")
+
+        await asyncio.sleep(0.1)
+        assert await queue.requeue_expired() == 1
+        fresh = await queue.claim("b")
+        assert fresh["id"] == stale["id"]
+
+        assert not await queue.touch(stale["id"], stale["token"])
+        assert not await queue.ack(stale["id"], stale["token"])
+        assert not await queue.release(stale["id"], stale["token"])
+        # The new holder's claim is intact
+        assert not await queue.enqueue(1, {"id": 1}, "a")
+        assert await queue.touch(fresh["id"], fresh["token"])
+        assert await queue.ack(fresh["id"], fresh["token"])
+
+    run(scenario())
+
+
+def test_an_expired_claim_nobody_requeued_is_still_the_holders():
+    async def scenario():
+        queue = make_queue(visibility_timeout=0.05)
+        await queue.enqueue(1, {"id": 1}, "a")
+        item = await queue.claim("a")
+
+        await asyncio.sleep(0.1)
+        assert await queue.touch(item["id"], item["token"])
+        assert await queue.requeue_expired() == 0
+        assert await queue.ack(item["id"], item["token"])
+
+    run(scenario())
+
+
+def test_release_puts_the_item_back_at_the_head_of_its_owners_backlog():
+    async def scenario():
+        queue = make_queue()
+        await queue.enqueue(1, {"id": 1}, "a")
+        await queue.enqueue(2, {"id": 2}, "a")
+        item = await queue.claim("a")
+
+        assert await queue.release(item["id"], item["token"])
+        assert not await queue.release(item["id"], item["token"])
+        assert (await queue.claim("a"))["id"] == "1"
+
+    run(scenario())
+
+
+def test_only_one_member_is_producer():
+    async def scenario():
+        queue = make_queue()
+        assert await queue.try_become_producer("a")
+        assert not await queue.try_become_producer("b")
+        assert await queue.try_become_producer("a")
+
+    run(scenario())
@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("playwright")
+fakeredis = pytest.importorskip("fakeredis")
+
+from core.services.store_list_cache import SECRET_FIELDS, StoreSecrets
+from worker import Worker
+
+STORES = [
+    {'id': 1, 'domain': 'https://a.test', 'username_login': 'admin', 'password_login': 'hunter2',
+     'api_key': 'ck_a', 'secret_key': 'cs_a', 'db_username': 'wp', 'db_password': 'dbpass',
+     'history_listing': [{'id': 10, 'is_clicked_submit': 0}]},
+]
+
+
+def make_worker():
+    worker = Worker(0, 1, use_queue=True)
+    # Stand-in for the shared instance, Lua included (fakeredis[lua])
+    worker.cache.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    async def fetch():
+        return [dict(row) for row in STORES]
+
+    async def fetch_stores():
+        return await fetch()
+
+    worker.store_secrets = StoreSecrets(fetch)
+    worker.fetch_stores = fetch_stores
+    return worker
+
+
+def test_queued_payloads_carry_no_credentials():
+    async def scenario():
+        worker = make_worker()
+        ran = []
+
+        async def run_store(store):
+            ran.append(store)
+
+        worker.run_store = run_store
+        await worker.produce()
+        payloads = await worker.cache.redis.hgetall(worker.queue.payload_key)
+        await worker.run_claimed(await worker.queue.claim(worker.member_id))
+        return payloads, ran
+
+    payloads, ran = asyncio.run(scenario())
+    assert len(payloads) == 1
+    data = json.loads(next(iter(payloads.values())))['data']
+    assert data['id'] == 1 and not set(SECRET_FIELDS) & set(data)
+    assert all(secret not in body for body in payloads.values() for secret in ('hunter2', 'cs_a', 'dbpass'))
+    # The consumer puts its own copy of the credentials back before running the store
+    assert [(store['password_login'], store['db_password']) for store in ran] == [('hunter2', 'dbpass')]
@@ -1,8 +1,32 @@
+import argparse
+import signal
+import time
 import traceback
 
+from Http.browser_pool import BrowserPool
 from Http.dependencies.container import Container
-from Http.strategies.click_submit_event import ClickSubmitEvent
+from Http.services.history_listing_service import (
+    close_status_batcher,
+    status_client,
+    use_status_journal,
+    use_store_list_cache,
+)
+from Http.services.store_scheduler import StoreScheduler
+from Http.services.store_sync_service import StoreSyncService
+from Http.strategies.engines import get_publish_engine
+from core.database.pool_registry import db_pools, store_pools
+from core.services.checkpoint import Checkpoint
+from core.services.membership import FileMembershipRegistry
+from core.services.metrics import metrics
+from core.services.pacer import pacer
+from core.services.poll_scheduler import AdaptivePoller, announce_work
 from core.services.redis_cache import RedisCache
+from core.services.status_journal import StatusJournal
+from core.services.store_list_cache import StoreListCache, StoreSecrets, strip_secrets
+from core.services.work_queue import WorkStealingQueue
+from core.utils.hash_ring import HashRing
+from core.utils.memory_watchdog import MemoryWatchdog
+from core.utils.supervisor import Supervisor
 import os
 import logging
 import asyncio
@@ -11,11 +35,80 @@ import asyncio
 class Worker:
     """Worker class to handle history listing processing."""
 
-    def __init__(self, index: int, total: int):
+    def __init__(
+            self,
+            index: int,
+            total: int,
+            concurrency: int = 1,
+            store_timeout: float = 0,
+            registry: FileMembershipRegistry = None,
+            heartbeat_interval: float = 5.0,
+            use_queue: bool = False,
+            visibility_timeout: float = 600.0,
+            poller: AdaptivePoller = None,
+            wakeup_channel: str = '',
+            delta_sync: bool = False,
+            shared_store_list: bool = False,
+            store_snapshot_path: str = None,
+            scheduler: StoreScheduler = None,
+            checkpoint: Checkpoint = None,
+            drain_timeout: float = 60.0,
+            repeat_signal_window: float = 2.0,
+            browser_pool: BrowserPool = None,
+            status_journal: StatusJournal = None,
+    ):
         self.index = index
         self.total = total
         self.container = Container()
         self.cache = RedisCache()
+        # With a registry stores are sharded on a consistent-hash ring of the live
+        # members, otherwise on the static ``id % total == index`` split
+        self.registry = registry
+        self.heartbeat_interval = heartbeat_interval
+        self.ring = HashRing()
+        self.heartbeat_task = None
+        self.watchdog_task = None
+        # Queue mode: stores with pending items go through a shared work-stealing
+        # queue instead of every worker walking its own static shard
+        self.queue = WorkStealingQueue(self.cache, visibility_timeout=visibility_timeout) if use_queue else None
+        self.poller = poller or AdaptivePoller()
+        # Redis pub/sub channel that wakes the loop as soon as work is announced
+        self.wakeup_channel = wakeup_channel
+        # Delta sync only hands changed stores to the loop, see StoreSyncService
+        self.delta_sync = delta_sync
+        self.store_snapshot_path = store_snapshot_path
+        self.store_sync = None
+        # One worker downloads /api/stores into Redis, the others read their shard of it
+        self.shared_store_list = shared_store_list
+        self.store_cache = None
+        # Queued payloads carry no credentials, each consumer fills them in from its own fetch
+        self.store_secrets = None
+        # Orders stores by priority and caps each store to a budget per turn
+        self.scheduler = scheduler or StoreScheduler(item_budget=0, time_slice=0)
+        if self.queue:
+            # Leftovers stay pending in DOMAIN_API and the producer enqueues them again;
+            # consumers never plan, so a carry-over would only grow
+            self.scheduler.carry = False
+        # concurrency=1 keeps the original one-store-after-another loop
+        self.concurrency = max(1, concurrency)
+        # Upper bound for a single store run in seconds, 0 disables it
+        self.store_timeout = store_timeout
+        self.in_flight: dict[int, asyncio.Task] = {}
+        # Items published since start, the poller only re-polls quickly after progress
+        self.published = 0
+        # Graceful drain: stop intake on the first signal, let in-flight items
+        # finish for ``drain_timeout`` seconds, then cancel what is left
+        self.checkpoint = checkpoint
+        self.drain_timeout = drain_timeout
+        self.stopping = False
+        self.stop_requested_at = 0.0
+        self.repeat_signal_window = repeat_signal_window
+        self.stop_event = asyncio.Event()
+        self.main_task = None
+        # Long-lived browser shared by every store this worker processes
+        self.browser_pool = browser_pool
+        # Status changes are journaled locally and drained to DOMAIN_API in the background
+        self.status_journal = status_journal
 
         self.db_pool = None
         self.history_listing_service = None
@@ -37,13 +130,82 @@ class Worker:
             store_repository=store_repository
         )
 
+        if self.status_journal:
+            await self.status_journal.open(self.history_listing_service.send_statuses)
+            use_status_journal(self.status_journal)
+
+        if self.browser_pool:
+            await self.browser_pool.start()
+            if self.browser_pool.watchdog:
+                self.watchdog_task = asyncio.create_task(self.browser_pool.watchdog.run())
+
+        if self.shared_store_list:
+            self.store_cache = StoreListCache(
+                self.cache,
+                self.store_service.require_list_stores,
+                ttl=float(os.environ.get("STORE_LIST_CACHE_TTL", 3)),
+                stale_ttl=float(os.environ.get("STORE_LIST_STALE_TTL", 60)),
+                lock_ttl=float(os.environ.get("STORE_LIST_LOCK_TTL", 10)),
+                secrets_ttl=float(os.environ.get("STORE_LIST_SECRETS_TTL", 300)),
+            )
+            use_store_list_cache(self.store_cache)
+
+        if self.queue:
+            self.store_secrets = self.store_cache.secrets if self.store_cache else StoreSecrets(
+                self.store_service.require_list_stores,
+                ttl=float(os.environ.get("STORE_LIST_SECRETS_TTL", 300)),
+            )
+
+        if self.delta_sync:
+            self.store_sync = StoreSyncService(
+                self.store_service,
+                full_resync_every=int(os.environ.get("STORE_SYNC_FULL_EVERY", 100)),
+                snapshot_path=self.store_snapshot_path,
+            )
+
         print("✅ Worker initialized successfully")
 
     async def shutdown(self):
         """Cleanup resources when the worker is done."""
-        mysql_connector = self.container.mysql_connector()
-        if mysql_connector.pool:
-            await mysql_connector.close()
+        await self.cancel_in_flight()
+        if self.checkpoint:
+            self.checkpoint.save()
+            if self.checkpoint.claims:
+                logging.warning(
+                    f"[Worker {self.index}] Checkpointed {len(self.checkpoint.claims)} unfinished items for resume"
+                )
+
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+        if self.watchdog_task:
+            self.watchdog_task.cancel()
+        await self.poller.close()
+        if self.registry:
+            self.registry.leave()
+
+        if self.browser_pool:
+            await self.browser_pool.close()
+            print("🌐 Browser pool closed")
+
+        if self.store_cache:
+            use_store_list_cache(None)
+        if self.status_journal:
+            use_status_journal(None)
+            await self.status_journal.close(timeout=float(os.environ.get("STATUS_JOURNAL_CLOSE_TIMEOUT", 10)))
+        await close_status_batcher()
+        await status_client.aclose()
+        status_latency = metrics.summary('status_api.update_seconds')
+        if status_latency['count']:
+            print(f"📮 Status API: {status_latency['count']} requests, p50 {status_latency['p50'] * 1000:.0f} ms, "
+                  f"p99 {status_latency['p99'] * 1000:.0f} ms, "
+                  f"{int(metrics.counters.get('status_batch.coalesced', 0))} updates coalesced")
+
+        if len(store_pools):
+            await store_pools.close()
+            print("🔌 Store database pools closed")
+
+        if len(db_pools):
+            await db_pools.close()
             print("🔌 Database connection closed")
 
         await self.cache.close()
@@ -51,28 +213,315 @@ class Worker:
 
     async def process_task(self, store):
         logging.info(f"[Worker {self.index}] Processing task ID: {store.get('id')}")
-        await asyncio.sleep(2)
 
+        turn = self.scheduler.slice(store)
         store_dict = {
+            'id': store.get('id'),
             'domain': store.get('domain'),
             'username_login': store.get('username_login'),
             'password_login': store.get('password_login'),
-            'history_listings': store.get('history_listing'),
+            'api_key': store.get('api_key'),
+            'secret_key': store.get('secret_key'),
+            'status_database': store.get('status_database'),
+            'db_host': store.get('db_host'),
+            'db_port': store.get('db_port'),
+            'db_database': store.get('db_database'),
+            'db_username': store.get('db_username'),
+            'db_password': store.get('db_password'),
+            'db_prefix': store.get('db_prefix'),
+            'history_listings': turn.get('history_listing'),
+            'deadline': turn.get('deadline'),
+            'wait_strategy': store.get('wait_strategy'),
+            'wait_timeouts': store.get('wait_timeouts'),
+            'publish_engine': store.get('publish_engine'),
+            'publish_mode': store.get('publish_mode'),
+            'browser_engine': store.get('browser_engine'),
+            'browser_launch_options': store.get('browser_launch_options'),
         }
+        page_concurrency = store.get('page_concurrency') or os.environ.get('PAGES_PER_STORE', 1)
+
+        engine = get_publish_engine(store.get('publish_engine'))
+        result = await engine.process(
+            store_dict,
+            checkpoint=self.checkpoint,
+            stop_event=self.stop_event,
+            browser_pool=self.browser_pool,
+            page_concurrency=page_concurrency,
+        )
+        self.scheduler.complete(turn, result)
+        return result
+
+    async def run_store(self, store):
+        """Run one store in isolation so its failure does not stop the others."""
+        store_id = store.get('id')
+        started = time.monotonic()
+        try:
+            logging.info(f"[Worker is processing {store.get('name')}] ")
+            if self.store_timeout:
+                result = await asyncio.wait_for(self.process_task(store), timeout=self.store_timeout)
+            else:
+                result = await self.process_task(store)
+            if isinstance(result, dict):
+                self.published += result.get('processed') or 0
+                if result.get('failed') or result.get('remaining'):
+                    self.retry_store(store_id)
+            metrics.incr('worker.stores_processed')
+        except asyncio.TimeoutError:
+            self.retry_store(store_id)
+            metrics.incr('worker.stores_timeout')
+            logging.warning(f"[Worker {self.index}] Store {store_id} timed out after {self.store_timeout}s")
+        except asyncio.CancelledError:
+            metrics.incr('worker.stores_cancelled')
+            logging.warning(f"[Worker {self.index}] Store {store_id} cancelled")
+            raise
+        except Exception as e:
+            self.retry_store(store_id)
+            metrics.incr('worker.stores_failed')
+            logging.exception(f"[Worker {self.index}] Store {store_id} failed: {e}")
+        finally:
+            metrics.observe('worker.store_seconds', time.monotonic() - started)
+            if store.get('domain'):
+                logging.info(f"[Worker {self.index}] {store.get('domain')} paced at "
+                             f"{pacer.rate(store.get('domain')):.2f} req/s")
+
+    def retry_store(self, store_id):
+        """Keep a store that did not finish in the next delta sync, its row may not change."""
+        if self.store_sync:
+            self.store_sync.retry(store_id)
+
+    async def run_concurrent(self, stores):
+        """Process stores with at most ``concurrency`` of them in flight."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(store):
+            async with semaphore:
+                if not self.stopping:
+                    await self.run_store(store)
+
+        for store in stores:
+            task = asyncio.create_task(bounded(store), name=f"store-{store.get('id')}")
+            self.in_flight[store.get('id')] = task
+            task.add_done_callback(lambda _, store_id=store.get('id'): self.in_flight.pop(store_id, None))
+
+        await asyncio.gather(*self.in_flight.values(), return_exceptions=True)
+
+    def request_stop(self):
+        """
+        Signal handler: the first call drains, a second one cancels at once.
+
+        A repeat within ``repeat_signal_window`` seconds of the first is ignored:
+        the same stop can arrive twice (a group-wide SIGTERM plus the one the
+        supervisor forwards, or Ctrl-C reaching every process), and only a
+        deliberate second signal should skip the drain.
+        """
+        if self.stopping:
+            if time.monotonic() - self.stop_requested_at < self.repeat_signal_window:
+                logging.info(f"[Worker {self.index}] Repeated stop signal, still draining")
+                return
+            logging.warning(f"[Worker {self.index}] Second stop signal, cancelling in-flight work")
+            self.main_task.cancel()
+            return
+
+        logging.info(f"[Worker {self.index}] Draining, {len(self.in_flight)} stores in flight")
+        self.stopping = True
+        self.stop_requested_at = time.monotonic()
+        self.stop_event.set()
+        self.poller.wake()
+        if self.main_task:
+            asyncio.get_running_loop().call_later(self.drain_timeout, self.main_task.cancel)
+
+    async def resume(self):
+        """Finish exactly the items the previous run claimed but did not complete."""
+        claims = self.checkpoint.load() if self.checkpoint else {}
+        if not claims:
+            return
+
+        logging.info(f"[Worker {self.index}] Resuming {len(claims)} checkpointed items")
+        stores = {row['id']: row for row in await self.store_service.get_list_stores()}
+        for store_id, items in self.checkpoint.by_store().items():
+            store = stores.get(store_id)
+            if store is None:
+                for item in items:
+                    self.checkpoint.release(item['id'])
+                continue
+            histories = [
+                {'id': item['id'], 'product_wp_id': item['product_wp_id'], 'is_clicked_submit': 2}
+                for item in items
+            ]
+            if self.status_journal:
+                self.status_journal.overlay(histories, 'is_clicked_submit')
+                for history in histories:
+                    if history['is_clicked_submit'] == 1:
+                        self.checkpoint.release(history['id'])
+            await self.run_store({**store, 'history_listing': histories})
+            if self.stopping:
+                break
+
+    async def cancel_in_flight(self):
+        tasks = list(self.in_flight.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def heartbeat(self):
+        """Keep this worker announced in the membership registry."""
+        while True:
+            try:
+                self.registry.heartbeat()
+            except OSError as e:
+                logging.warning(f"[Worker {self.index}] Heartbeat failed: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def refresh_ring(self):
+        if self.ring.set_nodes(self.registry.members()):
+            logging.info(f"[Worker {self.registry.member_id}] Ring members: {self.ring.nodes}")
+            metrics.gauge('worker.ring_members', len(self.ring.nodes))
+            if self.store_sync:
+                # Stores that just moved to this worker are not "changed" in the delta
+                self.store_sync.yield_all()
+
+    @property
+    def member_id(self) -> str:
+        return self.registry.member_id if self.registry else str(self.index)
 
-        await ClickSubmitEvent.process(store_dict)
+    def owner_of(self, store) -> str:
+        if self.registry:
+            return self.ring.get(store['id'])
+        return str(store['id'] % self.total)
+
+    def owns(self, store) -> bool:
+        return self.owner_of(store) == self.member_id
+
+    def owns_id(self, store_id: int) -> bool:
+        return self.owns({'id': store_id})
+
+    @staticmethod
+    def has_pending(store) -> bool:
+        return any(history.get('is_clicked_submit') != 1 for history in store.get('history_listing') or [])
+
+    async def fetch_stores(self):
+        if self.store_sync:
+            stores = await self.store_sync.sync()
+        elif self.store_cache:
+            # The producer of queue mode plans every store, the sharded loop only its own
+            stores = await self.store_cache.get(select=None if self.queue else self.owns_id)
+        else:
+            stores = await self.store_service.get_list_stores()
+        if self.status_journal:
+            # DOMAIN_API may not have the journaled statuses yet, published items must not be redone
+            for store in stores:
+                self.status_journal.overlay(store.get('history_listing') or [], 'is_clicked_submit')
+        return stores
+
+    async def produce(self):
+        """Enqueue every store with pending items onto its preferred owner's backlog, without credentials."""
+        stores = [row for row in self.scheduler.plan(await self.fetch_stores()) if self.has_pending(row)]
+        enqueued = 0
+        for row in stores:
+            payload = strip_secrets(row, self.store_secrets.fields)
+            if await self.queue.enqueue(row['id'], payload, self.owner_of(row)):
+                enqueued += 1
+        if enqueued:
+            logging.info(f"[Worker {self.member_id}] Enqueued {enqueued} stores")
+            if self.wakeup_channel:
+                await announce_work(self.cache, self.wakeup_channel, stores=enqueued)
+
+    async def run_claimed(self, item):
+        """Run a claimed store, keeping its claim alive until it is acked."""
+
+        async def keep_alive():
+            while True:
+                await asyncio.sleep(self.queue.visibility_timeout / 3)
+                if not await self.queue.touch(item['id'], item['token']):
+                    logging.warning(f"[Worker {self.member_id}] Lost the claim on store {item['id']}")
+                    return
+
+        keeper = asyncio.create_task(keep_alive())
+        try:
+            # A store whose credentials cannot be loaded stays pending and is enqueued again
+            stores = await self.store_secrets.with_secrets([item['data']])
+            if stores:
+                await self.run_store(stores[0])
+            if not await self.queue.ack(item['id'], item['token']):
+                logging.warning(f"[Worker {self.member_id}] Store {item['id']} was reclaimed before the ack")
+            if item.get('stolen'):
+                metrics.incr('worker.stores_stolen')
+        except asyncio.CancelledError:
+            await self.queue.release(item['id'], item['token'])
+            raise
+        finally:
+            keeper.cancel()
+
+    async def queue_cycle(self) -> int:
+        """Claim up to ``concurrency`` stores and process them."""
+        if await self.queue.try_become_producer(self.member_id):
+            await self.produce()
+        await self.queue.requeue_expired()
+
+        claimed = []
+        while len(claimed) < self.concurrency and not self.stopping:
+            item = await self.queue.claim(self.member_id)
+            if item is None:
+                break
+            claimed.append(item)
+            self.poller.observe_pickup(item.get('enqueued_at'))
+
+        tasks = [asyncio.create_task(self.run_claimed(item)) for item in claimed]
+        for item, task in zip(claimed, tasks):
+            self.in_flight[item['data'].get('id')] = task
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for item in claimed:
+            self.in_flight.pop(item['data'].get('id'), None)
+        return len(claimed)
 
     async def main(self):
+        self.main_task = asyncio.current_task()
         await self.startup()
+        if self.registry:
+            self.registry.heartbeat()
+            self.heartbeat_task = asyncio.create_task(self.heartbeat())
+        if self.wakeup_channel:
+            self.poller.listen(self.cache, self.wakeup_channel)
         try:
-            while True:
-                stores = await self.store_service.get_list_stores()
-                for row in stores:
-                    if row['id'] % self.total != self.index:
-                        continue
-                    logging.info(f"[Worker is processing {row['name']}] ")
-                    await self.process_task(row)
-                await asyncio.sleep(3)
+            await self.resume()
+            while not self.stopping:
+                if self.registry:
+                    self.refresh_ring()
+                db_pools.stats()
+                store_pools.stats()
+                published = self.published
+                if self.queue:
+                    await self.queue_cycle()
+                    self.poller.record(self.published > published)
+                    await self.poller.wait()
+                    continue
+
+                stores = await self.fetch_stores()
+                # Only owned stores are planned, the scheduler keeps state for every store it scores
+                stores = self.scheduler.plan([row for row in stores if self.owns(row)])
+                stores = [row for row in stores if self.owns(row) and self.has_pending(row)]
+
+                started = time.monotonic()
+                if self.concurrency == 1:
+                    for row in stores:
+                        if self.stopping:
+                            break
+                        await self.run_store(row)
+                else:
+                    await self.run_concurrent(stores)
+
+                elapsed = time.monotonic() - started
+                if stores:
+                    metrics.gauge('worker.stores_per_minute', len(stores) * 60 / max(elapsed, 1e-6))
+                    logging.info(
+                        f"[Worker {self.index}] Cycle: {len(stores)} stores in {elapsed:.1f}s "
+                        f"(concurrency={self.concurrency}, "
+                        f"{metrics.gauges['worker.stores_per_minute']:.1f} stores/min, "
+                        f"{self.poller.polls_per_hour:.0f} polls/h)"
+                    )
+                self.poller.record(self.published > published)
+                await self.poller.wait()
 
 
         except Exception as e:
@@ -86,23 +535,122 @@ class Worker:
 async def run_worker():
     index = int(os.environ.get("WORKER_INDEX", 0))
     total = int(os.environ.get("WORKER_TOTAL", 2))
-    worker = Worker(index, total)
-    await worker.main()
+    concurrency = int(os.environ.get("WORKER_CONCURRENCY", 1))
+    store_timeout = float(os.environ.get("WORKER_STORE_TIMEOUT", 0))
+
+    registry = None
+    if os.environ.get("WORKER_SHARDING", "modulo") == "ring":
+        registry = FileMembershipRegistry(
+            directory=os.environ.get("WORKER_REGISTRY_DIR", "/tmp/worker-wp/members"),
+            member_id=os.environ.get("WORKER_ID") or f"{os.uname().nodename}-{index}",
+            ttl=float(os.environ.get("WORKER_HEARTBEAT_TTL", 15)),
+        )
+
+    worker = Worker(
+        index,
+        total,
+        concurrency=concurrency,
+        store_timeout=store_timeout,
+        registry=registry,
+        heartbeat_interval=float(os.environ.get("WORKER_HEARTBEAT_INTERVAL", 5)),
+        use_queue=os.environ.get("WORKER_MODE", "poll") == "queue",
+        visibility_timeout=float(os.environ.get("WORKER_VISIBILITY_TIMEOUT", 600)),
+        poller=AdaptivePoller(
+            base_interval=float(os.environ.get("WORKER_POLL_INTERVAL", 3)),
+            max_interval=float(os.environ.get("WORKER_POLL_MAX_INTERVAL", 60)),
+            min_interval=float(os.environ.get("WORKER_POLL_MIN_INTERVAL", 1)),
+        ),
+        wakeup_channel=os.environ.get("WORKER_WAKEUP_CHANNEL", ""),
+        delta_sync=os.environ.get("STORE_SYNC", "full") == "delta",
+        shared_store_list=os.environ.get("STORE_LIST_CACHE", "0") == "1",
+        store_snapshot_path=os.environ.get("STORE_SNAPSHOT_PATH") or None,
+        scheduler=StoreScheduler(
+            item_budget=int(os.environ.get("STORE_ITEM_BUDGET", 0)),
+            time_slice=float(os.environ.get("STORE_TIME_SLICE", 0)),
+        ),
+        checkpoint=Checkpoint(
+            os.environ.get("WORKER_CHECKPOINT_PATH")
+            or f"{os.environ.get('WORKER_CHECKPOINT_DIR', '/tmp/worker-wp/checkpoints')}/"
+               f"{os.environ.get('WORKER_ID') or index}.json"
+        ),
+        drain_timeout=float(os.environ.get("WORKER_DRAIN_TIMEOUT", 60)),
+        repeat_signal_window=float(os.environ.get("WORKER_REPEAT_SIGNAL_WINDOW", 2)),
+        browser_pool=BrowserPool(
+            max_contexts=int(os.environ.get("BROWSER_MAX_CONTEXTS") or concurrency),
+            recycle_pages=int(os.environ.get("BROWSER_RECYCLE_PAGES", 500)),
+            watchdog=MemoryWatchdog(
+                interval=float(os.environ.get("MEMORY_WATCHDOG_INTERVAL", 15)),
+                soft_limit_mb=float(os.environ.get("BROWSER_SOFT_LIMIT_MB", 1500)),
+                hard_limit_mb=float(os.environ.get("BROWSER_HARD_LIMIT_MB", 3000)),
+                soft_cooldown=float(os.environ.get("BROWSER_SOFT_COOLDOWN", 300)),
+                timeline_path=(
+                    f"{os.environ['MEMORY_TIMELINE_DIR']}/{os.environ.get('WORKER_ID') or index}.jsonl"
+                    if os.environ.get("MEMORY_TIMELINE_DIR") else None
+                ),
+            ) if os.environ.get("MEMORY_WATCHDOG", "1") == "1" else None,
+        ) if os.environ.get("BROWSER_POOL", "1") == "1" else None,
+        status_journal=StatusJournal(
+            os.environ.get("STATUS_JOURNAL_PATH")
+            or f"{os.environ.get('STATUS_JOURNAL_DIR', '/tmp/worker-wp/journal')}/"
+               f"{os.environ.get('WORKER_ID') or index}.jsonl",
+            fsync_interval=float(os.environ.get("STATUS_JOURNAL_FSYNC_INTERVAL", 0.05)),
+            batch_size=int(os.environ.get("STATUS_BATCH_SIZE", 100)),
+            drain_interval=float(os.environ.get("STATUS_JOURNAL_DRAIN_INTERVAL", 1.0)),
+            max_backoff=float(os.environ.get("STATUS_JOURNAL_MAX_BACKOFF", 60)),
+            compact_bytes=int(os.environ.get("STATUS_JOURNAL_COMPACT_BYTES", 1024 * 1024)),
+        ) if os.environ.get("STATUS_JOURNAL", "0") == "1" else None,
+    )
 
+    main_task = asyncio.create_task(worker.main())
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, worker.request_stop)
+    try:
+        await main_task
+    except asyncio.CancelledError:
+        logging.warning(f"[Worker {index}] Drain deadline reached, unfinished items were checkpointed")
 
-if __name__ == "__main__":
-    import os
-    import logging
-    import asyncio
 
+def setup_logging():
     log_dir = f"{os.environ.get('WORKING_DIR', 0)}/logs"
     os.makedirs(log_dir, exist_ok=True)
-    # Setup logging
     log_file = os.path.join(log_dir, f"worker-{os.environ.get('WORKER_INDEX', '0')}.log")
     logging.basicConfig(
         filename=log_file,
         filemode="a",
         format="%(asctime)s [%(levelname)s] %(message)s",
-        level=logging.INFO
+        level=logging.INFO,
+        force=True,
     )
+
+
+def run_child(index: int, total: int):
+    """Entry point of a supervised worker process, its shard comes from the supervisor."""
+    os.environ["WORKER_INDEX"] = str(index)
+    os.environ["WORKER_TOTAL"] = str(total)
+    os.environ["WORKER_ID"] = f"{os.environ.get('WORKER_ID') or os.uname().nodename}-{index}"
+    setup_logging()
     asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WordPress publish worker")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=int(os.environ.get("WORKER_PROCESSES", 0)),
+        help="Supervise N worker processes with automatic shard assignment (0 = run a single worker in-process)",
+    )
+    args = parser.parse_args()
+
+    if args.processes > 0:
+        Supervisor(
+            run_child,
+            processes=args.processes,
+            backoff_max=float(os.environ.get("WORKER_RESTART_BACKOFF_MAX", 60)),
+            # Children drain for WORKER_DRAIN_TIMEOUT themselves, leave room for their shutdown
+            drain_timeout=float(os.environ.get("WORKER_DRAIN_TIMEOUT", 60)) + 15,
+        ).run()
+    else:
+        setup_logging()
+        asyncio.run(run_worker())